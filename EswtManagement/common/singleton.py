@@ -1,9 +1,3 @@
-
-
-class Singleton(type):
-    _instances = {}
-
-    def __call__(cls, *args, **kwargs):
-        if cls not in cls._instances:
-            cls._instances[cls] = super(Singleton, cls).__call__(*args, **kwargs)
-        return cls._instances[cls]
+# the implementation is shared with the other apps in danaul_core
+import core_path
+from danaul_core.singleton import Singleton
@@ -1,16 +1,18 @@
-from enum import Enum
-from functools import total_ordering
-from operator import methodcaller
-from common.singleton import Singleton
-from common.d_logger import Logs
-
-
-logger = Logs().get_logger("main")
+import core_path
+from danaul_core.constants import (
+    ADMIN_GROUP, DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE, UserPrivilege, RowFlags, EditLevel
+)
+from danaul_core.config import ConfigReader
 
 
 CONFIG_FILE = 'ds_config'
-ADMIN_GROUP = ['admin', 'jye']
 MAX_SESSION_COUNT = 1000
+# rows sampled when the columns are sized to their contents
+VIEW_RESIZE_PRECISION = 100
+STATS_CUBE_MAX_CUBES = 8
+STATS_CUBE_MAX_SLICES = 64
+# the stats wait for the dates to stop changing before reading the db
+STATS_RELOAD_DELAY_MS = 500
 DEFAULT_MIN_QTY = 1
 HORIZONTAL_HEADERS = {
     'patient_emr_id': '환자번호',
@@ -24,54 +26,5 @@ HORIZONTAL_HEADERS = {
     'timestamp': '시간',
 }
 
-
-class UserPrivilege:
-    Admin = 0
-    User = 1
-
-
-class RowFlags:
-    OriginalRow = 0
-    NewRow = 1
-    ChangedRow = 2
-    DeletedRow = 4
-
-
-@total_ordering
-class EditLevel(Enum):
-    UserModifiable = 1
-    AdminModifiable = 2
-    Creatable = 3
-    NotEditable = 5
-
-    def __lt__(self, other):
-        if self.__class__ is other.__class__:
-            return self.value < other.value
-        return NotImplemented
-
-
-class ConfigReader(metaclass=Singleton):
-    def __init__(self):
-        self.options = {}
-
-    def read_config_file(self, file_path):
-        try:
-            with open(file_path, 'r') as fd:
-                # strip lines
-                lines = map(methodcaller("strip"), fd.readlines())
-                # filtering lines starting with '#' or blank lines
-                lines_filtered = filter(lambda l: l and not l.startswith("#"), lines)
-                # parsing
-                words_iter = map(methodcaller("split", "="), lines_filtered)
-                # converting map obj to dict
-                self.options = {k.strip(): v.strip() for k, v in words_iter}
-
-        except Exception as e:
-            logger.exception(e)
-
-    def get_options(self, option_name: str):
-        options = self.options.get(option_name, None)
-        if options is None:
-            self.read_config_file(CONFIG_FILE)
-            options = self.options.get(option_name, None)
-        return options
+# ConfigReader of danaul_core reads the config file of this app
+ConfigReader.config_file = CONFIG_FILE
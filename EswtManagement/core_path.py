@@ -0,0 +1,10 @@
+"""
+Makes the danaul_core package at the root of the repository importable.
+The modules using danaul_core import this module first
+"""
+import os
+import sys
+
+CORE_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if CORE_ROOT not in sys.path:
+    sys.path.append(CORE_ROOT)
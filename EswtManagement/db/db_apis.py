@@ -1,64 +1,112 @@
+import asyncio
 import pandas as pd
-import re
+from datetime import date
 from typing import List
-from db.db_utils import DbUtil, make_insert_query
+import core_path
+from danaul_core.db_apis import DbApi as CoreDbApi
+from db.db_schema import (
+    SESSION_STAT_DIMENSIONS, ROLLUP_STAT_DIMENSIONS, PERIOD_STAT_DIMENSIONS
+)
 from common.d_logger import Logs
+from constants import ConfigReader
+from ds_exceptions import InvalidStatDimensionError
 
 
 logger = Logs().get_logger("db")
 
 
-class DbApi:
-    def __init__(self):
-        self.db_util = DbUtil()
+class DbApi(CoreDbApi):
+    """
+    DbApi of danaul_core with the queries particular to this app
+    """
+    async def select_session_stats(self,
+                                   beg_date: date,
+                                   end_date: date,
+                                   group_by: List[str],
+                                   grouping: str = None) -> pd.DataFrame:
+        """
+        Aggregates the sessions in the db and returns only the aggregated rows.
+        They are read from the daily rollups, or from sessions in a db
+        made before the rollups
+        :param beg_date: the first day included
+        :param end_date: the last day included
+        :param group_by: dimensions among the keys of SESSION_STAT_DIMENSIONS
+        :param grouping: None, 'ROLLUP' or 'CUBE'. In the subtotal rows, the
+        dimensions rolled up are NaN and the grouping column tells them
+        from the NULL values of the sessions
+        :return: df of the dimension columns, session_count and price_sum,
+        the names as categoricals, the periods as datetime64 and the rest as int64,
+        or None if the query fails. With grouping, the grouping column has a bit
+        per dimension set where it is rolled up, the last dimension the lowest bit,
+        so that it is 0 in the rows of no subtotal
+        """
+        invalid_dims = [dim for dim in group_by if dim not in SESSION_STAT_DIMENSIONS]
+        if invalid_dims or not group_by:
+            raise InvalidStatDimensionError(f"invalid dimensions {group_by}")
+        if grouping not in (None, 'ROLLUP', 'CUBE'):
+            raise InvalidStatDimensionError(f"invalid grouping {grouping}")
 
-    async def create_tables(self, statements: List[str]):
-        return await self.db_util.create_tables(statements)
+        if all(dim in ROLLUP_STAT_DIMENSIONS for dim in group_by):
+            stat_df = await self._select_session_stats(beg_date, end_date, group_by,
+                                                       grouping, from_rollups=True)
+            if stat_df is not None:
+                return stat_df
+            logger.warning("session_daily_stats cannot be read, "
+                           "install it with ds_init_db.py --rollup")
+        return await self._select_session_stats(beg_date, end_date, group_by,
+                                                grouping, from_rollups=False)
 
-    async def drop_tables(self, table_names: List[str]):
-        # dropping is always in a reverse order from creating
-        return await self.db_util.drop_tables(table_names[::-1])
+    async def _select_session_stats(self,
+                                    beg_date: date,
+                                    end_date: date,
+                                    group_by: List[str],
+                                    grouping: str or None,
+                                    from_rollups: bool) -> pd.DataFrame or None:
+        if from_rollups:
+            date_col = 'r.stat_date'
+            dimensions = ROLLUP_STAT_DIMENSIONS
+            agg_part = "SUM(r.session_count)::bigint, SUM(r.price_sum)::bigint "
+            from_part = ("FROM session_daily_stats AS r "
+                         "JOIN users AS u ON u.user_id = r.provider_id "
+                         "JOIN modalities AS m ON m.modality_id = r.modality_id "
+                         "JOIN body_parts AS b ON b.part_id = r.part_id ")
+        else:
+            date_col = 's.timestamp::date'
+            dimensions = SESSION_STAT_DIMENSIONS
+            agg_part = "COUNT(*), SUM(s.session_price)::bigint "
+            from_part = ("FROM sessions AS s "
+                         "JOIN users AS u ON u.user_id = s.provider_id "
+                         "JOIN modalities AS m ON m.modality_id = s.modality_id "
+                         "JOIN body_parts AS b ON b.part_id = s.part_id "
+                         "JOIN patients AS p ON p.patient_id = s.patient_id ")
 
-    async def initialize_db(self, statements: List[str]):
-        table_name_re = re.compile(r'''EXISTS\s+([a-z_]+)\s*\(''', re.MULTILINE)
-        table_names = []
-        for stmt in statements:
-            name = table_name_re.findall(stmt)
-            table_names += name
+        dim_exprs = [dimensions[dim].format(date=date_col) for dim in group_by]
+        group_part = ', '.join(dim_exprs)
+        if grouping is not None:
+            agg_part = f"{agg_part.rstrip()}, GROUPING({group_part}) "
+            group_part = f"{grouping}({group_part})"
+        query = (f"SELECT {', '.join(dim_exprs)}, {agg_part}"
+                 f"{from_part}"
+                 f"WHERE {date_col} >= $1 AND {date_col} <= $2 "
+                 f"GROUP BY {group_part}")
+        logger.debug(query)
 
-        await self.drop_tables(table_names)
-        await self.create_tables(statements)
+        records = await self.db_util.pool_select_query(query, [beg_date, end_date])
+        if records is None:
+            return None
+        # the loop may be a guest of the GUI thread, so the df is made in a thread
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self._records_to_stat_df, records, group_by, grouping is not None)
 
-    async def insert_df(self, table_name: str, df: pd.DataFrame):
-        # make a query statement part
-
-        logger.debug(f"Insert into {table_name}...")
-        logger.debug(f"\n{df}")
-
-        # make a query argument part
-        # we need to remove 'DEFAULT' from args
-        non_default_df = df.loc[:, df.iloc[0, :] != 'DEFAULT']
-        args = non_default_df.values.tolist()
-        stmt = make_insert_query(table_name, non_default_df.to_dict('records')[0])
-
-        logger.debug(stmt)
-        logger.debug(args)
-        # return await self.db_util.pool_execute(stmt, args)
-        return await self.db_util.executemany(stmt, args)
-
-    async def delete_df(self, table: str, del_df: pd.DataFrame):
-        col_name, id_series = next(del_df.items())
-        args = [(_id,) for _id in id_series]
-        logger.debug(f"Delete {col_name} = {args} from {table} ...")
-        return await self.db_util.delete(table, col_name, args)
-
-    async def update_df(self, table: str, up_df: pd.DataFrame):
-        col_names = up_df.columns
-        id_name = col_names[0]
-        place_holders = [f'{col_name}=${i}'for i, col_name in enumerate(col_names[1:], start=2)]
-        ph_str = ','.join(place_holders)
-        stmt = f"UPDATE {table} SET {ph_str} WHERE {id_name}=$1"
-        args = [_tuple[1:] for _tuple in up_df.itertuples()]
-        logger.debug(f"{stmt}")
-        logger.debug(args)
-        return await self.db_util.executemany(stmt, args)
+    @staticmethod
+    def _records_to_stat_df(records: List, group_by: List[str], with_grouping: bool) -> pd.DataFrame:
+        value_columns = ['session_count', 'price_sum', *(['grouping'] if with_grouping else [])]
+        stat_df = pd.DataFrame([tuple(record) for record in records],
+                               columns=[*group_by, *value_columns])
+        stat_df = stat_df.astype({column: 'int64' for column in value_columns})
+        for dim in group_by:
+            if dim in PERIOD_STAT_DIMENSIONS:
+                stat_df[dim] = pd.to_datetime(stat_df[dim])
+            else:
+                stat_df[dim] = stat_df[dim].astype('category')
+        return stat_df
@@ -68,3 +68,162 @@ CREATE_SESSION_TABLE = \
         FOREIGN KEY (provider_id) REFERENCES users(user_id),
         FOREIGN KEY (part_id) REFERENCES body_parts(part_id)
     );"""
+
+# daily rollups of sessions for the statistics, one cell per day, provider,
+# modality, body part and patient gender, the base cuboid of StatsCube
+CREATE_SESSION_DAILY_STATS_TABLE = \
+    """
+    CREATE TABLE IF NOT EXISTS session_daily_stats(
+        stat_date DATE NOT NULL,
+        provider_id INT NOT NULL,
+        modality_id INT NOT NULL,
+        part_id INT NOT NULL,
+        patient_gender TEXT NOT NULL,
+        session_count INT NOT NULL,
+        price_sum BIGINT NOT NULL,
+        PRIMARY KEY (stat_date, provider_id, modality_id, part_id, patient_gender)
+    );"""
+
+# keeps session_daily_stats in step with every insert, update and delete of sessions
+# and moves the sessions of a patient whose gender is corrected
+CREATE_SESSION_STATS_TRIGGER = \
+    """
+    CREATE OR REPLACE FUNCTION update_session_daily_stats() RETURNS TRIGGER AS $$
+    DECLARE
+        gender TEXT;
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            SELECT patient_gender INTO gender FROM patients WHERE patient_id = OLD.patient_id;
+            UPDATE session_daily_stats
+            SET session_count = session_count - 1,
+                price_sum = price_sum - OLD.session_price
+            WHERE stat_date = OLD.timestamp::date
+                AND provider_id = OLD.provider_id
+                AND modality_id = OLD.modality_id
+                AND part_id = OLD.part_id
+                AND patient_gender = gender;
+            DELETE FROM session_daily_stats
+            WHERE stat_date = OLD.timestamp::date
+                AND provider_id = OLD.provider_id
+                AND modality_id = OLD.modality_id
+                AND part_id = OLD.part_id
+                AND patient_gender = gender
+                AND session_count <= 0;
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            SELECT patient_gender INTO gender FROM patients WHERE patient_id = NEW.patient_id;
+            INSERT INTO session_daily_stats
+                (stat_date, provider_id, modality_id, part_id, patient_gender,
+                 session_count, price_sum)
+            VALUES (NEW.timestamp::date, NEW.provider_id, NEW.modality_id, NEW.part_id, gender,
+                    1, NEW.session_price)
+            ON CONFLICT (stat_date, provider_id, modality_id, part_id, patient_gender) DO UPDATE
+            SET session_count = session_daily_stats.session_count + 1,
+                price_sum = session_daily_stats.price_sum + EXCLUDED.price_sum;
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    DROP TRIGGER IF EXISTS session_stats_trigger ON sessions;
+    CREATE TRIGGER session_stats_trigger
+    AFTER INSERT OR UPDATE OR DELETE ON sessions
+    FOR EACH ROW EXECUTE FUNCTION update_session_daily_stats();
+
+    CREATE OR REPLACE FUNCTION move_patient_daily_stats() RETURNS TRIGGER AS $$
+    BEGIN
+        WITH moved AS (
+            SELECT timestamp::date AS stat_date, provider_id, modality_id, part_id,
+                COUNT(*) AS session_count, SUM(session_price) AS price_sum
+            FROM sessions
+            WHERE patient_id = NEW.patient_id
+            GROUP BY 1, 2, 3, 4)
+        UPDATE session_daily_stats AS r
+        SET session_count = r.session_count - moved.session_count,
+            price_sum = r.price_sum - moved.price_sum
+        FROM moved
+        WHERE r.stat_date = moved.stat_date
+            AND r.provider_id = moved.provider_id
+            AND r.modality_id = moved.modality_id
+            AND r.part_id = moved.part_id
+            AND r.patient_gender = OLD.patient_gender;
+        DELETE FROM session_daily_stats
+        WHERE patient_gender = OLD.patient_gender
+            AND session_count <= 0;
+        INSERT INTO session_daily_stats
+            (stat_date, provider_id, modality_id, part_id, patient_gender,
+             session_count, price_sum)
+        SELECT timestamp::date, provider_id, modality_id, part_id, NEW.patient_gender,
+            COUNT(*), SUM(session_price)
+        FROM sessions
+        WHERE patient_id = NEW.patient_id
+        GROUP BY 1, 2, 3, 4
+        ON CONFLICT (stat_date, provider_id, modality_id, part_id, patient_gender) DO UPDATE
+        SET session_count = session_daily_stats.session_count + EXCLUDED.session_count,
+            price_sum = session_daily_stats.price_sum + EXCLUDED.price_sum;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    DROP TRIGGER IF EXISTS patient_stats_trigger ON patients;
+    CREATE TRIGGER patient_stats_trigger
+    AFTER UPDATE OF patient_gender ON patients
+    FOR EACH ROW WHEN (OLD.patient_gender IS DISTINCT FROM NEW.patient_gender)
+    EXECUTE FUNCTION move_patient_daily_stats();"""
+
+# fills session_daily_stats from the sessions already in the db
+REBUILD_SESSION_DAILY_STATS = \
+    """
+    BEGIN;
+    LOCK TABLE sessions, patients IN SHARE MODE;
+    TRUNCATE session_daily_stats;
+    INSERT INTO session_daily_stats
+        (stat_date, provider_id, modality_id, part_id, patient_gender,
+         session_count, price_sum)
+    SELECT s.timestamp::date, s.provider_id, s.modality_id, s.part_id, p.patient_gender,
+        COUNT(*), SUM(s.session_price)
+    FROM sessions AS s
+    JOIN patients AS p ON p.patient_id = s.patient_id
+    GROUP BY 1, 2, 3, 4, 5;
+    COMMIT;"""
+
+# sessions joined with the names of their ids for display
+# provider names are taken only from the users whose job is 물리치료
+SESSION_DISPLAY_QUERY = \
+    """
+    SELECT s.*,
+        p.patient_emr_id, p.patient_name,
+        pu.user_realname AS provider_name,
+        m.modality_name,
+        b.part_name,
+        u.user_name
+    FROM sessions AS s
+    LEFT JOIN patients AS p ON p.patient_id = s.patient_id
+    LEFT JOIN users AS pu ON pu.user_id = s.provider_id AND pu.user_job = '물리치료'
+    LEFT JOIN modalities AS m ON m.modality_id = s.modality_id
+    LEFT JOIN body_parts AS b ON b.part_id = s.part_id
+    LEFT JOIN users AS u ON u.user_id = s.user_id
+    """
+
+# every session for danaul_core.export
+SESSION_EXPORT_QUERY = SESSION_DISPLAY_QUERY + "ORDER BY s.session_id"
+
+# dimensions of the session statistics and their sql expressions
+# {date} is replaced with the date column of the source
+SESSION_STAT_DIMENSIONS = {
+    'provider': 'u.user_realname',
+    'modality': 'm.modality_name',
+    'part': 'b.part_name',
+    'gender': 'p.patient_gender',
+    'day': '{date}',
+    'week': "date_trunc('week', {date})::date",
+    'month': "date_trunc('month', {date})::date",
+}
+
+PERIOD_STAT_DIMENSIONS = ['day', 'week', 'month']
+# the same dimensions read from session_daily_stats, which answers them all
+# without reading sessions
+ROLLUP_STAT_DIMENSIONS = {**SESSION_STAT_DIMENSIONS, 'gender': 'r.patient_gender'}
+
+# the tables the Lab is read from, whose versions in table_versions tell it what to sync
+VERSIONED_TABLES = ['category', 'modalities', 'patients', 'users', 'body_parts', 'sessions']
@@ -1,61 +1,31 @@
 import re
-import asyncio
 from typing import Dict
-from db.db_apis import DbApi
 from db.db_schema import *
-import pandas as pd
+import core_path
+from danaul_core.lab_base import LabBase
 from common.d_logger import Logs
 from constants import MAX_SESSION_COUNT
-from common.singleton import Singleton
 
 
 logger = Logs().get_logger("db")
 
 
-class Lab(metaclass=Singleton):
+class Lab(LabBase):
+    # sessions come with the names joined from the other tables
+    snapshot_sources = {
+        'sessions': ['sessions', 'patients', 'users', 'modalities', 'body_parts'],
+        'providers': ['users'],
+    }
+
     def __init__(self):
-        self.db_api = DbApi()
-        self.di_db_util = self.db_api.db_util
         self.max_session_count = MAX_SESSION_COUNT
-        self.show_inactive_items = False
-
-        self.table_df = {
-            'category': None,
-            'modalities': None,
-            'patients': None,
-            'users': None,
-            'body_parts': None,
-            'sessions': None,
-            'providers': None,
-        }
-
-        self.table_column_names = dict()
-        self._set_db_column_names()
-
-        self.bool_initialized = False
-        if not self.bool_initialized:
-            loop = asyncio.new_event_loop()
-            try:
-                loop.run_until_complete(self.async_init())
-            finally:
-                loop.close()
-
-    async def async_init(self):
-        if self.bool_initialized is False:
-            # getting dfs
-            get_data = [self._get_df_from_db(table) for table
-                        in self.table_df.keys()]
-            data_dfs = await asyncio.gather(*get_data)
-            for df in data_dfs:
-                logger.debug(f"Retrieved DB data \n{df}")
-            for table in reversed(self.table_df.keys()):
-                self.table_df[table] = data_dfs.pop()
-
-        self.bool_initialized = True
-        return self
-
-    def __await__(self):
-        return self.async_init().__await__()
+        super().__init__(['category',
+                          'modalities',
+                          'patients',
+                          'users',
+                          'body_parts',
+                          'sessions',
+                          'providers'])
 
     def set_max_session_count(self, count: int):
         if count > 0:
@@ -71,9 +41,7 @@ class Lab(metaclass=Singleton):
         self.table_column_names['body_parts'] = col_name_regex.findall(CREATE_BODY_PART_TABLE)
         self.table_column_names['sessions'] = col_name_regex.findall(CREATE_SESSION_TABLE)
 
-    async def _get_df_from_db(self, table: str, **kwargs) -> pd.DataFrame:
-        logger.debug(f"{table}")
-
+    def make_query(self, table: str, **kwargs) -> str:
         if (table == "users" or table == "modalities") and not self.show_inactive_items:
             query = f"SELECT * FROM {table} WHERE active = True"
 
@@ -82,40 +50,27 @@ class Lab(metaclass=Singleton):
                      "FROM users WHERE active = True and user_job = '물리치료'")
 
         elif table == "sessions":
-            main_part = f"SELECT * FROM sessions "
+            # names are resolved in the db so that the rows are ready for display
+            main_part = SESSION_DISPLAY_QUERY
             where_part = ''
             time_part = ''
-            limit_part = f"ORDER BY session_id DESC LIMIT {self.max_session_count}"
+            limit_part = f"ORDER BY s.session_id DESC LIMIT {self.max_session_count}"
             if len(kwargs) > 0:
                 beg_ts = kwargs.get('beg_timestamp', '')
                 end_ts = kwargs.get('end_timestamp', '')
                 if beg_ts != '' and end_ts != '':
-                    time_part = f"WHERE timestamp >= '{beg_ts}' AND timestamp <= '{end_ts}' "
+                    time_part = f"WHERE s.timestamp >= '{beg_ts}' AND s.timestamp <= '{end_ts}' "
 
                 if len(kwargs) == 3:
                     col_name = list(kwargs.keys())[2]
                     val = list(kwargs.values())[2]
-                    where_part = f"AND {col_name} = {val} "
+                    where_part = f"AND s.{col_name} = {val} "
             query = main_part + time_part + where_part + limit_part
 
         else:
             query = f"SELECT * FROM {table}"
 
-        logger.debug(query)
-
-        db_results = await self.di_db_util.select_query(query)
-        # logger.debug(f"{db_results[:2]}")
-        if db_results is None:
-            return pd.DataFrame()
-        df = self._db_to_df(db_results)
-        return df
-
-    def _db_to_df(self, db_records):
-        # [{'col1': v11, 'col2': v12}, {'col1': v21, 'col2': v22}, ...]
-        list_of_dict = [dict(record) for record in db_records]
-        df = pd.DataFrame(list_of_dict)
-        df.fillna("", inplace=True)
-        return df
+        return query
 
     def get_data_from_id(self, table: str, id: int, col: str) -> object:
         tdf = self.table_df[table]
@@ -139,16 +94,3 @@ class Lab(metaclass=Singleton):
             return None
         else:
             return ret_s.item()
-
-    async def update_lab_df_from_db(self, table: str, **kwargs):
-        logger.debug(f"table {table}")
-        self.table_df[table] = await self._get_df_from_db(table, **kwargs)
-
-    async def insert_df(self, table: str, new_df: pd.DataFrame):
-        return await self.db_api.insert_df(table, new_df)
-
-    async def update_df(self, table: str, up_df: pd.DataFrame):
-        return await self.db_api.update_df(table, up_df)
-
-    async def delete_df(self, table: str, del_df: pd.DataFrame):
-        return await self.db_api.delete_df(table, del_df)
@@ -0,0 +1,142 @@
+"""
+Qt SQL access for the login and user dialogs.
+Kept apart from db_utils so that QtSql is loaded only when they are used
+"""
+import sys
+from typing import List, Dict
+from PySide6.QtSql import QSqlDatabase, QSqlQuery
+from db.db_utils import make_insert_query
+from common.d_logger import Logs
+from constants import ConfigReader
+
+
+logger = Logs().get_logger("db")
+
+
+class QtDbUtil:
+    def __init__(self):
+        self.createConnection()
+
+    @staticmethod
+    def createConnection():
+        """Set up the connection to the database.
+        Check for the tables needed."""
+        config = ConfigReader()
+        database = QSqlDatabase.addDatabase("QPSQL")
+        database.setHostName(config.get_options("Host"))
+        database.setPort(int(config.get_options("Port")))
+        database.setUserName(config.get_options("User"))
+        database.setPassword(config.get_options("Password"))
+        database.setDatabaseName(config.get_options("Database"))
+        if not database.open():
+            logger.error("Unable to Connect.")
+            logger.error(database.lastError())
+            sys.exit(1)  # Error code 1 - signifies error
+        else:
+            logger.debug("Connected")
+
+        # Check if the tables we need exist in the database
+        # tables_needed = {"users"}
+        # tables_not_found = tables_needed - set(database.tables())
+        # if tables_not_found:
+        tables = database.tables()
+        if "users" not in tables:
+            logger.debug(f"The following tables are missing from"
+                         f" the database: {tables}")
+            sys.exit(1)  # Error code 1 - signifies error
+
+    @staticmethod
+    def query(query_stmt: str) -> Dict[str, List]:
+        """
+        query
+        """
+        logger.debug(query_stmt)
+
+        query = QSqlQuery()
+        # no need to cache the rows for scrolling back
+        query.setForwardOnly(True)
+        query.prepare(query_stmt)
+        query.exec()
+
+        rec = query.record()
+        col_count = rec.count()
+        field_names = [rec.fieldName(i) for i in range(col_count)]
+        logger.debug(f'<<Field Names>> {field_names}')
+
+        values = list()
+        while query.next():
+            values.append([query.value(i) for i in range(col_count)])
+        logger.debug(f'{len(values)} rows')
+
+        return {'field_names': field_names, 'values': values}
+
+    @staticmethod
+    def insert_into_db(table_name: str, record: Dict):
+        """
+        Insert input_db_record into DB
+        """
+        logger.debug(f"Inserting data into {table_name}: {record}")
+
+        args = list(record.values())
+        stmt = make_insert_query(table_name, record)
+        logger.debug(f"{stmt} :: {args}")
+
+        query = QSqlQuery()
+        query.prepare(stmt)
+        for arg in args:
+            query.addBindValue(arg)
+
+        if query.exec():
+            logger.debug("Data insertion into DB successful!")
+        else:
+            logger.debug("Data insertion into DB failed!")
+            logger.debug(f"{query.lastError()}")
+
+    @staticmethod
+    def update_db(table_name: str, record: Dict, where_clause: str):
+        """
+        Update DB with input_db_record
+        """
+        logger.debug(f"Updating data in {table_name}: {record}")
+
+        def make_stmt(_record: Dict):
+            # make a statement like "UPDATE tb name1 = $1, name2 = $2 WHERE ..."
+            place_holders = []
+            i = 1
+            for name, val in _record.items():
+                place_holders.append(f'{name} = ${i}')
+                i += 1
+            stmt_value_part = ','.join(place_holders)
+            _stmt = f"UPDATE {table_name} SET {stmt_value_part} WHERE {where_clause}"
+            return _stmt
+
+        args = list(record.values())
+        stmt = make_stmt(record)
+        logger.debug(f"{stmt} :: {args}")
+
+        query = QSqlQuery()
+        query.prepare(stmt)
+        for arg in args:
+            query.addBindValue(arg)
+
+        if query.exec():
+            logger.debug("Data updating successful!")
+        else:
+            logger.debug("Data updating failed!")
+            logger.debug(f"{query.lastError()}")
+
+    @staticmethod
+    def delete_db(table_name: str, where_clause: str):
+        """
+        Delete a record in DB
+        """
+        logger.debug(f"Deleting data in {table_name} where {where_clause}")
+        query = QSqlQuery()
+        stmt = f"DELETE FROM {table_name} WHERE {where_clause}"
+        query.prepare(stmt)
+
+        if query.exec():
+            logger.debug("Data deleting successful!")
+        else:
+            logger.debug("Data deleting failed!")
+            logger.debug(f"{query.lastError()}")
@@ -30,3 +30,7 @@ class InvalidPasswordError(BaseValueError):
 
 class DuplicatePatientEmrId(BaseValueError):
     pass
+
+
+class InvalidStatDimensionError(BaseValueError):
+    pass
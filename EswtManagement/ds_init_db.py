@@ -1,7 +1,9 @@
+import sys
 import asyncio
 import pandas as pd
 from db.db_apis import DbApi
 from db.db_schema import *
+from danaul_core.db_schema import make_table_version_statements
 from common.auth_util import encrypt_password
 
 
@@ -56,6 +58,22 @@ async def insert_initial_data(db_api):
         # make dataframe for each table
         await db_api.insert_df(table, data_df)
 
+
+async def install_session_stats(db_api):
+    """
+    Adds the daily rollups of sessions to a db made before they existed
+    and fills them from the sessions, keeping the other tables.
+    Rollups of an older key are dropped first
+    :param db_api:
+    :return:
+    """
+    await db_api.drop_tables(['session_daily_stats'])
+    statements = [CREATE_SESSION_DAILY_STATS_TABLE,
+                  CREATE_SESSION_STATS_TRIGGER,
+                  REBUILD_SESSION_DAILY_STATS]
+    await db_api.create_tables(statements)
+
+
 async def main():
     db_api = DbApi()
 
@@ -66,7 +84,10 @@ async def main():
                   CREATE_PATIENT_TABLE,
                   CREATE_USER_TABLE,
                   CREATE_BODY_PART_TABLE,
-                  CREATE_SESSION_TABLE]
+                  CREATE_SESSION_TABLE,
+                  CREATE_SESSION_DAILY_STATS_TABLE,
+                  CREATE_SESSION_STATS_TRIGGER,
+                  *make_table_version_statements(VERSIONED_TABLES)]
     await db_api.initialize_db(statements)
 
     # After creating the tables, inserting initial data
@@ -74,4 +95,11 @@ async def main():
 
 
 if __name__ == '__main__':
-    asyncio.run(main())
+    # --rollup only installs the session stats into the existing db
+    if '--rollup' in sys.argv[1:]:
+        asyncio.run(install_session_stats(DbApi()))
+    # --versions only installs the table versions the Lab syncs by
+    elif '--versions' in sys.argv[1:]:
+        asyncio.run(DbApi().install_table_versions(VERSIONED_TABLES))
+    else:
+        asyncio.run(main())
@@ -1,25 +1,31 @@
 import sys
+import core_path
+from danaul_core.startup_timer import StartupTimer
+# made first so that the timeline covers the imports below
+startup_timer = StartupTimer()
 import pandas as pd
+from datetime import date
+from typing import List
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QDockWidget, QWidget, QHBoxLayout,
-    QInputDialog, QMessageBox, QTabWidget
+    QInputDialog, QMessageBox, QTabWidget, QFileDialog
 )
-from PySide6.QtCore import Qt, Signal, Slot, QFile
+from PySide6.QtCore import Qt, Signal, Slot, QFile, QTimer
 from PySide6.QtGui import QAction, QIcon
+from danaul_core.export import export_pg_report, EXPORT_FILE_FILTER
 from common.async_helper import AsyncHelper
 from common.d_logger import Logs
 from db.ds_lab import Lab
+from db.db_schema import SESSION_EXPORT_QUERY
+from model.stats_cube import StatsCubeCache
 from model.di_data_model import DataModel
-from ui.login_widget import LoginWidget
 from ui.patient_widget import PatientWidget, PatientModel
-from ui.provider_widget import ProviderWidget, ProviderModel
-from ui.modality_widget import ModalityWidget, ModalityModel
-from ui.bodypart_widget import BodyPartWidget, BodyPartModel
 from ui.session_widget import SessionWidget, SessionModel
 from constants import ConfigReader, ADMIN_GROUP
 
 
 logger = Logs().get_logger("main")
+startup_timer.mark("imports")
 
 
 class TreatmentWindow(QMainWindow):
@@ -32,10 +38,18 @@ class TreatmentWindow(QMainWindow):
         super().__init__()
         is_test: str = ConfigReader().get_options("Testmode")
 
-        self.login_widget = LoginWidget(self)
-        self.login_widget.start_main.connect(self.start_app)
+        # made on the first use, see get_login_widget
+        self.login_widget = None
 
         self.async_helper: AsyncHelper = None
+        # the models of the tabs not shown yet are made with their widgets
+        self.provider_model = None
+        self.modality_model = None
+        self.part_model = None
+        # builders of the tab widgets by tab index
+        self.deferred_tabs = {}
+        # the file the sessions are exported to, see show_export_dialog
+        self.export_path = None
 
         if is_test.lower() == "true":
             self.start_app("test")
@@ -44,26 +58,58 @@ class TreatmentWindow(QMainWindow):
         else:
             self.login()
 
-        self.async_start_signal.connect(self.async_helper.on_worker_started)
-        self.async_done_signal.connect(self.async_helper.on_worker_done)
         self.update_all_signal.connect(self.update_all)
 
+    def get_login_widget(self):
+        """
+        The login widget connects to the db and loads bcrypt, so it is
+        made only when a user has to log in
+        :return:
+        """
+        if self.login_widget is None:
+            from ui.login_widget import LoginWidget
+            self.login_widget = LoginWidget(self)
+            self.login_widget.start_main.connect(self.start_app)
+        return self.login_widget
+
     def login(self):
-        self.login_widget.show()
+        self.get_login_widget().show()
 
     @Slot(str)
     def start_app(self, user_name: str):
+        self.user_name = user_name
+        Lab()
+        startup_timer.mark("lab")
         self.setup_models(user_name)
+        startup_timer.mark("models")
         self.async_helper = AsyncHelper(self, self.do_db_work)
+        self.async_start_signal.connect(self.async_helper.on_worker_started)
+        self.async_done_signal.connect(self.async_helper.on_worker_done)
         self.init_ui(user_name)
+        startup_timer.mark("widgets")
+        # the timer fires once the event loop has shown the window
+        QTimer.singleShot(0, self.report_startup)
+        if Lab().from_snapshot:
+            # the models are made of the local snapshots, so catch up with the db
+            self.async_start("lab_sync")
+
+    @Slot()
+    def report_startup(self):
+        startup_timer.mark("first window")
+        startup_timer.report()
 
     def setup_models(self, user_name):
         self.patient_model = PatientModel(user_name)
-        self.provider_model = ProviderModel(user_name)
-        self.modality_model = ModalityModel(user_name)
-        self.part_model = BodyPartModel(user_name)
         self.session_model = SessionModel(user_name)
 
+    def get_models(self) -> List[DataModel]:
+        """
+        :return: the models made so far
+        """
+        models = [self.patient_model, self.provider_model, self.modality_model,
+                  self.part_model, self.session_model]
+        return [model for model in models if model is not None]
+
     def init_ui(self, user_name):
         self.setWindowTitle("다나을 물리치료")
         self.setup_menu()
@@ -94,8 +140,13 @@ class TreatmentWindow(QMainWindow):
         change_user_action = QAction(QIcon('../assets/user.png'), 'Change user', self)
         change_user_action.triggered.connect(self.change_user)
 
+        export_session_action = QAction(QIcon('../assets/export.png'), 'Export sessions', self)
+        export_session_action.setStatusTip('Export all the sessions')
+        export_session_action.triggered.connect(self.show_export_dialog)
+
         file_menu = menubar.addMenu('&File')
         file_menu.addAction(exit_action)
+        file_menu.addAction(export_session_action)
         file_menu.addAction(change_user_action)
 
         # View menu
@@ -117,19 +168,18 @@ class TreatmentWindow(QMainWindow):
     def setup_child_widgets(self):
         self.patient_widget = PatientWidget(self.patient_model, self)
         self.patient_widget.set_async_helper(self.async_helper)
-        self.provider_widget = ProviderWidget(self.provider_model, self)
-        self.modality_widget = ModalityWidget(self.modality_model, self)
-        self.modality_widget.set_async_helper(self.async_helper)
-        self.part_widget = BodyPartWidget(self.part_model, self)
-        self.part_widget.set_async_helper(self.async_helper)
         self.session_widget = SessionWidget(self.session_model, self)
         self.session_widget.set_async_helper(self.async_helper)
 
+        # the other tabs are made when they are opened first
         self.left_pane = QTabWidget(self)
         self.left_pane.addTab(self.patient_widget, '환자')
-        self.left_pane.addTab(self.provider_widget, '치료사')
-        self.left_pane.addTab(self.modality_widget, '치료 형태')
-        self.left_pane.addTab(self.part_widget, '치료 부위')
+        for builder, label in [(self.build_provider_tab, '치료사'),
+                               (self.build_modality_tab, '치료 형태'),
+                               (self.build_part_tab, '치료 부위')]:
+            index = self.left_pane.addTab(QWidget(), label)
+            self.deferred_tabs[index] = builder
+        self.left_pane.currentChanged.connect(self.build_deferred_tab)
 
         self.setMinimumSize(1200, 800)
         self.setMaximumSize(1600, 1000)
@@ -138,6 +188,43 @@ class TreatmentWindow(QMainWindow):
         self.session_widget.setMinimumWidth(900)
         self.session_widget.setMaximumWidth(900)
 
+    @Slot(int)
+    def build_deferred_tab(self, index: int):
+        builder = self.deferred_tabs.pop(index, None)
+        if builder is None:
+            return
+        widget = builder()
+        label = self.left_pane.tabText(index)
+        # swapping the tab emits currentChanged again
+        self.left_pane.blockSignals(True)
+        # removeTab leaves the placeholder to its parent, so it is deleted here
+        placeholder = self.left_pane.widget(index)
+        self.left_pane.removeTab(index)
+        placeholder.deleteLater()
+        self.left_pane.insertTab(index, widget, label)
+        self.left_pane.setCurrentIndex(index)
+        self.left_pane.blockSignals(False)
+
+    def build_provider_tab(self) -> QWidget:
+        from ui.provider_widget import ProviderWidget, ProviderModel
+        self.provider_model = ProviderModel(self.user_name)
+        self.provider_widget = ProviderWidget(self.provider_model, self)
+        return self.provider_widget
+
+    def build_modality_tab(self) -> QWidget:
+        from ui.modality_widget import ModalityWidget, ModalityModel
+        self.modality_model = ModalityModel(self.user_name)
+        self.modality_widget = ModalityWidget(self.modality_model, self)
+        self.modality_widget.set_async_helper(self.async_helper)
+        return self.modality_widget
+
+    def build_part_tab(self) -> QWidget:
+        from ui.bodypart_widget import BodyPartWidget, BodyPartModel
+        self.part_model = BodyPartModel(self.user_name)
+        self.part_widget = BodyPartWidget(self.part_model, self)
+        self.part_widget.set_async_helper(self.async_helper)
+        return self.part_widget
+
     def setup_central_widget(self):
         central_widget = QWidget(self)
 
@@ -159,6 +246,12 @@ class TreatmentWindow(QMainWindow):
         patient_dock_widget.setWidget(self.patient_widget)
         self.addDockWidget(Qt.TopDockWidgetArea, patient_dock_widget)
 
+    @Slot(str)
+    def async_start(self, action: str):
+        # send signal to AsyncHelper to schedule the guest (asyncio) event loop
+        # inside the host(Qt) event loop
+        self.async_start_signal.emit(action)
+
     async def do_db_work(self, action: str):
         """
         This is the function registered to async_helper as a async coroutine
@@ -173,6 +266,8 @@ class TreatmentWindow(QMainWindow):
             result_str = await self.patient_model.save_to_db()
             logger.debug("Updating patients ...")
             await self.patient_model.update()
+            # the genders of the stats come from the patients
+            StatsCubeCache().invalidate()
             # self.session_model.set_upper_model(None)
             # await self.session_model.update()
         elif action == "modalities_save":
@@ -187,19 +282,33 @@ class TreatmentWindow(QMainWindow):
             logger.debug("Saving sessions ...")
             await self.session_model.save_to_db()
             await self.session_model.update()
+            StatsCubeCache().invalidate()
         elif action == "patients_update":
             await self.patient_model.update()
-        elif action == "providers_update":
-            await self.provider_model.update()
-        elif action == "modalities_update":
+        elif action == "providers_update" and self.provider_model is not None:
             await self.provider_model.update()
+        elif action == "modalities_update" and self.modality_model is not None:
+            await self.modality_model.update()
         elif action == "sessions_update":
             await self.session_model.update()
         elif action == "all_update":
-            await self.patient_model.update()
-            await self.provider_model.update()
-            await self.modality_model.update()
-            await self.session_model.update()
+            for model in self.get_models():
+                await model.update()
+        elif action == "lab_sync":
+            if await Lab().sync_with_db():
+                StatsCubeCache().invalidate()
+                for model in self.get_models():
+                    # an edit in progress is kept, the model is refreshed when saved
+                    if not model.is_model_editing():
+                        model.update_model_df_from_db()
+        elif action == "sessions_export":
+            # streamed to the file, not through the models
+            result_str = await export_pg_report(SESSION_EXPORT_QUERY, self.export_path)
+
+        if Lab().read_only:
+            self.statusBar().showMessage("DB에 연결할 수 없어 읽기 전용으로 실행 중입니다")
+        else:
+            self.statusBar().clearMessage()
 
         self.async_done_signal.emit(action)
 
@@ -209,6 +318,14 @@ class TreatmentWindow(QMainWindow):
                                     result_str,
                                     QMessageBox.Close)
 
+    def show_export_dialog(self):
+        fname = QFileDialog.getSaveFileName(self, 'Export sessions',
+                                            f'../{date.today().isoformat()}_sessions.xlsx',
+                                            EXPORT_FILE_FILTER)
+        if fname[0]:
+            self.export_path = fname[0]
+            self.async_start("sessions_export")
+
     def upper_layer_model_selected(self, upper_model: DataModel):
         """
         A double-click event in the left pane view triggers this method,
@@ -234,14 +351,16 @@ class TreatmentWindow(QMainWindow):
     def reset_password(self):
         u_name, ok = QInputDialog.getText(self, "Reset Password", "Enter user name:")
         if ok:
-            hashed_pw = self.login_widget.encrypt_password("a")
-            self.login_widget.insert_user_info(u_name, hashed_pw)
+            login_widget = self.get_login_widget()
+            hashed_pw = login_widget.encrypt_password("a")
+            login_widget.insert_user_info(u_name, hashed_pw)
 
     def change_user(self):
         self.close()
-        self.login_widget.start_main.disconnect()
-        self.login_widget.start_main.connect(self.show_ui)
-        self.login_widget.show()
+        login_widget = self.get_login_widget()
+        login_widget.start_main.disconnect()
+        login_widget.start_main.connect(self.show_ui)
+        login_widget.show()
 
 
 def main():
@@ -68,35 +68,16 @@ class SessionModel(DataModel):
         Adds extra columns of each name mapped to ids of supplementary data
         :return:
         """
+        # the names are already joined to the sessions by the db query,
+        # assign makes a new df leaving the one in the Lab intact
         self.model_df = Lab().table_df['sessions']
-        if self.model_df.empty:
-            return
-
-        # set more columns for the view
-        patient_df = Lab().table_df['patients']
-        pt_info = patient_df.loc[:, ['patient_id', 'patient_emr_id', 'patient_name']]
-        self.model_df = self.model_df.merge(pt_info, how='left', on='patient_id')
-
-        user_df = Lab().table_df['users']
-        provider_df = user_df.query("user_job == '물리치료'")
-        self.provider_info = provider_df.loc[:, ['user_id', 'active', 'user_realname']]
-        self.provider_info.rename(columns={'user_id': 'provider_id',
-                                           'user_realname': 'provider_name'},
-                                  inplace=True)
-        self.model_df = self.model_df.merge(self.provider_info, how='left', on='provider_id')
-
-        modality_df = Lab().table_df['modalities']
-        self.modality_info = modality_df.loc[:, ['modality_id', 'modality_name']]
-        self.model_df = self.model_df.merge(self.modality_info, how='left', on='modality_id')
-
-        part_df = Lab().table_df['body_parts']
-        self.part_info = part_df.loc[:, ['part_id', 'part_name']]
-        self.model_df = self.model_df.merge(self.part_info, how='left', on='part_id')
+        if not self.model_df.empty:
+            self.model_df = self.model_df.assign(flag=RowFlags.OriginalRow)
 
-        user_info = user_df.loc[:, ['user_id', 'user_name']]
-        self.model_df = self.model_df.merge(user_info, how='left', on='user_id')
-
-        self.model_df['flag'] = RowFlags.OriginalRow
+        # the names repeat a handful of values over the rows
+        self.set_categorical_col('provider_name', Lab().table_df['providers']['provider_name'])
+        self.set_categorical_col('modality_name', Lab().table_df['modalities']['modality_name'])
+        self.set_categorical_col('part_name', Lab().table_df['body_parts']['part_name'])
 
     def initialize_upper_model(self):
         self.upper_model = None
@@ -202,14 +183,9 @@ class SessionModel(DataModel):
         for combobox delegate
         :return:
         """
-        provider_list = Lab().table_df['providers']['provider_name'].to_list()
-        modality_list = self.modality_info['modality_name'].to_list()
-        part_list = self.part_info['part_name'].to_list()
-
         combo_info_dict = {
-            self.get_col_number('provider_name'): provider_list,
-            self.get_col_number('modality_name'): modality_list,
-            self.get_col_number('part_name'): part_list,
+            self.get_col_number(col): self.get_category_list(col)
+            for col in ['provider_name', 'modality_name', 'part_name']
         }
         return combo_info_dict
 
@@ -0,0 +1,159 @@
+import asyncio
+import threading
+import pandas as pd
+from collections import OrderedDict
+from datetime import date
+from typing import Dict, List, Tuple
+from common.d_logger import Logs
+from common.singleton import Singleton
+from db.db_apis import DbApi
+from ds_exceptions import InvalidStatDimensionError
+from constants import STATS_CUBE_MAX_CUBES, STATS_CUBE_MAX_SLICES
+
+
+logger = Logs().get_logger("main")
+
+# dimensions of the base cuboid and the periods derived from its days
+CUBE_DIMENSIONS = ['provider', 'modality', 'part', 'gender']
+CUBE_PERIODS = {'day': None, 'week': 'W', 'month': 'M'}
+CUBE_VALUES = ['session_count', 'price_sum']
+
+
+class StatsCube:
+    """
+    Session statistics of a date window held in memory.
+    The base cuboid is the session count and price sum per day, provider,
+    modality, body part and patient gender, read once from the daily rollups
+    of the db, which are kept at the same grain.
+    Any other grouping or filtering of the window is answered by rolling the
+    base cuboid up in pandas, and the slices are kept with LRU eviction.
+    The cube is built out of the event loop and sliced in the threads of
+    the pool, so the slices are shared under a lock.
+    """
+    def __init__(self, beg_date: date, end_date: date, base_df: pd.DataFrame,
+                 max_slices: int = STATS_CUBE_MAX_SLICES):
+        self.beg_date = beg_date
+        self.end_date = end_date
+        self.max_slices = max_slices
+        self.slices: OrderedDict[Tuple, pd.DataFrame] = OrderedDict()
+        self.lock = threading.Lock()
+
+        self.base_df = base_df
+        for period, freq in CUBE_PERIODS.items():
+            if freq is not None:
+                self.base_df[period] = self.base_df['day'].dt.to_period(freq).dt.start_time
+
+    @classmethod
+    async def build(cls, beg_date: date, end_date: date) -> 'StatsCube' or None:
+        """
+        :param beg_date: the first day included
+        :param end_date: the last day included
+        :return: the cube of the window or None if the query fails
+        """
+        base_df = await DbApi().select_session_stats(beg_date, end_date,
+                                                     ['day', *CUBE_DIMENSIONS])
+        if base_df is None:
+            return None
+        logger.debug(f"base cuboid of {beg_date} ~ {end_date}: {base_df.shape[0]} cells")
+        # the loop may be a guest of the GUI thread, so the periods are derived in a thread
+        return await asyncio.get_running_loop().run_in_executor(
+            None, cls, beg_date, end_date, base_df)
+
+    @staticmethod
+    def _check_dims(dims):
+        invalid_dims = [dim for dim in dims
+                        if dim not in CUBE_DIMENSIONS and dim not in CUBE_PERIODS]
+        if invalid_dims:
+            raise InvalidStatDimensionError(f"invalid dimensions {invalid_dims}")
+
+    def slice(self,
+              group_by: List[str],
+              filters: Dict[str, List] = None) -> pd.DataFrame:
+        """
+        :param group_by: dimensions among CUBE_DIMENSIONS and CUBE_PERIODS
+        :param filters: values to keep per dimension like {'provider': ['kim']}
+        :return: df of the group_by columns and CUBE_VALUES
+        """
+        filters = filters or {}
+        self._check_dims([*group_by, *filters.keys()])
+
+        key = (tuple(group_by),
+               tuple(sorted((dim, tuple(vals)) for dim, vals in filters.items())))
+        with self.lock:
+            slice_df = self.slices.get(key)
+            if slice_df is not None:
+                self.slices.move_to_end(key)
+                return slice_df
+
+        cell_df = self.base_df
+        for dim, vals in filters.items():
+            cell_df = cell_df.loc[cell_df[dim].isin(vals)]
+        if group_by:
+            slice_df = cell_df.groupby(group_by, observed=True)[CUBE_VALUES].sum().reset_index()
+        else:
+            slice_df = cell_df[CUBE_VALUES].sum().to_frame().T
+
+        with self.lock:
+            self.slices[key] = slice_df
+            if len(self.slices) > self.max_slices:
+                self.slices.popitem(last=False)
+        return slice_df
+
+    def pivot(self,
+              row_dim: str,
+              col_dim: str or None,
+              value: str = 'session_count',
+              filters: Dict[str, List] = None) -> pd.DataFrame:
+        """
+        :param row_dim: dimension of the rows
+        :param col_dim: dimension of the columns or None for the value only
+        :param value: one of CUBE_VALUES
+        :param filters:
+        :return: df indexed by row_dim values
+        """
+        if value not in CUBE_VALUES:
+            raise InvalidStatDimensionError(f"invalid value {value}")
+        if col_dim is None or col_dim == row_dim:
+            slice_df = self.slice([row_dim], filters)
+            return slice_df.set_index(row_dim)[[value]]
+
+        slice_df = self.slice([row_dim, col_dim], filters)
+        return slice_df.pivot_table(index=row_dim, columns=col_dim, values=value,
+                                    aggfunc='sum', fill_value=0, observed=True)
+
+
+class StatsCubeCache(metaclass=Singleton):
+    """
+    Cubes of the recently used date windows with LRU eviction.
+    version counts the invalidations, so that a holder of a cube
+    can tell it is out of date
+    """
+    def __init__(self, max_cubes: int = STATS_CUBE_MAX_CUBES):
+        self.max_cubes = max_cubes
+        self.cubes: OrderedDict[Tuple[date, date], StatsCube] = OrderedDict()
+        self.version = 0
+
+    async def get_cube(self, beg_date: date, end_date: date) -> StatsCube or None:
+        key = (beg_date, end_date)
+        cube = self.cubes.get(key)
+        if cube is not None:
+            self.cubes.move_to_end(key)
+            return cube
+
+        version = self.version
+        cube = await StatsCube.build(beg_date, end_date)
+        # a cube read before an invalidation is not kept
+        if cube is not None and version == self.version:
+            self.cubes[key] = cube
+            if len(self.cubes) > self.max_cubes:
+                self.cubes.popitem(last=False)
+        return cube
+
+    def invalidate(self):
+        """
+        Drops every cube so that the next request reads the db,
+        called after sessions or patients are saved or synced
+        :return:
+        """
+        self.cubes.clear()
+        self.version += 1
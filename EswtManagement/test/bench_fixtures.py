@@ -0,0 +1,134 @@
+"""
+Synthetic ESWT data and an asyncpg-compatible stand-in for DbUtil
+used by the benchmark scripts in this directory
+"""
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+from typing import Dict
+import core_path
+from danaul_core.pg_stand_in import PgStandIn as CorePgStandIn, to_records
+
+MODALITY_NAMES = ['ESWT20', 'rESWT30', 'DOSU30', 'DOSU50', 'MANUAL']
+PART_NAMES = ['Shoulder', 'Elbow', 'Plantar', 'Ankle', 'Wrist', 'Cervical', 'Lumbar', 'Thoracic']
+
+
+def scale_for(n_rows: int) -> Dict[str, int]:
+    """
+    Table sizes derived from the number of sessions
+    :param n_rows: the number of sessions
+    :return:
+    """
+    return {
+        'patients': max(10, n_rows // 20),
+        'users': 12,
+        'sessions': n_rows
+    }
+
+
+def make_tables(n_rows: int, seed: int = 0) -> Dict[str, pd.DataFrame]:
+    """
+    Makes every table of db_schema.py with synthetic data
+    Columns are in the same order as the schema
+    :param n_rows: the number of sessions
+    :param seed:
+    :return: a dict of table name and df
+    """
+    rng = np.random.default_rng(seed)
+    sizes = scale_for(n_rows)
+    n_patients, n_users = sizes['patients'], sizes['users']
+
+    tables = {}
+    tables['category'] = pd.DataFrame({
+        'category_id': [1, 2],
+        'category_name': ['ESWT', 'DOSU']
+    })
+    n_modalities = len(MODALITY_NAMES)
+    tables['modalities'] = pd.DataFrame({
+        'modality_id': np.arange(1, n_modalities + 1),
+        'active': True,
+        'modality_name': MODALITY_NAMES,
+        'modality_price': [60000, 60000, 50000, 70000, 40000],
+        'category_id': [1, 1, 2, 2, 2],
+        'description': ""
+    })
+
+    patient_ids = np.arange(1, n_patients + 1)
+    tables['patients'] = pd.DataFrame({
+        'patient_id': patient_ids,
+        'patient_emr_id': patient_ids * 7 + 100,
+        'patient_name': [f"환자{i}" for i in patient_ids],
+        'patient_gender': rng.choice(['M', 'F'], n_patients)
+    })
+
+    # the first two users are office staff and the others are providers
+    user_ids = np.arange(1, n_users + 1)
+    tables['users'] = pd.DataFrame({
+        'user_id': user_ids,
+        'active': True,
+        'user_name': ['admin', 'test'] + [f"pt{i}" for i in user_ids[2:]],
+        'user_password': [b''] * n_users,
+        'user_realname': [f"치료사{i}" for i in user_ids],
+        'user_job': ['진료', '진료'] + ['물리치료'] * (n_users - 2)
+    })
+
+    n_parts = len(PART_NAMES)
+    tables['body_parts'] = pd.DataFrame({
+        'part_id': np.arange(1, n_parts + 1),
+        'part_name': PART_NAMES,
+        'sub_parts': ""
+    })
+
+    session_ids = np.arange(1, n_rows + 1)
+    modality_ids = rng.integers(1, n_modalities + 1, n_rows)
+    base_ts = datetime(2023, 1, 1)
+    tables['sessions'] = pd.DataFrame({
+        'session_id': session_ids,
+        'patient_id': rng.integers(1, n_patients + 1, n_rows),
+        'provider_id': rng.integers(3, n_users + 1, n_rows),
+        'modality_id': modality_ids,
+        'part_id': rng.integers(1, n_parts + 1, n_rows),
+        'description': [f"#{i % 5 + 1}/5" for i in session_ids],
+        'timestamp': [base_ts + timedelta(minutes=int(i) * 10) for i in session_ids],
+        'session_price': tables['modalities']['modality_price'].to_numpy()[modality_ids - 1],
+        'user_id': rng.integers(1, 3, n_rows)
+    })
+
+    providers = tables['users'].loc[tables['users']['user_job'] == '물리치료',
+                                    ['user_id', 'user_realname']]
+    tables['providers'] = providers.rename(columns={'user_id': 'provider_id',
+                                                    'user_realname': 'provider_name'})
+    return tables
+
+
+class PgStandIn(CorePgStandIn):
+    """
+    Serves the providers query and the joined sessions query as well
+    """
+    def __init__(self, tables: Dict[str, pd.DataFrame]):
+        super().__init__(tables)
+        self.records['session_display'] = to_records(self.session_display_df(tables))
+
+    @staticmethod
+    def session_display_df(tables: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+        """
+        Result of SESSION_DISPLAY_QUERY
+        :param tables:
+        :return:
+        """
+        df = tables['sessions']
+        df = df.merge(tables['patients'][['patient_id', 'patient_emr_id', 'patient_name']],
+                      how='left', on='patient_id')
+        df = df.merge(tables['providers'], how='left', on='provider_id')
+        df = df.merge(tables['modalities'][['modality_id', 'modality_name']],
+                      how='left', on='modality_id')
+        df = df.merge(tables['body_parts'][['part_id', 'part_name']], how='left', on='part_id')
+        df = df.merge(tables['users'][['user_id', 'user_name']], how='left', on='user_id')
+        return df
+
+    def table_of(self, query: str) -> str:
+        if 'JOIN' in query:
+            return 'session_display'
+        elif 'provider_id' in query:
+            return 'providers'
+        return super().table_of(query)
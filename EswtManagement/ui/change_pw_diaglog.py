@@ -3,7 +3,7 @@ from PySide6.QtWidgets import (
     QVBoxLayout, QHBoxLayout, QMessageBox
 )
 from PySide6.QtCore import Qt, QByteArray
-from db.db_utils import QtDbUtil
+from db.qt_db_util import QtDbUtil
 from common.auth_util import *
 
 
@@ -1,28 +1,40 @@
 import sys
-from time import sleep
 from PySide6.QtWidgets import (
     QWidget, QLabel, QPushButton, QLineEdit, QMessageBox,
     QFormLayout, QVBoxLayout, QApplication,
 )
-from PySide6.QtCore import Qt, QByteArray, Signal
-from PySide6.QtGui import QFont
-from common.auth_util import *
-from db.db_utils import QtDbUtil
+from PySide6.QtCore import Qt, Signal, Slot, QThreadPool
+from PySide6.QtGui import QFont, QShowEvent
+import core_path
+from danaul_core.login import get_stored_password, PasswordCheck, LabPrefetch
+from common.async_helper import AsyncHelper
 from common.d_logger import Logs
-from ui.change_pw_diaglog import ChgPwDialog
-from ui.register_new_user_dialog import NewUserDialog
+from db.ds_lab import Lab
 
 
 logger = Logs().get_logger("main")
 
 
 class LoginWidget(QWidget):
+    """
+    The password hash is read through the pool of its own AsyncHelper and
+    checked by bcrypt in a thread of the pool, so the window stays responsive.
+    The Lab is prefetched in the background as soon as the window is shown.
+    """
     start_main = Signal(str)
+    start_signal = Signal(str)
+    done_signal = Signal(str)
 
     def __init__(self, parent=None):
         super().__init__()
         self.parent = parent
-        self.db_util = QtDbUtil()
+        # the dialogs changing the users still use Qt SQL, see get_qt_db_util
+        self.qt_db_util = None
+        self.async_helper = AsyncHelper(self, self.do_db_work)
+        # (user_name, password, change_pw) being verified
+        self.pending_login = None
+        self.password_check = None
+        self.lab_prefetched = False
         self.init_ui()
 
     def init_ui(self):
@@ -49,13 +61,14 @@ class LoginWidget(QWidget):
         login_form.addRow("Password:", self.password_entry)
 
         connect_button = QPushButton("Connect")
-        connect_button.clicked.connect(self.process_login)
+        connect_button.clicked.connect(lambda: self.process_login())
         # respond to returnPressed
         connect_button.setAutoDefault(True)
 
         change_password_button = QPushButton("Change password")
         change_password_button.clicked.connect(lambda: self.process_login(change_pw=True))
         change_password_button.setAutoDefault(True)
+        self.login_buttons = [connect_button, change_password_button]
 
         new_user_button = QPushButton("Sign up")
         new_user_button.clicked.connect(self.register_new_user)
@@ -75,20 +88,40 @@ class LoginWidget(QWidget):
 
         self.setLayout(main_v_box)
 
-    def verify_user(self, password, user_name):
-        # The following code converts QByteArray to PyBtye(bytes) format
-        # stored_pwd: type is QByteArray hex format
-        query_stmt = f"SELECT user_password FROM users WHERE user_name = '{user_name}'"
-        records = self.db_util.query(query_stmt)
-        if records['field_names'][0] != 'user_password':
-            return False
-        stored_pw: QByteArray = records['values'][0][0]
-
-        # convert QByteArray to bytes
-        stored_pw_bytes: bytes = stored_pw.data()
-        password_verified = verify_password(password, stored_pw_bytes)
-
-        return password_verified
+    def showEvent(self, event: QShowEvent):
+        super().showEvent(event)
+        if not self.lab_prefetched:
+            # the tables are read while the user is typing
+            self.lab_prefetched = True
+            QThreadPool.globalInstance().start(LabPrefetch(Lab))
+
+    async def do_db_work(self, action: str):
+        if action == "verify_user":
+            user_name, password, _ = self.pending_login
+            try:
+                stored_pw = await get_stored_password(user_name)
+            except ConnectionError as e:
+                logger.error(e)
+                self.done_signal.emit(action)
+                self.on_db_unreachable()
+                return
+            self.done_signal.emit(action)
+            self.verify_user(password, stored_pw)
+
+    def verify_user(self, password: str, stored_pw: bytes or None):
+        """
+        Starts checking the password in a thread of the pool,
+        which calls on_user_verified with the result
+        :param password:
+        :param stored_pw: the bcrypt hash in the db
+        :return:
+        """
+        if stored_pw is None:
+            self.on_user_verified(False)
+            return
+        self.password_check = PasswordCheck(password, stored_pw)
+        self.password_check.signals.checked.connect(self.on_user_verified)
+        QThreadPool.globalInstance().start(self.password_check)
 
     def process_login(self, change_pw=False):
         """
@@ -97,18 +130,39 @@ class LoginWidget(QWidget):
 
         :return:
         """
+        if self.pending_login is not None:
+            return
         # Collect information that the user entered
         user_name = self.user_entry.text()
         password = self.password_entry.text()
+        self.pending_login = (user_name, password, change_pw)
+        for button in self.login_buttons:
+            button.setEnabled(False)
+        self.start_signal.emit("verify_user")
+
+    def on_db_unreachable(self):
+        self.pending_login = None
+        for button in self.login_buttons:
+            button.setEnabled(True)
+        QMessageBox.warning(self,
+                            "Connection Failed",
+                            "Cannot connect to the database. Please try again later.",
+                            QMessageBox.Close)
+
+    @Slot(bool)
+    def on_user_verified(self, password_verified: bool):
+        user_name, _, change_pw = self.pending_login
+        self.pending_login = None
+        self.password_check = None
+        for button in self.login_buttons:
+            button.setEnabled(True)
 
-        password_verified = self.verify_user(password, user_name)
         if password_verified:
             if change_pw:
                 self.change_passwd(user_name)
             else:
                 # Close login and open the SQL management application
                 self.close()
-                sleep(0.5)  # Pause slightly before showing the parent window
                 self.start_main.emit(user_name)
                 logger.debug("Passed!!!")
         else:
@@ -117,12 +171,24 @@ class LoginWidget(QWidget):
                                 "The user name or password is incorrect.",
                                 QMessageBox.Close)
 
+    def get_qt_db_util(self):
+        """
+        Connects to the db through Qt SQL only when a user is changed
+        :return:
+        """
+        if self.qt_db_util is None:
+            from db.qt_db_util import QtDbUtil
+            self.qt_db_util = QtDbUtil()
+        return self.qt_db_util
+
     def change_passwd(self, user_name):
-        self.chang_pw_dialog = ChgPwDialog(self.db_util)
+        from ui.change_pw_diaglog import ChgPwDialog
+        self.chang_pw_dialog = ChgPwDialog(self.get_qt_db_util())
         self.chang_pw_dialog.change_passwd(user_name)
 
     def register_new_user(self):
-        self.reg_new_user_dialog = NewUserDialog(self.db_util)
+        from ui.register_new_user_dialog import NewUserDialog
+        self.reg_new_user_dialog = NewUserDialog(self.get_qt_db_util())
         self.reg_new_user_dialog.register_new_user()
 
 
@@ -4,7 +4,7 @@ from PySide6.QtWidgets import (
     QVBoxLayout, QHBoxLayout, QMessageBox, QComboBox
 )
 from PySide6.QtCore import Qt, QByteArray
-from db.db_utils import QtDbUtil
+from db.qt_db_util import QtDbUtil
 from db.ds_lab import Lab
 from common.auth_util import *
 
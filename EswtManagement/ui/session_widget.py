@@ -5,6 +5,7 @@ from PySide6.QtWidgets import (
 from PySide6.QtCore import Qt, Slot, QModelIndex, QSortFilterProxyModel
 from PySide6.QtGui import QFont
 from common.d_logger import Logs
+from constants import VIEW_RESIZE_PRECISION
 from db.ds_lab import Lab
 from model.di_data_model import DataModel
 from model.patient_model import PatientModel
@@ -49,6 +50,7 @@ class SessionWidget(QWidget):
 
         self.session_view.setAlternatingRowColors(True)
         self.session_view.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
+        self.session_view.horizontalHeader().setResizeContentsPrecision(VIEW_RESIZE_PRECISION)
         self.session_view.resizeColumnsToContents()
         self.session_view.setSortingEnabled(True)
 
@@ -1,99 +1,270 @@
 import sys
 import pandas as pd
+from typing import Dict, List
 from PySide6.QtWidgets import (
-    QWidget, QApplication, QTableView, QVBoxLayout
+    QWidget, QApplication, QTableView, QVBoxLayout, QHBoxLayout,
+    QComboBox, QDateEdit, QLabel, QPushButton
 )
-from PySide6.QtCore import QAbstractTableModel, QDate
+from PySide6.QtCore import QDate, QModelIndex, QObject, QRunnable, QThreadPool, QTimer, Signal, Slot
 from PySide6.QtGui import QStandardItemModel, QStandardItem
+from common.async_helper import AsyncHelper
 from common.d_logger import Logs
-from db.db_utils import QtDbUtil
-from db.ds_lab import Lab
+from model.stats_cube import StatsCube, StatsCubeCache, CUBE_DIMENSIONS, CUBE_PERIODS
+from constants import STATS_RELOAD_DELAY_MS
 
 
 logger = Logs().get_logger("main")
 
+DIM_LABELS = {
+    'provider': '치료사',
+    'modality': '치료형태',
+    'part': '치료부위',
+    'gender': '성별',
+    'day': '일',
+    'week': '주',
+    'month': '월',
+}
+VALUE_LABELS = {
+    'session_count': '건수',
+    'price_sum': '금액',
+}
+# double-clicking a row moves the rows to the next dimension of the row's one
+DRILL_ORDER = ['month', 'week', 'day', 'provider', 'modality', 'part', 'gender']
 
-class StatTableModel(QAbstractTableModel):
-    def __init__(self):
-        self.db_util = QtDbUtil()
-        self.max_stats_count = 1000
-        self.sessions_df = pd.DataFrame()
-        self.stat_df = None
 
-    def init_df(self, beg_date: QDate, end_date: QDate):
-        self.beg_date = beg_date
-        self.end_date = end_date
+class PivotSignals(QObject):
+    # the pivot df or None if it failed, and the number of the request
+    finished = Signal(object, int)
 
-        beg_ts = self.beg_date.toString("yyyy-MM-dd")
-        end_ts = self.end_date.addDays(1).toString("yyyy-MM-dd")
 
-        main_part = f"SELECT * FROM sessions "
-        time_part = f"WHERE timestamp >= '{beg_ts}' AND timestamp <= '{end_ts}' "
-        limit_part = f"ORDER BY session_id DESC LIMIT {self.max_stats_count}"
-        query = main_part + time_part + limit_part
-
-        records = self.db_util.query(query)
-        col_names = records['field_names']
-        values = records['values']
-
-        sess_df = pd.DataFrame(values, columns=col_names)
-        provider_df = Lab().table_df['providers']
-        modality_df = Lab().table_df['modalities']
-        sess_df = pd.merge(sess_df, provider_df, on="provider_id")
-        self.sessions_df = pd.merge(sess_df, modality_df, on="modality_id")
-        logger.debug(self.sessions_df)
+class PivotTask(QRunnable):
+    """
+    Slices and pivots a cube in a thread of the pool
+    """
+    def __init__(self, cube: StatsCube, request: int, row_dim: str, col_dim: str or None,
+                 value: str, filters: Dict[str, List]):
+        super().__init__()
+        self.cube = cube
+        self.request = request
+        self.row_dim = row_dim
+        self.col_dim = col_dim
+        self.value = value
+        self.filters = filters
+        self.signals = PivotSignals()
 
-    def pivot_table(self):
-        self.stat_df = self.sessions_df.pivot_table(index=['provider_name'],
-                                                    columns='modality_name',
-                                                    values=['session_price'],
-                                                    aggfunc=['count', 'sum'])
-        self.stat_df.columns = [a[2]+"_"+a[0] for a in self.stat_df.columns.to_flat_index()]
+    def run(self):
+        try:
+            pivot_df = self.cube.pivot(self.row_dim, self.col_dim, self.value, self.filters)
+        except Exception as e:
+            logger.exception(e)
+            pivot_df = None
+        self.signals.finished.emit(pivot_df, self.request)
 
-    def get_df(self):
-        return self.stat_df
 
 class StatWidget(QWidget):
+    """
+    Pivots of the session statistics.
+    A date window is read from the db once into a StatsCube, and changing
+    the dimensions, drilling down into a row or resetting the filters is
+    answered by the cube.
+    The cube is read on the loop of its AsyncHelper, where the pool of
+    connections lives on, once the dates stop changing. The loop runs in
+    the GUI thread, so the pandas work of building the cube is handed to
+    threads, and the pivots are made by PivotTask in the thread pool. Only
+    the results are put into the view in the GUI thread.
+    """
+    start_signal = Signal(str)
+    done_signal = Signal(str)
+
     def __init__(self, parent=None):
         super().__init__()
         self.parent = parent
         self.model = QStandardItemModel()
+        self.cube = None
+        # StatsCubeCache().version when the cube was read
+        self.cube_version = None
+        self.pivot_df = pd.DataFrame()
+        self.filters = {}
+        # only the pivot of the last request is shown
+        self.pivot_request = 0
+        self.pivot_tasks: Dict[int, PivotTask] = {}
+        # a single load at a time, and one more if the dates changed meanwhile
+        self.loading = False
+        self.load_pending = False
+        self.async_helper = AsyncHelper(self, self.do_db_work)
+        self.load_timer = QTimer(self)
+        self.load_timer.setSingleShot(True)
+        self.load_timer.setInterval(STATS_RELOAD_DELAY_MS)
+        self.load_timer.timeout.connect(self.load_cube)
         self.initUi()
 
     def initUi(self):
         self.setWindowTitle("통계")
+
+        self.beg_dateedit = QDateEdit(QDate.currentDate().addMonths(-3))
+        self.beg_dateedit.setCalendarPopup(True)
+        self.end_dateedit = QDateEdit(QDate.currentDate())
+        self.end_dateedit.setCalendarPopup(True)
+        # restarting the timer on every change reads the db once they stop
+        self.beg_dateedit.dateChanged.connect(self.load_timer.start)
+        self.end_dateedit.dateChanged.connect(self.load_timer.start)
+
+        self.row_combo = QComboBox()
+        self.col_combo = QComboBox()
+        self.col_combo.addItem('-', None)
+        for dim in [*CUBE_PERIODS.keys(), *CUBE_DIMENSIONS]:
+            self.row_combo.addItem(DIM_LABELS[dim], dim)
+            self.col_combo.addItem(DIM_LABELS[dim], dim)
+        self.row_combo.setCurrentIndex(self.row_combo.findData('provider'))
+        self.col_combo.setCurrentIndex(self.col_combo.findData('modality'))
+        self.value_combo = QComboBox()
+        for value, label in VALUE_LABELS.items():
+            self.value_combo.addItem(label, value)
+        for combo in [self.row_combo, self.col_combo, self.value_combo]:
+            combo.currentIndexChanged.connect(self.show_pivot)
+
+        reload_btn = QPushButton('새로고침')
+        reload_btn.clicked.connect(self.reload_cube)
+        reset_btn = QPushButton('전체')
+        reset_btn.clicked.connect(self.reset_filters)
+        self.filter_label = QLabel()
+
         self.stat_view = QTableView()
         self.stat_view.setModel(self.model)
+        self.stat_view.doubleClicked.connect(self.drill_down)
+
+        hbox1 = QHBoxLayout()
+        hbox1.addWidget(self.beg_dateedit)
+        hbox1.addWidget(self.end_dateedit)
+        hbox1.addWidget(reload_btn)
+        hbox2 = QHBoxLayout()
+        hbox2.addWidget(self.row_combo)
+        hbox2.addWidget(self.col_combo)
+        hbox2.addWidget(self.value_combo)
+        hbox2.addWidget(reset_btn)
 
         vbox = QVBoxLayout()
+        vbox.addLayout(hbox1)
+        vbox.addLayout(hbox2)
+        vbox.addWidget(self.filter_label)
         vbox.addWidget(self.stat_view)
 
         self.setLayout(vbox)
         self.setMinimumSize(400, 400)
-        self.setMaximumSize(600, 800)
+        self.setMaximumSize(800, 800)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        # sessions saved since the cube was read
+        if self.cube is not None and self.cube_version != StatsCubeCache().version:
+            self.load_cube()
+
+    @Slot()
+    def load_cube(self):
+        if self.loading:
+            self.load_pending = True
+            return
+        self.loading = True
+        self.filter_label.setText("통계를 가져오는 중...")
+        self.start_signal.emit("load_cube")
+
+    async def do_db_work(self, action: str):
+        if action == "load_cube":
+            beg_date = self.beg_dateedit.date().toPython()
+            end_date = self.end_dateedit.date().toPython()
+            cache = StatsCubeCache()
+            self.cube_version = cache.version
+            self.cube = await cache.get_cube(beg_date, end_date)
+        self.done_signal.emit(action)
+
+        if action == "load_cube":
+            self.loading = False
+            if self.load_pending:
+                self.load_pending = False
+                # started from the Qt loop, not from within the running guest loop
+                QTimer.singleShot(0, self.load_cube)
+                return
+            self.show_pivot()
+            if self.cube is None:
+                self.filter_label.setText("통계를 가져오지 못했습니다")
+
+    @Slot()
+    def reload_cube(self):
+        StatsCubeCache().invalidate()
+        self.load_cube()
+
+    @Slot()
+    def reset_filters(self):
+        self.filters = {}
+        self.show_pivot()
+
+    @Slot(QModelIndex)
+    def drill_down(self, index: QModelIndex):
+        if self.cube is None:
+            return
+        row_dim = self.row_combo.currentData()
+        self.filters[row_dim] = [self.pivot_df.index[index.row()]]
+        # the next dimension not filtered yet
+        for dim in DRILL_ORDER[DRILL_ORDER.index(row_dim) + 1:] + DRILL_ORDER:
+            if dim not in self.filters:
+                self.row_combo.setCurrentIndex(self.row_combo.findData(dim))
+                break
+        self.show_pivot()
+
+    @Slot()
+    def show_pivot(self):
+        self.pivot_request += 1
+        if self.cube is None:
+            self.pivot_df = pd.DataFrame()
+            self.load_df(self.pivot_df)
+            return
+
+        task = PivotTask(self.cube, self.pivot_request,
+                         self.row_combo.currentData(),
+                         self.col_combo.currentData(),
+                         self.value_combo.currentData(),
+                         {dim: list(vals) for dim, vals in self.filters.items()})
+        task.signals.finished.connect(self.on_pivot_done)
+        # kept until it finishes, with the signals it emits
+        self.pivot_tasks[self.pivot_request] = task
+        QThreadPool.globalInstance().start(task)
+
+    @Slot(object, int)
+    def on_pivot_done(self, pivot_df: pd.DataFrame or None, request: int):
+        self.pivot_tasks.pop(request, None)
+        if request != self.pivot_request:
+            return
+        if pivot_df is None:
+            self.filter_label.setText("통계를 보여주지 못했습니다")
+            return
+
+        self.pivot_df = pivot_df
+        filter_texts = [f"{DIM_LABELS[dim]}: {self.to_label(vals[0])}"
+                        for dim, vals in self.filters.items()]
+        self.filter_label.setText(', '.join(filter_texts))
+        self.load_df(self.pivot_df)
+
+    @staticmethod
+    def to_label(val) -> str:
+        if isinstance(val, pd.Timestamp):
+            return val.strftime('%Y-%m-%d')
+        return str(val)
 
     def load_df(self, data_df):
+        self.model.clear()
         self.model.setRowCount(data_df.shape[0])
         self.model.setColumnCount(data_df.shape[1])
-        self.model.setHorizontalHeaderLabels(data_df.columns.to_list())
-        self.model.setVerticalHeaderLabels(data_df.index.to_list())
-        for i, row in enumerate(data_df.itertuples()):
-            items = [QStandardItem(str(item)) for item in row[1:]]
-            self.model.insertRow(i, items)
+        self.model.setHorizontalHeaderLabels([VALUE_LABELS.get(c, self.to_label(c))
+                                              for c in data_df.columns])
+        self.model.setVerticalHeaderLabels([self.to_label(i) for i in data_df.index])
+        for i, row in enumerate(data_df.itertuples(index=False)):
+            for j, item in enumerate(row):
+                self.model.setItem(i, j, QStandardItem(f"{item:,}"))
 
 
 if __name__ == "__main__":
-    raw_data = {'col0': [1, 2, 3, 4],
-                'col1': [10, 20, 30, 40],
-                'col2': [1000, 2000, 3000, 4000]}
-    data = pd.DataFrame(raw_data)
-
     app = QApplication(sys.argv)
-    stat = StatTableModel()
-    stat.init_df(QDate(2023, 10, 1), QDate(2023, 12, 20))
-    stat.pivot_table()
-    data_df = stat.get_df()
     window = StatWidget()
-    window.load_df(data_df)
+    window.load_cube()
     window.show()
     app.exec()
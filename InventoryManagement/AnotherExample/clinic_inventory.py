@@ -1,8 +1,8 @@
 import pandas as pd
-import json
-import os.path
 import time
 import random
+from store import InventoryStore
+from reports import PurchaseReports
 
 # Creating Dictionary to store data
 available_products = {1001: {"name": "avocado", "price": 230, "category": "grocery", "quantity": 10,
@@ -15,22 +15,17 @@ available_products = {1001: {"name": "avocado", "price": 230, "category": "groce
                              },
                       }
 
-# Formatting Dictionary into JSON format
-js = json.dumps(available_products)
-
-# json.dumps() function converts a
-# Python object into a json string
-js  # so we got all data in json string format here
-
-# Create Jason File for DataBase and Write data Into File
-fd = open("../data.json", 'w')
-# it will open file into write mode if file
-# does not exists then it will create file too'''
-fd.write(js)  # writing string into file
-fd.close()  # Close File After Inserting Data
-
+# Products and purchases are kept in an indexed SQLite store
+# (see store.py), so each operation reads and writes only the
+# products it touches instead of the whole data.json
+store = InventoryStore()
+# Insert the products above only into an empty store
+store.seed(available_products)
+# Purchase reports from one frame, read again only after a purchase
+reports = PurchaseReports(store)
 exit(0)
 
+
 def admin():
     print("========\
 	Welcome to the Admin Inventory Management System \
@@ -64,59 +59,23 @@ def admin():
 
 
 def display_data():
-    fd = open("../data.json", 'r')
-    txt = fd.read()  # reading data from file
-    data = json.loads(txt)
-
-    # This will parse the JSON data, populates a
-    # Python dictionary with the data
-    fd.close()
     print("Enter '0' To Display Data Category Wise or '1' \
 	To Show Data As its Sequence Of Insertion :- ")
     n = int(input())
 
-    # Display All Records
+    # The whole table is built at once from the store,
+    # with a column for each attribute of the products
     if (n == 1):
-        table = pd.DataFrame(
-            columns=['ID', 'name', 'price', 'category', 'quantity', 'date', 'sold'])
-
-        # Creating Pandas dataframe to show data in table format later
-        for i in data.keys():
-            # Fetch all keys in dictionary
-            temp = pd.DataFrame(columns=['ID'])
-            temp['ID'] = [i]
-            for j in data[i].keys():
-                temp[j] = [data[i][j]]
-            table = table.append(temp)
-        table = table.reset_index(drop=True)
-        '''This will reset index of dataframe'''
+        # Display All Records
+        table = store.products_df()
         from IPython.display import display
         display(table)
 
     elif (n == 0):
-
         # Display Records by Category
-        table = pd.DataFrame(
-            columns=['ID', 'name', 'price', 'category',
-                     'quantity', 'date'])
-        cat = []
-
-        for i in data.keys():
-            temp = pd.DataFrame(columns=['ID'])
-            temp['ID'] = [i]
-            for j in data[i].keys():
-                temp[j] = [data[i][j]]
-                if (j == 'category'):
-                    cat.append(data[i][j])
-            table = table.append(temp)
-            table = table.reset_index(drop=True)
-            cat = set(cat)
-            cat = list(cat)
-
-        for k in cat:
-            temp = pd.DataFrame()
-            temp = table[table['category'] == k]
-            print("Data Of Products Of Category " + k + " is:- ")
+        table = store.products_df()
+        for k, temp in table.groupby('category', sort=False):
+            print("Data Of Products Of Category " + str(k) + " is:- ")
             from IPython.display import display
             display(temp)
     else:
@@ -125,19 +84,13 @@ def display_data():
 
 # display_data() # Uncomment This Line To Run This Function
 def display_specific_data():
-    fd = open("../data.json", 'r')
-    txt = fd.read()
-    data = json.loads(txt)
-    fd.close()
     print("Enter Product ID Whoes Details You Want to Have a Look on :- ")
     i = input()
 
-    # Following Code will Filter out Product ID from Records
-    if i in data.keys():
-        temp = pd.DataFrame(columns=['ID'])
-        temp['ID'] = [i]
-        for j in data[i].keys():
-            temp[j] = [data[i][j]]
+    # Following Code will look up the Product ID in the Store
+    product = store.get_product(i)
+    if product is not None:
+        temp = pd.DataFrame([{'ID': i, **product}])
         from IPython.display import display
         display(temp)
     else:
@@ -146,122 +99,99 @@ def display_specific_data():
 
 
 # display_specific_data() # Uncomment This Line To Run This Function
+def input_product():
+    """
+    Asks the attributes of a product
+    :return: dict of the attributes
+    """
+    print("Enter Product Name :- ")
+    name = input()
+    print("Enter Price of Product(price for product quantity as 1) :- ")
+    price = input()
+    print("Enter Category of Product :- ")
+    category = input()
+    print("Enter Quantity of Product :- ")
+    quantity = input()
+    print("Enter The Date on Which Product is Added in Inventory :- ")
+    date = input()
+    return {'name': name, 'price': price,
+            'category': category, 'quantity': quantity, 'date': date}
+
+
+def input_new_attributes(product):
+    """
+    Asks the new attributes to add to the product
+    :param product: dict of the attributes
+    :return:
+    """
+    print("Enter Number of New Attributes/Properties of Product :- ")
+    n = int(input())
+    for i in range(n):
+        print("Enter Attribute Name That you Want To Add :- ")
+        nam = input()
+        print("Enter The " + str(nam) + " of Product :- ")
+        pro = input()
+        product[nam] = pro
+
+
 def add_new():
-    fd = open("../data.json", 'r')
-    txt = fd.read()
-    data = json.loads(txt)
-    fd.close()
     print("Enter New Product ID :- ")
     id = input()
 
-    if id not in data.keys():
-        print("Enter Product Name :- ")
-        name = input()
-        print("Enter Price of Product(price for product quantity as 1) :- ")
-        price = input()
-        print("Enter Category of Product :- ")
-        category = input()
-        print("Enter Quantity of Product :- ")
-        quantity = input()
-        print("Enter The Date on Which Product is Added in Inventory :- ")
-        date = input()
-        data[id] = {'name': name, 'price': price,
-                    'category': category, 'quantity': quantity, 'date': date}
+    if store.get_product(id) is None:
+        product = input_product()
         print("Please Press '0' to Add New\
 		Attributes/Properties of Product or Press '1' to Continue :- ")
         z = int(input())
         if (z == 0):
-            print("Enter Number of New Attributes/Properties of Product :- ")
-            n = int(input())
-            for i in range(n):
-                print("Enter Attribute Name That you Want To Add :- ")
-                nam = input()
-                print("Enter The " + str(nam) + " of Product :- ")
-                pro = input()
-                data[id][nam] = pro
-        print("Product ID " + str(id) + " Added Successfully...!!!")
-    else:
-        print("The Product ID you Have Entered Is\
+            input_new_attributes(product)
+        if store.add_product(id, product):
+            print("Product ID " + str(id) + " Added Successfully...!!!")
+            return
+    print("The Product ID you Have Entered Is\
 		Already Present in DataBase Please Check...!!!")
-    js = json.dumps(data)
-    fd = open("../data.json", 'w')
-    fd.write(js)
-    fd.close()
 
 
 # add_new() # Uncomment This Line To Run This Function
 def delete_prod():
-    fd = open("../data.json", 'r')
-    txt = fd.read()
-    data = json.loads(txt)
-    fd.close()
     print("Enter The Product ID of The Product Which You Want To Delete :- ")
     temp = input()
-    if temp in data.keys():
-        data.pop(temp)  # here we are removing that particular data
+    if store.delete_product(temp):
         print("Product ID " + str(temp) + " Deleted Successfully...!!!")
     else:
         print("Invalid Product ID...!!!")
-    js = json.dumps(data)
-    fd = open("../data.json", 'w')
-    fd.write(js)
-    fd.close()
 
 
 # delete_prod() # Uncomment This Line To Run This Function
 def update_prod_data():
-    fd = open("../data.json", 'r')
-    txt = fd.read()
-    data = json.loads(txt)
-    fd.close()
     print("Enter The Product ID of The Product\
 	Which You Want To Update :- ")
     temp = input()
 
-    if temp in data.keys():
+    if store.get_product(temp) is not None:
         print("Want to update whole product data\
 		press '0' else '1' for specific data :- ")
         q = int(input())
 
         if (q == 0):
-            print("Enter Product Name :- ")
-            name = input()
-            print("Enter Price of Product(price for\
-			product quantity as 1) :- ")
-            price = input()
-            print("Enter Category of Product :- ")
-            category = input()
-            print("Enter Quantity of Product :- ")
-            quantity = input()
-            print("Enter The Date on Which Product\
-			is Added in Inventory :- ")
-            date = input()
-            data[temp] = {'name': name, 'price': price,
-                          'category': category, 'quantity': quantity,
-                          'date': date}
+            product = input_product()
             print(
                 "Please Press '0' to Add more Attributes/Properties of Product or Press '1' to Continue :- ")
             z = int(input())
 
             if (z == 0):
-                print("Enter Number of New Attributes/Properties of Product :- ")
-                n = int(input())
-                for i in range(n):
-                    print("Enter Attribute Name That you Want To Add :- ")
-                    nam = input()
-                    print("Enter The " + str(nam) + " of Product :- ")
-                    pro = input()
-                    data[temp][nam] = pro
+                input_new_attributes(product)
+            store.replace_product(temp, product)
             print("Product ID " + str(temp) + " Updated Successfully...!!!")
 
         elif (q == 1):
             print("Enter Which Attribute of Product You want to Update :- ")
             p = input()
 
-            if p in data[temp].keys():
+            if p in store.get_product(temp).keys():
                 print("Enter " + str(p) + " of Product :- ")
                 u = input()
-                data[temp][p] = u
+                store.update_attribute(temp, p, u)
                 print("Product ID " + str(temp) + "'s attribute " +
                       str(p) + " is Updated Successfully...!!!")
             else:
@@ -270,58 +200,34 @@ def update_prod_data():
             print("Invalid Choice...!!!")
     else:
         print("Invalid Product ID...!!!")
-    js = json.dumps(data)
-    fd = open("../data.json", 'w')
-    fd.write(js)
-    fd.close()
 
 
 # update_prod_data() # Uncomment This Line To Run This Function
 def display_reports_admin():
-    if (os.path.isfile("../user_data.json") is False):
-        # Check for if file is present or not
-        # File will be generated only if any user will do some purchase
+    if not store.has_purchases():
+        # Purchases will be present only if any user will do some purchase
         print("No User Reports are Present")
         return
-    fd = open("../user_data.json", 'r')
-    txt = fd.read()
-    user_data = json.loads(txt)
-    fd.close()
     print("Enter '0' to Check All Bills/Reports\
 	and '1' To Check Specific User Bills/Reports :- ")
+    print("Or Enter '2', '3' or '4' To Check Totals\
+	per User, per Category or per Date :- ")
     n = int(input())
     if (n == 1):
         print("Enter User ID Whoes Details You Want to Have a Look on")
         i = input()
-        temp = pd.DataFrame()
-        if i in user_data.keys():
-            for j in user_data[i].keys():
-                d = dict()
-                d['User ID'] = i
-                d['Purchase Number'] = j
-                for k in user_data[i][j].keys():
-                    d[k] = user_data[i][j][k]
-                temp = temp.append(d, ignore_index=True)
-                d = dict()
-            temp = temp.reset_index(drop=True)
+        temp = reports.user_purchases(i)
+        if not temp.empty:
             from IPython.display import display
             display(temp)
         else:
             print("You Have Entered Wrong User ID that is not Present in DataBase...!!!")
     elif (n == 0):
-        table = pd.DataFrame()
-        for i in user_data.keys():
-            temp = pd.DataFrame()
-            for j in user_data[i].keys():
-                d = dict()
-                d['User ID'] = i
-                d['Purchase Number'] = j
-                for k in user_data[i][j].keys():
-                    d[k] = user_data[i][j][k]
-                temp = temp.append(d, ignore_index=True)
-                d = dict()
-            table = table.append(temp)
-        table = table.reset_index(drop=True)
+        table = reports.purchases()
+        from IPython.display import display
+        display(table)
+    elif (n in (2, 3, 4)):
+        table = {2: reports.by_user, 3: reports.by_category, 4: reports.by_date}[n]()
         from IPython.display import display
         display(table)
     else:
@@ -330,15 +236,7 @@ def display_reports_admin():
 
 # display_reports_admin() # Uncomment This Line To Run This Function
 def delete_all():
-    fd = open("../data.json", 'r')
-    txt = fd.read()
-    data = json.loads(txt)
-    fd.close()
-    data = {}  # Replacing Data with NULL Dictionary
-    js = json.dumps(data)
-    fd = open("../data.json", 'w')
-    fd.write(js)
-    fd.close()
+    store.delete_all()
 
 
 def user():
@@ -366,27 +264,14 @@ def user():
 
 
 def display_user_data():
-    if (os.path.isfile("../user_data.json") is False):
+    if not store.has_purchases():
         print("No User Reports are Present")
         return
-    fd = open("../user_data.json", 'r')
-    txt = fd.read()
-    user_data = json.loads(txt)
-    fd.close()
     print("Enter your User ID to Display All your Bills :- ")
     i = input()
-    temp = pd.DataFrame()
-
-    if i in user_data.keys():
-        for j in user_data[i].keys():
-            d = dict()
-            d['User ID'] = i
-            d['Purchase Number'] = j
-            for k in user_data[i][j].keys():
-                d[k] = user_data[i][j][k]
-            temp = temp.append(d, ignore_index=True)
-            d = dict()
-        temp = temp.reset_index(drop=True)
+    temp = reports.user_purchases(i)
+
+    if not temp.empty:
         from IPython.display import display
         display(temp)
     else:
@@ -419,83 +304,43 @@ def generate_bill(user_id, prod_id, price, time_date, purchase_no,
 
 
 def buy_product():
-    if (os.path.isfile("../user_data.json") is False):
-        user_data = {}
-    else:
-        fd = open("../user_data.json", 'r')
-        txt = fd.read()
-        user_data = json.loads(txt)
-        fd.close()
-    fd = open("../data.json", 'r')
-    txt = fd.read()
-    data = json.loads(txt)
-    fd.close()
     print("Enter Your User ID if You are Old \
 	Customer else press '0' To New User ID :- ")
     p = int(input())
     if (p == 0):
-        if (len(user_data.keys()) == 0):
-            user_id = 1000
-        else:
-            user_id = int(list(user_data.keys())[-1]) + 1
+        user_id = store.new_user_id()
     else:
-        if str(p) in user_data.keys():
+        if store.has_user(str(p)):
             user_id = p
         else:
             user_id = -1
     if (user_id != -1):
         user_id = str(user_id)
-        price = []
-        time_date = []
-        purchase_no = []
-        name = []
-        category = []
-        quantity_all = []
-        prod_id = []
         transaction_id = ''.join(random.choice(
             '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ') for i in range(10))
         print("Enter Number of Products You Want To Buy :- ")
         n = int(input())
         print("Enter Data As Follows :- ")
-        if user_id not in user_data.keys():
-            user_data[user_id] = {}
-            g = 0
-        else:
-            g = int(list(user_data[user_id].keys())[-1]) + 1
+        g = store.last_purchase_no(user_id)
+        # Purchases and the quantities left are written together at the end
+        purchases = {}
+        quantities = {}
         for i in range(n):
             print("Enter Product ID of Product " +
                   str(i + 1) + " that you want to buy")
             id = input()
-            if id in data.keys():
-                user_data[user_id][str(i + 1 + g)] = {}
-                user_data[user_id][str(i + 1 + g)]['time_date'] = str(time.ctime())
-                time_date.append(str(time.ctime()))
-                if (float(data[id]['quantity']) == 0.0):
+            product = store.get_product(id)
+            if product is not None:
+                available = quantities.get(id, float(product['quantity']))
+                if (available == 0.0):
                     print("Product You Want is Currenty Out Of Stock...!!!")
                     continue
-                purchase_no.append(i + 1 + g)
-                name.append(data[id]['name'])
-                user_data[user_id][str(i + 1 + g)]['name'] = data[id]['name']
-                prod_id.append(id)
-                user_data[user_id][str(i + 1 + g)]['product_id'] = id
-                category.append(data[id]['category'])
-                user_data[user_id][str(
-                    i + 1 + g)]['category'] = data[id]['category']
-                print("For Product " + str(data[id]['name']) +
-                      " Available Quantity is :- " + str(data[id]['quantity']))
+                print("For Product " + str(product['name']) +
+                      " Available Quantity is :- " + str(available))
                 print("Enter Quantity of Product " +
                       str(i + 1) + " that you want to buy")
                 quantity = input()
-                if (float(quantity) <= float(data[id]['quantity'])):
-                    data[id]['quantity'] = str(
-                        float(data[id]['quantity']) - float(quantity))
-                    quantity_all.append(quantity)
-                    user_data[user_id][str(i + 1 + g)]['quantity'] = str(quantity)
-                    price.append(data[id]['price'])
-                    user_data[user_id][str(i + 1 + g)]['price'] = data[id]['price']
-                    user_data[user_id][str(
-                        i + 1 + g)]['Transaction ID'] = str(transaction_id)
-                else:
+                if (float(quantity) > available):
                     print(
                         "The Quantity You Have Asked is Quite High Than\
                         That is Available in Stock")
@@ -507,39 +352,39 @@ def buy_product():
                     if (key == 0):
                         print("Enter Quantity of Product " +
                               str(i + 1) + " that you want to buy")
-                        quantity = intput()
-                        if (float(quantity) <= float(data[id]['quantity'])):
-                            data[id]['quantity'] = str(
-                                float(data[id]['quantity']) - float(quantity))
-                            quantity_all.append(quantity)
-                            user_data[user_id][str(
-                                i + 1)]['quantity'] = str(quantity)
-                            price.append(data[id]['price'])
-                            user_data[user_id][str(
-                                i + 1)]['price'] = data[id]['price']
-                            user_data[user_id][str(
-                                i + 1 + g)]['Transaction ID'] = str(transaction_id)
-                        else:
+                        quantity = input()
+                        if (float(quantity) > available):
                             print("Invalid Operation Got Repeated...!!!")
+                            continue
                     elif (key == 1):
                         continue
                     else:
                         print("Invalid Choice...!!!")
+                        continue
+                quantities[id] = available - float(quantity)
+                purchases[i + 1 + g] = {'time_date': str(time.ctime()),
+                                        'name': product['name'],
+                                        'product_id': id,
+                                        'category': product['category'],
+                                        'quantity': str(quantity),
+                                        'price': product['price'],
+                                        'Transaction ID': str(transaction_id)}
             else:
                 print("Invalid Product ID...!!!")
-        if (len(purchase_no) != 0):
-            generate_bill(user_id, prod_id, price, time_date, purchase_no,
-                          name, category, quantity_all, transaction_id)
+        if (len(purchases) != 0):
+            store.record_purchases(user_id, purchases, quantities)
+            bill = purchases.values()
+            generate_bill(user_id,
+                          [purchase['product_id'] for purchase in bill],
+                          [purchase['price'] for purchase in bill],
+                          [purchase['time_date'] for purchase in bill],
+                          list(purchases.keys()),
+                          [purchase['name'] for purchase in bill],
+                          [purchase['category'] for purchase in bill],
+                          [purchase['quantity'] for purchase in bill],
+                          transaction_id)
     else:
         print("User ID Doesn't Exists...!!!")
-    js = json.dumps(data)
-    fd = open("../data.json", 'w')
-    fd.write(js)
-    fd.close()
-    js = json.dumps(user_data)
-    fd = open("../user_data.json", 'w')
-    fd.write(js)
-    fd.close()
 
 
 while (1):
@@ -0,0 +1,55 @@
+import pandas as pd
+from store import InventoryStore
+
+# time.ctime() of the purchases
+TIME_DATE_FORMAT = "%a %b %d %H:%M:%S %Y"
+
+
+class PurchaseReports:
+    """
+    Reports of the purchases from one frame of all of them.
+    The frame is read from the store once and kept until
+    the store records new purchases.
+    """
+    def __init__(self, store: InventoryStore):
+        self.store = store
+        self.frame = None
+        self.frame_version = None
+
+    def purchases(self):
+        """
+        :return: the frame of all the purchases with their units, amount and date
+        """
+        if self.frame is None or self.frame_version != self.store.purchases_version:
+            self.frame_version = self.store.purchases_version
+            df = self.store.purchases_df()
+            # quantities come as typed by the users
+            df['units'] = pd.to_numeric(df['quantity'], errors='coerce')
+            df['amount'] = pd.to_numeric(df['price'], errors='coerce') * df['units']
+            df['date'] = pd.to_datetime(df['time_date'], format=TIME_DATE_FORMAT,
+                                        errors='coerce').dt.date
+            self.frame = df
+        return self.frame
+
+    def user_purchases(self, user_id):
+        """
+        :param user_id:
+        :return: the purchases of the user, empty if there is no such user
+        """
+        df = self.purchases()
+        return df[df['User ID'] == str(user_id)].reset_index(drop=True)
+
+    def _aggregate(self, by):
+        df = self.purchases()
+        return df.groupby(by).agg(purchases=('Purchase Number', 'size'),
+                                  quantity=('units', 'sum'),
+                                  amount=('amount', 'sum')).reset_index()
+
+    def by_user(self):
+        return self._aggregate('User ID')
+
+    def by_category(self):
+        return self._aggregate('category')
+
+    def by_date(self):
+        return self._aggregate('date')
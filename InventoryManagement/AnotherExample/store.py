@@ -0,0 +1,256 @@
+import json
+import os.path
+import sqlite3
+from contextlib import contextmanager
+import pandas as pd
+
+# the store replaces ../data.json and ../user_data.json,
+# which are imported into it the first time it is opened
+STORE_FILE = "../inventory_store.db"
+DATA_FILE = "../data.json"
+USER_DATA_FILE = "../user_data.json"
+
+# attributes kept in their own columns, the others of a product go to extra
+PRODUCT_COLUMNS = ['name', 'price', 'category', 'quantity', 'date']
+PURCHASE_COLUMNS = ['time_date', 'name', 'product_id', 'category',
+                    'quantity', 'price', 'Transaction ID']
+FIRST_USER_ID = 1000
+
+
+class InventoryStore:
+    """
+    Products and purchases in a SQLite file.
+    Each operation reads or writes only the rows it needs through the
+    primary keys, and the writes of an operation are committed together.
+    """
+    def __init__(self, db_file=STORE_FILE):
+        self.connection = sqlite3.connect(db_file, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        # counts the writes of purchases, for the readers caching them
+        self.purchases_version = 0
+        self._create_tables()
+        if self._is_empty():
+            self._import_json(DATA_FILE, USER_DATA_FILE)
+
+    def _create_tables(self):
+        with self.transaction() as conn:
+            conn.execute("""CREATE TABLE IF NOT EXISTS products (
+                                id TEXT PRIMARY KEY,
+                                name TEXT,
+                                price NUMERIC,
+                                category TEXT,
+                                quantity NUMERIC,
+                                date TEXT,
+                                extra TEXT NOT NULL DEFAULT '{}'
+                            )""")
+            conn.execute("""CREATE TABLE IF NOT EXISTS purchases (
+                                user_id TEXT NOT NULL,
+                                purchase_no INTEGER NOT NULL,
+                                time_date TEXT,
+                                name TEXT,
+                                product_id TEXT,
+                                category TEXT,
+                                quantity NUMERIC,
+                                price NUMERIC,
+                                transaction_id TEXT,
+                                PRIMARY KEY (user_id, purchase_no)
+                            )""")
+
+    @contextmanager
+    def transaction(self):
+        """
+        Statements in the block are committed together, or rolled back
+        if an exception is raised
+        :return: connection
+        """
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield self.connection
+        except BaseException:
+            self.connection.rollback()
+            raise
+        else:
+            self.connection.commit()
+
+    def _is_empty(self):
+        cur = self.connection.execute("SELECT (SELECT count(*) FROM products)"
+                                      " + (SELECT count(*) FROM purchases)")
+        return cur.fetchone()[0] == 0
+
+    def _import_json(self, data_file, user_data_file):
+        """
+        Imports the json files of the former storage, if any
+        :param data_file:
+        :param user_data_file:
+        :return:
+        """
+        data = {}
+        if os.path.isfile(data_file):
+            with open(data_file, 'r') as fd:
+                data = json.load(fd)
+        user_data = {}
+        if os.path.isfile(user_data_file):
+            with open(user_data_file, 'r') as fd:
+                user_data = json.load(fd)
+
+        purchases = [(user_id, int(purchase_no),
+                      *[purchase.get(column) for column in PURCHASE_COLUMNS])
+                     for user_id, user_purchases in user_data.items()
+                     for purchase_no, purchase in user_purchases.items()]
+        with self.transaction() as conn:
+            conn.executemany("INSERT INTO products VALUES (?, ?, ?, ?, ?, ?, ?)",
+                             [self._product_row(product_id, product)
+                              for product_id, product in data.items()])
+            conn.executemany("INSERT INTO purchases VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                             purchases)
+
+    @staticmethod
+    def _product_row(product_id, product):
+        extra = {k: v for k, v in product.items() if k not in PRODUCT_COLUMNS}
+        return (str(product_id), *[product.get(column) for column in PRODUCT_COLUMNS],
+                json.dumps(extra))
+
+    @staticmethod
+    def _product_dict(row):
+        product = dict(zip(PRODUCT_COLUMNS, row[1:6]))
+        product.update(json.loads(row[6]))
+        return product
+
+    def seed(self, products):
+        """
+        Adds the products only when there is none yet
+        :param products: {id: {attribute: value}}
+        :return:
+        """
+        if self.connection.execute("SELECT 1 FROM products LIMIT 1").fetchone() is None:
+            with self.transaction() as conn:
+                conn.executemany("INSERT INTO products VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                 [self._product_row(product_id, product)
+                                  for product_id, product in products.items()])
+
+    def products_df(self):
+        """
+        :return: a DataFrame of all the products in the order of insertion,
+                 with a column for each of their extra attributes
+        """
+        df = pd.read_sql("SELECT id AS ID, name, price, category, quantity, date, extra"
+                         " FROM products ORDER BY rowid",
+                         self.connection)
+        extra_df = pd.DataFrame.from_records(df.pop('extra').map(json.loads).tolist(),
+                                             index=df.index)
+        return pd.concat([df, extra_df], axis=1)
+
+    def get_product(self, product_id):
+        """
+        :param product_id:
+        :return: dict of the attributes or None
+        """
+        cur = self.connection.execute("SELECT * FROM products WHERE id = ?", (product_id,))
+        row = cur.fetchone()
+        return None if row is None else self._product_dict(row)
+
+    def add_product(self, product_id, product):
+        """
+        :param product_id:
+        :param product: dict of the attributes
+        :return: False if product_id is already there
+        """
+        try:
+            with self.transaction() as conn:
+                conn.execute("INSERT INTO products VALUES (?, ?, ?, ?, ?, ?, ?)",
+                             self._product_row(product_id, product))
+        except sqlite3.IntegrityError:
+            return False
+        return True
+
+    def replace_product(self, product_id, product):
+        """
+        Replaces all the attributes of a product
+        :param product_id:
+        :param product: dict of the attributes
+        :return:
+        """
+        with self.transaction() as conn:
+            conn.execute("UPDATE products SET name = ?, price = ?, category = ?,"
+                         " quantity = ?, date = ?, extra = ? WHERE id = ?",
+                         (*self._product_row(product_id, product)[1:], product_id))
+
+    def update_attribute(self, product_id, name, value):
+        """
+        :param product_id:
+        :param name:
+        :param value:
+        :return: False if the product has no such attribute
+        """
+        with self.transaction() as conn:
+            row = conn.execute("SELECT * FROM products WHERE id = ?", (product_id,)).fetchone()
+            if row is None or name not in self._product_dict(row):
+                return False
+            if name in PRODUCT_COLUMNS:
+                conn.execute(f"UPDATE products SET {name} = ? WHERE id = ?", (value, product_id))
+            else:
+                extra = json.loads(row[6])
+                extra[name] = value
+                conn.execute("UPDATE products SET extra = ? WHERE id = ?",
+                             (json.dumps(extra), product_id))
+        return True
+
+    def delete_product(self, product_id):
+        """
+        :param product_id:
+        :return: False if there is no such product
+        """
+        with self.transaction() as conn:
+            cur = conn.execute("DELETE FROM products WHERE id = ?", (product_id,))
+        return cur.rowcount > 0
+
+    def delete_all(self):
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM products")
+
+    def has_user(self, user_id):
+        cur = self.connection.execute("SELECT 1 FROM purchases WHERE user_id = ? LIMIT 1",
+                                      (user_id,))
+        return cur.fetchone() is not None
+
+    def has_purchases(self):
+        return self.connection.execute("SELECT 1 FROM purchases LIMIT 1").fetchone() is not None
+
+    def new_user_id(self):
+        cur = self.connection.execute("SELECT MAX(CAST(user_id AS INTEGER)) FROM purchases")
+        last_user_id = cur.fetchone()[0]
+        return str(FIRST_USER_ID if last_user_id is None else last_user_id + 1)
+
+    def last_purchase_no(self, user_id):
+        cur = self.connection.execute("SELECT MAX(purchase_no) FROM purchases WHERE user_id = ?",
+                                      (user_id,))
+        last_purchase_no = cur.fetchone()[0]
+        return 0 if last_purchase_no is None else last_purchase_no
+
+    def record_purchases(self, user_id, purchases, quantities):
+        """
+        Writes the purchases and the quantities left in stock together
+        :param user_id:
+        :param purchases: {purchase_no: {attribute: value}} with PURCHASE_COLUMNS
+        :param quantities: {product_id: quantity left}
+        :return:
+        """
+        with self.transaction() as conn:
+            conn.executemany("INSERT INTO purchases VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                             [(user_id, purchase_no,
+                               *[purchase.get(column) for column in PURCHASE_COLUMNS])
+                              for purchase_no, purchase in purchases.items()])
+            conn.executemany("UPDATE products SET quantity = ? WHERE id = ?",
+                             [(quantity, product_id) for product_id, quantity in quantities.items()])
+        self.purchases_version += 1
+
+    def purchases_df(self):
+        """
+        :return: a DataFrame of all the purchases in the order of insertion
+        """
+        return pd.read_sql("SELECT user_id AS 'User ID', purchase_no AS 'Purchase Number',"
+                           " time_date, name, product_id, category, quantity, price,"
+                           " transaction_id AS 'Transaction ID'"
+                           " FROM purchases ORDER BY rowid",
+                           self.connection)
@@ -1,29 +1,115 @@
 import sqlite3
 from sqlite3 import Error
+from contextlib import contextmanager
 from datetime import date
+from pathlib import Path
 import pyinputplus as pyip
 
 
+# WAL lets readers go on while a transaction is written, and with
+# synchronous=NORMAL a commit no longer waits for an fsync
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+    'busy_timeout': 5000,
+}
+# prepared statements kept per connection
+CACHED_STATEMENTS = 256
+
+
 class InventoryDB:
-    def __init__(self, db_file):
+    def __init__(self, db_file, pragmas=None):
+        """
+        :param db_file:
+        :param pragmas: overrides of DEFAULT_PRAGMAS
+        """
+        self.db_file = db_file
+        self.pragmas = {**DEFAULT_PRAGMAS, **(pragmas or {})}
+        # depth of the nested transaction() blocks
+        self._transaction_depth = 0
         self.connection = self._create_connection(db_file)
         self._create_inventory_tables()
 
-    def _create_connection(self, db_file):
+    def _create_connection(self, db_file, read_only=False):
         """
         Create a database connection to the SQLite database
-        specified by db_file
+        specified by db_file.
+        The connection is in autocommit mode and transactions are
+        begun explicitly by transaction()
         :param db_file:
+        :param read_only:
         :return: Connection object or None
         """
         conn = None
         try:
-            conn = sqlite3.connect(db_file)
+            if read_only:
+                conn = sqlite3.connect(Path(db_file).resolve().as_uri() + '?mode=ro',
+                                       uri=True,
+                                       isolation_level=None,
+                                       cached_statements=CACHED_STATEMENTS)
+            else:
+                conn = sqlite3.connect(db_file,
+                                       isolation_level=None,
+                                       cached_statements=CACHED_STATEMENTS)
+            for name, value in self.pragmas.items():
+                # the journal mode is kept in the db file
+                if read_only and name == 'journal_mode':
+                    continue
+                conn.execute(f"PRAGMA {name}={value}")
         except Error as e:
             print(e)
 
         return conn
 
+    @contextmanager
+    def transaction(self):
+        """
+        Statements in the block are committed together, or rolled back
+        if an exception is raised. A nested block joins the outer one
+        :return: connection
+        """
+        if self._transaction_depth > 0:
+            self._transaction_depth += 1
+            try:
+                yield self.connection
+            finally:
+                self._transaction_depth -= 1
+            return
+
+        # takes the write lock at once so that what is read in the block stays valid
+        self.connection.execute("BEGIN IMMEDIATE")
+        self._transaction_depth = 1
+        try:
+            yield self.connection
+        except BaseException:
+            self.connection.rollback()
+            raise
+        else:
+            self.connection.commit()
+        finally:
+            self._transaction_depth = 0
+
+    @contextmanager
+    def reader(self):
+        """
+        A read only connection of its own, which sees the last committed
+        state while the main connection goes on writing.
+        It may be used in another thread than the one of the main connection
+        :return: connection
+        """
+        if self.db_file == ':memory:':
+            # an in-memory db cannot be opened twice
+            yield self.connection
+            return
+
+        conn = self._create_connection(self.db_file, read_only=True)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
     def _create_table(self, create_table_sql):
         """ create a table from the create_table_sql statement
         :param conn: Connection object
@@ -47,10 +133,48 @@ class InventoryDB:
                                         date text NOT NULL
                                     );"""
 
+        # the id of the last transaction of each item, kept by the triggers below
+        # so that the current inventory does not scan the whole history
+        sql_create_current_inventory_table = """CREATE TABLE IF NOT EXISTS current_inventory (
+                                        item_code text PRIMARY KEY,
+                                        last_id integer
+                                    );"""
+        sql_create_code_index = """CREATE INDEX IF NOT EXISTS transactions_code_id_idx
+                                    ON transactions (item_code, id);"""
+        sql_create_insert_trigger = """CREATE TRIGGER IF NOT EXISTS current_inventory_insert
+                                    AFTER INSERT ON transactions
+                                    BEGIN
+                                        INSERT OR REPLACE INTO current_inventory(item_code, last_id)
+                                        VALUES (NEW.item_code, NEW.id);
+                                    END;"""
+        sql_create_delete_trigger = """CREATE TRIGGER IF NOT EXISTS current_inventory_delete
+                                    AFTER DELETE ON transactions
+                                    BEGIN
+                                        UPDATE current_inventory
+                                        SET last_id = (SELECT MAX(id) FROM transactions
+                                                       WHERE item_code = OLD.item_code)
+                                        WHERE item_code = OLD.item_code AND last_id = OLD.id;
+                                        DELETE FROM current_inventory
+                                        WHERE item_code = OLD.item_code AND last_id IS NULL;
+                                    END;"""
+        # fills current_inventory of a db made before it
+        sql_fill_current_inventory = """INSERT OR IGNORE INTO current_inventory(item_code, last_id)
+                                    SELECT item_code, MAX(id) FROM transactions GROUP BY item_code;"""
+
         # create tables
         if self.connection is not None:
-            # create transactions table
-            self._create_table(sql_create_transactions_table)
+            with self.transaction():
+                # create transactions table
+                self._create_table(sql_create_transactions_table)
+                cur = self.connection.execute("SELECT name FROM sqlite_master"
+                                              " WHERE type='table' AND name='current_inventory'")
+                has_current_inventory = cur.fetchone() is not None
+                self._create_table(sql_create_current_inventory_table)
+                self._create_table(sql_create_code_index)
+                self._create_table(sql_create_insert_trigger)
+                self._create_table(sql_create_delete_trigger)
+                if not has_current_inventory:
+                    self._create_table(sql_fill_current_inventory)
         else:
             print("Error! cannot create the database self.connection.")
 
@@ -60,9 +184,9 @@ class InventoryDB:
         :param sql:
         :return: cursor
         """
+        # committed by itself unless in a transaction() block
         cursor = self.connection.cursor()
         cursor.execute(*sql)
-        self.connection.commit()
         return cursor
 
     def create_transaction(self, transaction):
@@ -76,6 +200,45 @@ class InventoryDB:
         cur = self._execute_sql(sql, transaction)
         return cur.lastrowid
 
+    def batch_outbound(self, sell_list):
+        """
+        Outbound of a whole sell list in a single transaction.
+        The quantities of the same code are summed up into one row, and
+        the codes short of inventory or not in the db are left out
+        :param sell_list: a list of (code, quantity)
+        :return: a report of each code,
+                 {code: {'quantity': q, 'inventory': new inventory or None, 'shortfall': n}}
+        """
+        quantities = {}
+        for code, quan in sell_list:
+            quantities[code] = quantities.get(code, 0) + quan
+
+        report = {}
+        transactions = []
+        today = date.today().isoformat()
+        # the inventories read stay valid until the rows are written
+        with self.transaction():
+            last_items = {row[1]: row for row in self.select_all_last_transactions()}
+            for code, quan in quantities.items():
+                last_item = last_items.get(code)
+                if last_item is None:
+                    report[code] = {'quantity': quan, 'inventory': None, 'shortfall': quan}
+                    continue
+
+                inventory = last_item[5]
+                if inventory < quan:
+                    report[code] = {'quantity': quan, 'inventory': None, 'shortfall': quan - inventory}
+                    continue
+
+                transactions.append((code, last_item[2], 'outbound', -quan, inventory - quan, today))
+                report[code] = {'quantity': quan, 'inventory': inventory - quan, 'shortfall': 0}
+
+            sql = ''' INSERT INTO transactions(item_code,item_name,category,quantity,inventory,date)
+                      VALUES(?,?,?,?,?,?) '''
+            self.connection.executemany(sql, transactions)
+
+        return report
+
     def update_transaction(self, transaction):
         """
         Update(Modify) the transaction category, quantity, inventory, date
@@ -125,12 +288,33 @@ class InventoryDB:
         :param
         :return:
         """
-        sql = "SELECT * FROM transactions" \
-              " WHERE id in (SELECT MAX(id) FROM transactions GROUP BY item_code) ORDER BY id DESC"
-        cur = self._execute_sql(sql)
+        sql = "SELECT t.* FROM current_inventory c JOIN transactions t ON t.id = c.last_id" \
+              " ORDER BY t.id DESC"
+        cur = self.connection.execute(sql)
         rows = cur.fetchall()
         return rows
 
+    def select_last_transaction_by_code(self, code):
+        """
+        Query the last transaction of an item
+        :param code:
+        :return: row or None
+        """
+        sql = "SELECT t.* FROM current_inventory c JOIN transactions t ON t.id = c.last_id" \
+              " WHERE c.item_code=?"
+        cur = self.connection.execute(sql, (code,))
+        return cur.fetchone()
+
+    def select_inventory_checksum(self):
+        """
+        Query the number of items and the sum of their inventories
+        :return: (count, sum)
+        """
+        sql = "SELECT count(*), COALESCE(SUM(t.inventory), 0)" \
+              " FROM current_inventory c JOIN transactions t ON t.id = c.last_id"
+        cur = self.connection.execute(sql)
+        return cur.fetchone()
+
     def select_transaction_by_code(self, code):
         """
         Query transactions by code
@@ -148,7 +332,7 @@ class InventoryDB:
 if __name__ == '__main__':
     inv_db = InventoryDB('test_inventory.db')
 
-    with inv_db.connection:
+    with inv_db.transaction():
         transactions = [
             ('AA', 'band', 'inbound', 10, 10, date.today().isoformat()),
             ('BB', 'needle', 'inbound', 10, 10, date.today().isoformat()),
@@ -2,6 +2,9 @@ import unicodedata
 
 
 class InvItem:
+    # thousands of items are kept in memory by ItemsHandler
+    __slots__ = ('handler', 'code', 'name', 'inventory')
+
     def __init__(self, handler, code, name, inventory):
         self.handler = handler
         self.code = code
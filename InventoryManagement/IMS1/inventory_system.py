@@ -1,9 +1,12 @@
+import core_path
+from danaul_core.export import export_sqlite, EXPORT_WRITERS
 from inventory_db import InventoryDB
 from items_handler import ItemsHandler
 import pyinputplus as pyip
 import pandas as pd
 from datetime import date
 import os
+import threading
 
 
 class InvSystem:
@@ -20,28 +23,48 @@ class InvSystem:
         print("2. 모든 거래 기록")
         print("99. Exit\n")
         user_input = pyip.inputInt('번호 입력: ')
+        if user_input not in [1, 2]:
+            return
+
+        suffix = pyip.inputMenu(list(EXPORT_WRITERS.keys()), "파일 형식:\n")
         if user_input == 1:
-            file_name = date.today().isoformat() + '_inventory.xlsx'
-            self._write_inventory_to_xl(file_name)
+            file_name = date.today().isoformat() + '_inventory' + suffix
+            self._start_export(self._write_inventory_to_xl, file_name)
         elif user_input == 2:
-            file_name = date.today().isoformat() + '_all_transactions.xlsx'
-            self._write_transactions_to_xl(file_name)
-        elif user_input == 99:
-            return
-        else:
-            return
+            file_name = date.today().isoformat() + '_all_transactions' + suffix
+            self._start_export(self._write_transactions_to_xl, file_name)
+
+    def _start_export(self, write_fn, file_path):
+        """
+        Writes the xl file in a thread of its own, so that
+        entering transactions goes on meanwhile
+        :param write_fn:
+        :param file_path:
+        :return:
+        """
+        def export():
+            try:
+                write_fn(file_path)
+                print(f"\n{file_path} 내보내기 완료")
+            except Exception as e:
+                print(f"\n{file_path} 내보내기 실패: {e}")
+
+        threading.Thread(target=export).start()
+        print(f"{file_path} 내보내는 중...")
 
     def _write_inventory_to_xl(self, file_path):
-        items_df = pd.read_sql('SELECT item_code, item_name, inventory FROM transactions' \
-                               ' WHERE id in (SELECT MAX(id) FROM transactions GROUP BY item_code)' \
-                               ' ORDER BY id DESC',
-                               self.inv_db.connection)
-        items_df.to_excel(file_path, index=False)
+        # a reader connection sees the last commit while the main one writes
+        with self.inv_db.reader() as conn:
+            export_sqlite(conn,
+                          'SELECT t.item_code, t.item_name, t.inventory FROM current_inventory c' \
+                          ' JOIN transactions t ON t.id = c.last_id' \
+                          ' ORDER BY t.id DESC',
+                          file_path)
 
     def _write_transactions_to_xl(self, file_path):
-        items_df = pd.read_sql('SELECT * FROM transactions',
-                               self.inv_db.connection)
-        items_df.to_excel(file_path, index=False)
+        # rows are written as they are fetched, however long the history
+        with self.inv_db.reader() as conn:
+            export_sqlite(conn, 'SELECT * FROM transactions ORDER BY id', file_path)
 
     def _import_xl(self, read_fn, default_file_path=None):
         """
@@ -80,20 +103,13 @@ class InvSystem:
             inv_df['quantity'] = inv_df['inventory']
             inv_df['date'] = date.today().isoformat()
 
-            inv_df.to_sql('transactions',
-                          self.inv_db.connection,
-                          if_exists='append',
-                          index=False,
-                          # index_label='id',
-                          dtype={
-                              # "id": 'Integer',
-                              "item_code": 'Text',
-                              "item_name": 'Text',
-                              "category": 'Text',
-                              "quantity": 'Integer',
-                              "inventory": 'Integer',
-                              "date": 'Text'
-                          })
+            # to_sql commits on its own, which would end the transaction early
+            columns = ['item_code', 'item_name', 'category', 'quantity', 'inventory', 'date']
+            sql = ''' INSERT INTO transactions(item_code,item_name,category,quantity,inventory,date)
+                      VALUES(?,?,?,?,?,?) '''
+            rows = inv_df[columns].itertuples(index=False, name=None)
+            with self.inv_db.transaction() as conn:
+                conn.executemany(sql, rows)
             self.inv_db.select_all_transactions()
             self.items_handler.update_items_dict()
             self.items_handler.display_inventory('99')
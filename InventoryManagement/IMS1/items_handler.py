@@ -4,10 +4,16 @@ from inventory_db import InventoryDB
 from inventory_item import InvItem
 
 
+# items_dict is checked against the db after this many writes
+RECONCILE_INTERVAL = 100
+
+
 class ItemsHandler:
     def __init__(self, inv_db):
         # items_dict: key:item_code, value:inventory item instance
+        # in the order of their last transactions, the latest at the end
         self.inv_db = inv_db
+        self.writes_since_reconcile = 0
         self._fetch_from_db()
 
     def update_items_dict(self):
@@ -17,6 +23,38 @@ class ItemsHandler:
         """
         self._fetch_from_db()
 
+    def _refresh_item(self, code):
+        """
+        Update only the item of code in items_dict after a write to the db
+        :param code:
+        :return:
+        """
+        self.items_dict.pop(code, None)
+        row = self.inv_db.select_last_transaction_by_code(code)
+        if row is not None:
+            self.items_dict[code] = InvItem(self, row[1], row[2], row[5])
+        self._count_write()
+
+    def _count_write(self, count=1):
+        self.writes_since_reconcile += count
+        if self.writes_since_reconcile >= RECONCILE_INTERVAL:
+            self.reconcile()
+
+    def reconcile(self):
+        """
+        Compare the number of items and the sum of their inventories with the db
+        and rebuild items_dict if they drifted apart
+        :return: True if items_dict agreed with the db
+        """
+        self.writes_since_reconcile = 0
+        checksum = (len(self.items_dict),
+                    sum(item.inventory for item in self.items_dict.values()))
+        if tuple(self.inv_db.select_inventory_checksum()) == checksum:
+            return True
+        print("재고 목록이 DB와 달라 다시 읽어 옵니다.")
+        self._fetch_from_db()
+        return False
+
     def _fetch_from_db(self):
         """
         Query the last transaction for each item
@@ -33,7 +71,8 @@ class ItemsHandler:
         """
         self.items_dict = {}
         rows = self.inv_db.select_all_last_transactions()
-        for row in rows:
+        # rows come in the descending order of id
+        for row in reversed(rows):
             item_code = row[1]
             item_name = row[2]
             inventory = row[5]
@@ -46,6 +85,7 @@ class ItemsHandler:
         # insert a transaction to the db
         transaction = (code, name, cat, quan, inv, date.today().isoformat())
         self.inv_db.create_transaction(transaction)
+        self._refresh_item(code)
 
     def create_new_item(self):
         print("========== 새로운 품목 생성 ===========")
@@ -65,7 +105,6 @@ class ItemsHandler:
 
         # insert it to the db
         self._insert_to_db(code, name, 'inbound', inventory, inventory)
-        self.update_items_dict()
 
     # '': exit or default  '99': exit
     # return: a tuple containing validity and code (True or False, code)
@@ -137,6 +176,8 @@ class ItemsHandler:
             return
 
         new_inventory = item.update_inventory(quan)
+        if new_inventory is None:
+            return
 
         # insert it the db
         self._insert_to_db(code, item_name, category, quan, new_inventory)
@@ -157,10 +198,41 @@ class ItemsHandler:
 
     # outbound of a list of items represented by code_list and quan_list
     def multi_inout(self, code_list, quan_list, category="outbound"):
-        for c, q in zip(code_list, quan_list):
-            valid, _ = self._check_code(c)
-            if valid:
-                self.create_inout_transaction(c, q, category)
+        if category != "outbound":
+            for c, q in zip(code_list, quan_list):
+                valid, _ = self._check_code(c)
+                if valid:
+                    self.create_inout_transaction(c, q, category)
+            return None
+
+        # written in a single db transaction, but the codes short of inventory
+        # or not in the db are skipped and reported, the rest are written
+        report = self.inv_db.batch_outbound(list(zip(code_list, quan_list)))
+        for code, result in report.items():
+            if result['inventory'] is not None:
+                item = self.items_dict.pop(code)
+                item.inventory = result['inventory']
+                self.items_dict[code] = item
+        self._count_write(len(report))
+        self.display_inout_report(report)
+        return report
+
+    def display_inout_report(self, report):
+        """
+        Print the result of multi_inout
+        :param report: the report of InventoryDB.batch_outbound
+        :return:
+        """
+        done = [code for code, result in report.items() if result['shortfall'] == 0]
+        print(f"출고 완료: {len(done)} 품목")
+        for code, result in report.items():
+            if result['shortfall'] == 0:
+                continue
+            if code in self.items_dict:
+                print(f"재고 부족: {self.items_dict[code]}  출고 수량 {result['quantity']}"
+                      f"  부족 수량 {result['shortfall']}")
+            else:
+                print(f"존재하지 않는 코드({code}): 출고 수량 {result['quantity']}")
 
     def display_items_db(self, code=None):
         if code is None:
@@ -197,7 +269,7 @@ class ItemsHandler:
         print(header)
 
         if code == '' or code == '99':
-            for item in reversed(self.items_dict.values()):
+            for item in self.items_dict.values():
                 print(item)
         else:
             print(self.items_dict[code])
@@ -227,7 +299,7 @@ class ItemsHandler:
         try:
             trans = (category, quan, inventory, index)
             self.inv_db.update_transaction(trans)
-            self.update_items_dict()
+            self._refresh_item(code)
         except:
             print("An exception occured")
 
@@ -240,7 +312,7 @@ class ItemsHandler:
             return
         elif code == '024659898':
             self.inv_db.delete_all_transactions()
-            self.update_items_dict()
+            self.items_dict = {}
             # display the db contents of all items
             self.display_items_db('99')
         elif code in self.items_dict.keys():
@@ -248,7 +320,7 @@ class ItemsHandler:
             index = pyip.inputInt('Index: ')
             try:
                 self.inv_db.delete_transaction(index)
-                self.update_items_dict()
+                self._refresh_item(code)
                 # display the db contents of the code
                 self.display_items_db(code)
             except:
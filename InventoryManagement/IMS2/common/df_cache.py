@@ -0,0 +1,77 @@
+import os
+import hashlib
+import pandas as pd
+from pathlib import Path
+from common.d_logger import Logs
+
+logger = Logs().get_logger("main")
+
+
+class DfFileCache:
+    """
+    Keeps DataFrames derived from files as pickles in cache_dir.
+    An entry is keyed by the path, size and modification time of the source
+    file, so a changed file never hits a stale entry.
+    The least recently used entries are evicted beyond max_entries or max_bytes.
+    """
+    def __init__(self, cache_dir: str, max_entries: int, max_bytes: int):
+        self.cache_dir = Path(cache_dir)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def key_for(file_path: str, *extra) -> str:
+        """
+        :param file_path: source file of the cached df
+        :param extra: anything else the df depends on
+        :return: the key of the file in its current state
+        """
+        stat = os.stat(file_path)
+        ingredients = [os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns, *extra]
+        return hashlib.sha1("|".join(map(str, ingredients)).encode('utf-8')).hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.pkl"
+
+    def get(self, key: str) -> pd.DataFrame or None:
+        entry_path = self._entry_path(key)
+        if not entry_path.exists():
+            return None
+        try:
+            df = pd.read_pickle(entry_path)
+            # mtime of an entry records its last use for LRU eviction
+            os.utime(entry_path)
+            logger.debug(f"cache hit {entry_path}")
+            return df
+        except Exception as e:
+            logger.warning(f"removing a broken cache entry {entry_path}: {e}")
+            entry_path.unlink(missing_ok=True)
+            return None
+
+    def put(self, key: str, df: pd.DataFrame):
+        entry_path = self._entry_path(key)
+        tmp_path = entry_path.with_suffix('.tmp')
+        try:
+            df.to_pickle(tmp_path)
+            # readers never see a half written entry
+            os.replace(tmp_path, entry_path)
+        except Exception as e:
+            logger.warning(f"failed to cache {entry_path}: {e}")
+            tmp_path.unlink(missing_ok=True)
+            return
+        self.evict()
+
+    def evict(self):
+        entries = sorted(self.cache_dir.glob('*.pkl'),
+                         key=lambda p: p.stat().st_mtime_ns, reverse=True)
+        total_bytes = 0
+        for i, entry_path in enumerate(entries):
+            total_bytes += entry_path.stat().st_size
+            if i >= self.max_entries or total_bytes > self.max_bytes:
+                logger.debug(f"evicting {entry_path}")
+                entry_path.unlink(missing_ok=True)
+
+    def clear(self):
+        for entry_path in self.cache_dir.glob('*.pkl'):
+            entry_path.unlink(missing_ok=True)
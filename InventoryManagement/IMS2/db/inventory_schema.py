@@ -52,6 +52,21 @@ CREATE_TRANSACTION_TYPE_TABLE = \
         UNIQUE(tr_type)
     );"""
 
+# the whole history with the names resolved, see danaul_core.export
+TRANSACTION_EXPORT_QUERY = \
+    """
+    SELECT t.tr_id, t.tr_timestamp, tt.tr_type,
+        i.item_name, s.sub_name, s.bit_code,
+        t.tr_qty, t.before_qty, t.after_qty,
+        u.user_name, t.description
+    FROM transactions AS t
+    LEFT JOIN skus AS s ON s.sku_id = t.sku_id
+    LEFT JOIN items AS i ON i.item_id = s.item_id
+    LEFT JOIN transaction_type AS tt ON tt.tr_type_id = t.tr_type_id
+    LEFT JOIN users AS u ON u.user_id = t.user_id
+    ORDER BY t.tr_id
+    """
+
 CREATE_TRANSACTION_TABLE = \
     """
     CREATE TABLE IF NOT EXISTS transactions(
@@ -68,3 +83,6 @@ CREATE_TRANSACTION_TABLE = \
         FOREIGN KEY (user_id) REFERENCES users(user_id),
         FOREIGN KEY (tr_type_id) REFERENCES transaction_type(tr_type_id)
     );"""
+
+# the tables the Lab is read from, whose versions in table_versions tell it what to sync
+VERSIONED_TABLES = ['category', 'users', 'transaction_type', 'items', 'skus', 'transactions']
@@ -1,22 +1,25 @@
+import sys
 import asyncio
 import pandas as pd
 import bcrypt
 from db.db_apis import DbApi
 from db.inventory_schema import *
+from danaul_core.db_schema import make_table_version_statements
 
 
 async def insert_initial_data(db_api):
     initial_data = {}
 
     # initial insert
+    # the columns are named in the insert statements, so they follow the schema
     initial_data['category'] = pd.DataFrame({
-        'id': [1, 2, 3, 4],
-        'name': ['외용제', '수액제', '보조기', '기타']
+        'category_id': [1, 2, 3, 4],
+        'category_name': ['외용제', '수액제', '보조기', '기타']
     })
 
     initial_data['transaction_type'] = pd.DataFrame({
-        'id': [1, 2, 3, 4],
-        'name': ['Buy', 'Sell', 'AdjustmentPlus', 'AdjustmentMinus']
+        'tr_type_id': [1, 2, 3, 4],
+        'tr_type': ['Buy', 'Sell', 'AdjustmentPlus', 'AdjustmentMinus']
     })
 
     def encrypt_password(password):
@@ -27,9 +30,9 @@ async def insert_initial_data(db_api):
 
     encrypted_pw = encrypt_password('a')
     initial_data['users'] = pd.DataFrame({
-        'id': [1, 2],
-        'name': ['admin', 'test'],
-        'pw': [encrypted_pw, encrypted_pw]
+        'user_id': [1, 2],
+        'user_name': ['admin', 'test'],
+        'user_password': [encrypted_pw, encrypted_pw]
     })
 
     initial_data['items'] = pd.DataFrame({
@@ -79,7 +82,8 @@ async def main():
                   CREATE_SKU_TABLE,
                   CREATE_USER_TABLE,
                   CREATE_TRANSACTION_TYPE_TABLE,
-                  CREATE_TRANSACTION_TABLE]
+                  CREATE_TRANSACTION_TABLE,
+                  *make_table_version_statements(VERSIONED_TABLES)]
     await db_api.initialize_db(statements)
 
     # After creating the tables, inserting initial data
@@ -87,4 +91,8 @@ async def main():
 
 
 if __name__ == '__main__':
-    asyncio.run(main())
+    # --versions only installs the table versions the Lab syncs by
+    if '--versions' in sys.argv[1:]:
+        asyncio.run(DbApi().install_table_versions(VERSIONED_TABLES))
+    else:
+        asyncio.run(main())
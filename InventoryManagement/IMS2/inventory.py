@@ -1,14 +1,20 @@
 import sys
+import core_path
+from danaul_core.startup_timer import StartupTimer
+# made first so that the timeline covers the imports below
+startup_timer = StartupTimer()
 import pandas as pd
+from datetime import date
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QDockWidget, QWidget, QHBoxLayout,
     QVBoxLayout, QFileDialog, QInputDialog, QMessageBox
 )
-from PySide6.QtCore import Qt, Signal, Slot, QFile
+from PySide6.QtCore import Qt, Signal, Slot, QFile, QThreadPool, QTimer
 from PySide6.QtGui import QAction, QIcon
-from ui.login_widget import LoginWidget
+from danaul_core.export import export_pg_report, EXPORT_FILE_FILTER
 from common.async_helper import AsyncHelper
 from db.di_lab import Lab
+from db.inventory_schema import TRANSACTION_EXPORT_QUERY
 from model.item_model import ItemModel
 from model.sku_model import SkuModel
 from model.tr_model import TrModel
@@ -17,11 +23,10 @@ from ui.sku_widget import SkuWidget
 from ui.tr_widget import TrWidget
 from common.d_logger import Logs
 from constants import ConfigReader, ADMIN_GROUP
-from model.emr_tr_reader import EmrTransactionReader
-from ui.emr_import_widget import ImportWidget
 
 
 logger = Logs().get_logger("main")
+startup_timer.mark("imports")
 
 
 class InventoryWindow(QMainWindow):
@@ -36,8 +41,8 @@ class InventoryWindow(QMainWindow):
         super().__init__()
         is_test: str = ConfigReader().get_options("Testmode")
 
-        self.login_widget = LoginWidget(self)
-        self.login_widget.start_main.connect(self.start_app)
+        # made on the first use, see get_login_widget
+        self.login_widget = None
         self.update_all_signal.connect(self.update_all)
         self.import_trs_signal.connect(self.import_transactions)
 
@@ -49,15 +54,44 @@ class InventoryWindow(QMainWindow):
             self.login()
 
         self.import_widget = None
+        self.emr_worker = None
+        # the file the history is exported to, see show_export_dialog
+        self.export_path = None
+
+    def get_login_widget(self):
+        """
+        The login widget connects to the db and loads bcrypt, so it is
+        made only when a user has to log in
+        :return:
+        """
+        if self.login_widget is None:
+            from ui.login_widget import LoginWidget
+            self.login_widget = LoginWidget(self)
+            self.login_widget.start_main.connect(self.start_app)
+        return self.login_widget
 
     def login(self):
-        self.login_widget.show()
+        self.get_login_widget().show()
 
     @Slot(str)
     def start_app(self, user_name: str):
+        Lab()
+        startup_timer.mark("lab")
         self.setup_models(user_name)
+        startup_timer.mark("models")
         self.async_helper = AsyncHelper(self, self.do_db_work)
         self.initUi(user_name)
+        startup_timer.mark("widgets")
+        # the timer fires once the event loop has shown the window
+        QTimer.singleShot(0, self.report_startup)
+        if Lab().from_snapshot:
+            # the models are made of the local snapshots, so catch up with the db
+            self.async_start("lab_sync")
+
+    @Slot()
+    def report_startup(self):
+        startup_timer.mark("first window")
+        startup_timer.report()
 
     def setup_models(self, user_name):
         self.item_model = ItemModel(user_name)
@@ -95,12 +129,17 @@ class InventoryWindow(QMainWindow):
         import_tr_action.setStatusTip('Import transactions')
         import_tr_action.triggered.connect(self.show_file_dialog)
 
+        export_tr_action = QAction(QIcon('../assets/export.png'), 'Export transactions', self)
+        export_tr_action.setStatusTip('Export all the transactions')
+        export_tr_action.triggered.connect(self.show_export_dialog)
+
         change_user_action = QAction(QIcon('../assets/user.png'), 'Change user', self)
         change_user_action.triggered.connect(self.change_user)
 
         file_menu = menubar.addMenu('&File')
         file_menu.addAction(exit_action)
         file_menu.addAction(import_tr_action)
+        file_menu.addAction(export_tr_action)
         file_menu.addAction(change_user_action)
 
         # View menu
@@ -217,6 +256,20 @@ class InventoryWindow(QMainWindow):
             await self.sku_model.update()
             self.tr_model.selected_upper_id = None
             await self.tr_model.update()
+        elif action == "lab_sync":
+            if await Lab().sync_with_db():
+                for model in [self.item_model, self.sku_model, self.tr_model]:
+                    # an edit in progress is kept, the model is refreshed when saved
+                    if not model.is_model_editing():
+                        model.update_model_df_from_db()
+        elif action == "tr_export":
+            # streamed to the file, not through the models
+            result_str = await export_pg_report(TRANSACTION_EXPORT_QUERY, self.export_path)
+
+        if Lab().read_only:
+            self.statusBar().showMessage("DB에 연결할 수 없어 읽기 전용으로 실행 중입니다")
+        else:
+            self.statusBar().clearMessage()
 
         self.done_signal.emit(action)
 
@@ -247,21 +300,58 @@ class InventoryWindow(QMainWindow):
         if fname[0]:
             self.read_emrfile(fname[0])
 
+    def show_export_dialog(self):
+        fname = QFileDialog.getSaveFileName(self, 'Export transactions',
+                                            f'../{date.today().isoformat()}_transactions.xlsx',
+                                            EXPORT_FILE_FILTER)
+        if fname[0]:
+            self.export_path = fname[0]
+            self.async_start("tr_export")
+
     def read_emrfile(self, file_name):
-        reader = EmrTransactionReader(file_name, self)
-        if reader is None:
-            logger.debug("Invalid file")
-            return
+        # only the last opened file is imported
+        self.cancel_emr_reading()
 
-        emr_df = reader.read_df_from()
+        # the emr modules are needed only once a file is imported
+        from ui.emr_import_widget import ImportWidget
+        from model.emr_tr_reader import EmrTransactionReader
+        from model.emr_read_worker import EmrReadWorker
 
         if self.import_widget is None:
-            self.import_widget = ImportWidget(emr_df, self)
-        else:
-            self.import_widget.load(emr_df)
-
+            self.import_widget = ImportWidget(None, self)
+            self.import_widget.cancel_signal.connect(self.cancel_emr_reading)
+        self.import_widget.start_progress(file_name)
         self.import_widget.show()
 
+        # the reader takes snapshots of the sku model here in the gui thread
+        reader = EmrTransactionReader(file_name, self)
+        worker = EmrReadWorker(reader)
+        worker.setAutoDelete(False)
+        worker.signals.progress.connect(self.import_widget.update_progress)
+        worker.signals.finished.connect(
+            lambda emr_df, codes: self.emr_file_read(worker, emr_df, codes))
+        worker.signals.cancelled.connect(lambda: self.emr_reading_cancelled(worker))
+        self.emr_worker = worker
+        QThreadPool.globalInstance().start(worker)
+
+    def emr_file_read(self, worker: 'EmrReadWorker', emr_df: pd.DataFrame, unmatched_codes: list):
+        if worker is not self.emr_worker:
+            return
+        self.emr_worker = None
+        self.import_widget.load(emr_df)
+        self.import_widget.set_unmatched_codes(unmatched_codes)
+
+    def emr_reading_cancelled(self, worker: 'EmrReadWorker'):
+        logger.debug(f"reading {worker.reader.filename} is cancelled")
+        if worker is self.emr_worker:
+            self.emr_worker = None
+
+    @Slot()
+    def cancel_emr_reading(self):
+        if self.emr_worker is not None:
+            self.emr_worker.cancel()
+            self.emr_worker = None
+
     @Slot(pd.DataFrame)
     def import_transactions(self, emr_df):
         if emr_df is None or emr_df.empty:
@@ -293,14 +383,16 @@ class InventoryWindow(QMainWindow):
     def reset_password(self):
         u_name, ok = QInputDialog.getText(self, "Reset Password", "Enter user name:")
         if ok:
-            hashed_pw = self.login_widget.encrypt_password("a")
-            self.login_widget.insert_user_info(u_name, hashed_pw)
+            login_widget = self.get_login_widget()
+            hashed_pw = login_widget.encrypt_password("a")
+            login_widget.insert_user_info(u_name, hashed_pw)
 
     def change_user(self):
         self.close()
-        self.login_widget.start_main.disconnect()
-        self.login_widget.start_main.connect(self.initUi)
-        self.login_widget.show()
+        login_widget = self.get_login_widget()
+        login_widget.start_main.disconnect()
+        login_widget.start_main.connect(self.initUi)
+        login_widget.show()
 
 
 def main():
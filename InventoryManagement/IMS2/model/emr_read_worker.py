@@ -0,0 +1,55 @@
+import threading
+from PySide6.QtCore import QObject, QRunnable, Signal, Slot
+from model.emr_tr_reader import EmrTransactionReader
+from common.d_logger import Logs
+from ds_exceptions import EmrImportCancelled
+
+logger = Logs().get_logger("main")
+
+
+class EmrReadSignals(QObject):
+    # (rows read, total rows or -1 if unknown)
+    progress = Signal(int, int)
+    # (emr_df or None, unmatched codes)
+    finished = Signal(object, list)
+    cancelled = Signal()
+
+
+class EmrReadWorker(QRunnable):
+    """
+    Runs EmrTransactionReader.read_df_from in a QThreadPool thread so that
+    the window keeps responding while a large file is parsed.
+    The reader takes its snapshots of the sku model when it is made,
+    so it has to be made in the gui thread before the worker starts.
+    The results come back to the gui thread through the signals.
+    """
+    def __init__(self, reader: EmrTransactionReader):
+        super().__init__()
+        self.reader = reader
+        self.signals = EmrReadSignals()
+        self.cancel_event = threading.Event()
+        self.reader.cancel_event = self.cancel_event
+        self.reader.progress_callback = self.emit_progress
+
+    def emit_progress(self, rows_read: int, total: int or None):
+        self.signals.progress.emit(rows_read, total or -1)
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def is_cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    @Slot()
+    def run(self):
+        try:
+            emr_df = self.reader.read_df_from()
+        except EmrImportCancelled:
+            self.signals.cancelled.emit()
+            return
+
+        if self.is_cancelled():
+            # finished before noticing the cancel
+            self.signals.cancelled.emit()
+        else:
+            self.signals.finished.emit(emr_df, sorted(self.reader.unmatched_codes))
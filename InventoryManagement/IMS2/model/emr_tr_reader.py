@@ -1,57 +1,183 @@
 from pathlib import PurePath
+from typing import Callable, Iterator
 import pandas as pd
+from openpyxl import load_workbook
 from common.d_logger import Logs
+from common.df_cache import DfFileCache
+from ds_exceptions import EmrImportCancelled
+from constants import EMR_CHUNK_SIZE, EMR_CACHE_DIR, EMR_CACHE_MAX_ENTRIES, EMR_CACHE_MAX_BYTES
 
 logger = Logs().get_logger("main")
 
+EMR_CODE_COL = '처방코드'
+EMR_QTY_COL = '총소모량'
+
 
 class EmrTransactionReader():
-    def __init__(self, filename, parent):
+    def __init__(self, filename, parent,
+                 progress_callback: Callable[[int, int or None], None] = None,
+                 use_cache: bool = True):
+        """
+        :param filename: EMR export file (.xlsx or utf-16 tab separated .csv)
+        :param parent: an object holding sku_model
+        :param progress_callback: called with (rows read, total rows or None)
+        whenever a chunk is read
+        :param use_cache: reuse the parsed result of the same file
+        """
         self.parent = parent
         self.filename = filename
+        self.progress_callback = progress_callback
+        self.chunk_size = EMR_CHUNK_SIZE
+        # threading.Event; reading stops between chunks once it is set
+        self.cancel_event = None
+        self.cache = None
+        if use_cache:
+            self.cache = DfFileCache(EMR_CACHE_DIR, EMR_CACHE_MAX_ENTRIES, EMR_CACHE_MAX_BYTES)
 
-    def read_df_from(self) -> pd.DataFrame or None:
-        code_df = self.parent.sku_model.get_bitcode_df()
+        # snapshots of the sku model taken when the reader is made
+        sku_model = self.parent.sku_model
+        self.code_index = dict(sku_model.bit_code_index)
+        self.sku_name_s = sku_model.model_df.set_index('sku_id')['sku_name'].copy()
+
+        # codes in the file which are not registered to any sku
+        self.unmatched_codes = set()
 
+    def read_df_from(self) -> pd.DataFrame or None:
         try:
-            if PurePath(self.filename).suffix == '.xlsx':
-                logger.debug(f"{self.filename} is being imported ... format xlsx")
-                bit_df = pd.read_excel(self.filename)
-            elif PurePath(self.filename).suffix == '.csv':
-                logger.debug(f"{self.filename} is being imported ... format csv")
-                bit_df = pd.read_csv(self.filename, sep="\t", encoding='utf-16')
-            else:
+            suffix = PurePath(self.filename).suffix
+            if suffix not in ['.xlsx', '.csv']:
                 logger.error(f"Not implemented importing file type {self.filename}")
                 return
+            logger.debug(f"{self.filename} is being imported ... format {suffix[1:]}")
 
-            bit_df = bit_df.loc[:, ['처방코드', '총소모량']]
-            # strip any white spaces in code names
-            bit_df.loc[:, 'bit_code'] = bit_df['처방코드'].str.strip()
-
-            # expand a comma separated bit_codes vertically by using 'explode'
-            # which can be applied to a list-like element
-            code_df.loc[:, 'bit_code'] = code_df['bit_code'].str.split(',')
-            code_df = code_df.explode('bit_code', ignore_index=True)
-
-            # extract only the rows of interest from bit_df using code_df
-            merged_df = pd.merge(code_df, bit_df, on='bit_code')
-
-            merged_df = merged_df.astype({"총소모량": "int64"})
-            # df with index of 'sku_id' and a column "총소모량"
-            merged_df = merged_df.groupby(by=['sku_id'], dropna=True).sum().loc[:, ["총소모량"]]
-            merged_df = merged_df.rename(columns={"총소모량": "tr_qty"})
+            qty_s = self.read_sku_qty()
 
+            ret_df = qty_s.astype("int64").rename("tr_qty").rename_axis("sku_id").reset_index()
             # append a sku_name column to the df to be returned
-            sku_df = self.parent.sku_model.model_df[["sku_id", "sku_name"]]
-            ret_df = pd.merge(merged_df, sku_df, left_index=True, right_on="sku_id")
+            ret_df["sku_name"] = ret_df["sku_id"].map(self.sku_name_s)
+            ret_df = ret_df[["tr_qty", "sku_id", "sku_name"]]
             logger.debug(f"\n{ret_df}")
+
+            if self.unmatched_codes:
+                logger.info(f"unmatched codes: {sorted(self.unmatched_codes)}")
             return ret_df
+        except EmrImportCancelled:
+            logger.debug(f"reading {self.filename} is cancelled")
+            raise
         except Exception as e:
             logger.error(e)
             return None
 
+    def read_sku_qty(self) -> pd.Series:
+        """
+        Maps the codes of the file to skus through the bit_code index
+        :return: series of quantity sums indexed by sku_id
+        """
+        code_qty_df = self.read_code_qty()
+
+        sku_ids = code_qty_df[EMR_CODE_COL].map(self.code_index)
+        matched = sku_ids.notna()
+        self.unmatched_codes = set(code_qty_df.loc[~matched, EMR_CODE_COL])
+
+        qty_s = code_qty_df.loc[matched, EMR_QTY_COL]
+        qty_s = qty_s.groupby(sku_ids[matched].astype("int64")).sum()
+        return qty_s.sort_index()
+
+    def read_code_qty(self) -> pd.DataFrame:
+        """
+        Returns the quantity sums per code of the file.
+        The sums are independent of the sku settings, so they are cached
+        and re-importing the same file after fixing bit_codes skips parsing.
+        :return: df of columns '처방코드' and '총소모량'
+        """
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.key_for(self.filename, self.chunk_size)
+            code_qty_df = self.cache.get(cache_key)
+            if code_qty_df is not None:
+                logger.debug(f"{self.filename} is loaded from the cache")
+                if self.progress_callback is not None:
+                    self.progress_callback(code_qty_df.attrs.get('rows', 0),
+                                           code_qty_df.attrs.get('rows', 0))
+                return code_qty_df
+
+        code_qty_df = self._parse_code_qty()
+        if self.cache is not None:
+            self.cache.put(cache_key, code_qty_df)
+        return code_qty_df
+
+    def _parse_code_qty(self) -> pd.DataFrame:
+        """
+        Reads the file chunk by chunk and folds the quantities of each chunk
+        into the running sums per code so that only one chunk and the sums
+        are in memory at a time
+        :return: df of columns '처방코드' and '총소모량'
+        """
+        qty_sum_s = pd.Series(dtype="float64")
+        rows_read = 0
+        for chunk, total in self._iter_chunks():
+            if self.cancel_event is not None and self.cancel_event.is_set():
+                raise EmrImportCancelled(self.filename)
+
+            rows_read += chunk.shape[0]
+            chunk = chunk.dropna(subset=[EMR_CODE_COL])
+
+            # strip any white spaces in code names
+            codes = chunk[EMR_CODE_COL].str.strip().astype("category")
+            qty_s = pd.to_numeric(chunk[EMR_QTY_COL])
+            chunk_sum_s = qty_s.groupby(codes, observed=True).sum()
+            chunk_sum_s.index = chunk_sum_s.index.astype("object")
+            qty_sum_s = qty_sum_s.add(chunk_sum_s, fill_value=0)
+
+            if self.progress_callback is not None:
+                self.progress_callback(rows_read, total)
+
+        logger.debug(f"{rows_read} rows read from {self.filename}")
+        code_qty_df = qty_sum_s.rename(EMR_QTY_COL).rename_axis(EMR_CODE_COL).reset_index()
+        code_qty_df.attrs['rows'] = rows_read
+        return code_qty_df
+
+    def _iter_chunks(self) -> Iterator[tuple]:
+        """
+        Yields (chunk df of the code and qty columns, total rows or None)
+        """
+        if PurePath(self.filename).suffix == '.xlsx':
+            yield from self._iter_xlsx_chunks()
+        else:
+            yield from self._iter_csv_chunks()
+
+    def _iter_csv_chunks(self) -> Iterator[tuple]:
+        with pd.read_csv(self.filename, sep="\t", encoding='utf-16',
+                         usecols=[EMR_CODE_COL, EMR_QTY_COL],
+                         dtype={EMR_CODE_COL: 'string', EMR_QTY_COL: 'float64'},
+                         chunksize=self.chunk_size) as csv_reader:
+            for chunk in csv_reader:
+                yield chunk, None
+
+    def _iter_xlsx_chunks(self) -> Iterator[tuple]:
+        # read_only mode streams rows instead of loading the whole sheet
+        workbook = load_workbook(self.filename, read_only=True, data_only=True)
+        try:
+            sheet = workbook.worksheets[0]
+            rows = sheet.iter_rows(values_only=True)
+            header = list(next(rows))
+            code_idx = header.index(EMR_CODE_COL)
+            qty_idx = header.index(EMR_QTY_COL)
+            # max_row comes from the dimension record and may be missing
+            total = sheet.max_row - 1 if sheet.max_row else None
+
+            codes, qtys = [], []
+            for row in rows:
+                codes.append(row[code_idx])
+                qtys.append(row[qty_idx])
+                if len(codes) == self.chunk_size:
+                    yield self._make_chunk(codes, qtys), total
+                    codes, qtys = [], []
+            if codes:
+                yield self._make_chunk(codes, qtys), total
+        finally:
+            workbook.close()
 
-if __name__ == "__main__":
-    reader = EmrTransactionReader("bit_doc.xlsx")
-    result = reader.read_df_from(['noci40,noci40_fr', 'noci120,noci120_fr'])
-    print(result)
+    def _make_chunk(self, codes: list, qtys: list) -> pd.DataFrame:
+        return pd.DataFrame({EMR_CODE_COL: pd.Series(codes, dtype='string'),
+                             EMR_QTY_COL: pd.Series(qtys, dtype='float64')})
@@ -22,6 +22,8 @@ class SkuModel(DataModel):
         self.item_model = item_model
         self.init_params()
         self.selected_upper_id = None
+        # bit_code => sku_id, used to match EMR codes
+        self.bit_code_index: Dict[str, int] = {}
         self.item_model.item_model_changed_signal.connect(
             self.item_model_changed)
         # setting a model is carried out in the DataModel
@@ -60,6 +62,46 @@ class SkuModel(DataModel):
         self.model_df['sku_name'] = self.model_df['item_name'].str.cat(
             self.model_df.loc[:, 'sub_name'], na_rep="-", sep=" ").str.replace("None", "")
         self.model_df['flag'] = RowFlags.OriginalRow
+        self.build_bit_code_index()
+
+    def build_bit_code_index(self):
+        """
+        Makes the bit_code => sku_id index out of the comma separated
+        bit_code column
+        :return:
+        """
+        code_s = self.model_df.set_index('sku_id')['bit_code'].fillna("")
+        code_s = code_s[code_s.astype(bool)].str.split(',').explode().str.strip()
+        code_s = code_s[code_s != ""]
+
+        dup_s = code_s[code_s.duplicated(keep='first')]
+        if not dup_s.empty:
+            logger.warning(f"bit_codes registered to more than one sku: {dup_s.to_list()}")
+        code_s = code_s.drop_duplicates(keep='first')
+
+        self.bit_code_index = dict(zip(code_s.to_list(), code_s.index.to_list()))
+        logger.debug(f"{len(self.bit_code_index)} bit_codes indexed")
+
+    def update_bit_code_index(self, sku_id: int, old_codes: str, new_codes: str):
+        """
+        Replaces the codes of the sku in the index
+        :param sku_id:
+        :param old_codes: comma separated bit_codes before the change
+        :param new_codes: comma separated bit_codes after the change
+        :return:
+        """
+        for code in str(old_codes or "").split(','):
+            code = code.strip()
+            if self.bit_code_index.get(code) == sku_id:
+                del self.bit_code_index[code]
+
+        for code in str(new_codes or "").split(','):
+            code = code.strip()
+            if code == "":
+                continue
+            registered_id = self.bit_code_index.setdefault(code, sku_id)
+            if registered_id != sku_id:
+                logger.warning(f"bit_code({code}) is already registered to sku({registered_id})")
 
     def set_upper_model_id(self, item_id: int or None):
         self.selected_upper_id = item_id
@@ -191,6 +233,16 @@ class SkuModel(DataModel):
             if root_row_s.item_id != item_id:
                 return None
 
+        elif col_name == 'bit_code':
+            old_codes = self.get_data_from_index(index, 'bit_code')
+            result = super().setData(index, value, role)
+            # the base does not write on a deleted row, and then the index stays as it is
+            new_codes = self.get_data_from_index(index, 'bit_code')
+            if result and new_codes != old_codes:
+                sku_id = self.get_data_from_index(index, 'sku_id')
+                self.update_bit_code_index(sku_id, old_codes, new_codes)
+            return result
+
         return super().setData(index, value, role)
 
     def is_sku_qty_correct(self, sku_id: int, sku_qty: int) -> bool:
@@ -263,6 +315,17 @@ class SkuModel(DataModel):
         }])
         return new_model_df
 
+    def drop_rows(self, indexes: List[QModelIndex or int]):
+        """
+        Drops the codes of the rows from the bit_code index as well
+        :param indexes:
+        :return:
+        """
+        rows = [i.row() if isinstance(i, QModelIndex) else i for i in indexes]
+        for row in self.model_df.loc[rows, ['sku_id', 'bit_code']].itertuples():
+            self.update_bit_code_index(row.sku_id, row.bit_code, "")
+        super().drop_rows(indexes)
+
     def update_sku_qty_after_transaction(self, sku_id: int, qty: int):
         logger.debug(f"qty({qty})")
         qty_index = self.index(self.model_df[self.model_df["sku_id"] == sku_id].index[0],
@@ -59,6 +59,8 @@ class TrModel(DataModel):
         # set more columns for the view
         self.model_df['tr_type'] = self.model_df['tr_type_id'].map(Lab().tr_type_s)
         self.model_df['user_name'] = self.model_df['user_id'].map(Lab().user_name_s)
+        self.set_categorical_col('tr_type', Lab().tr_type_s)
+        self.set_categorical_col('user_name', Lab().user_name_s)
         self.model_df['flag'] = RowFlags.OriginalRow
 
     def set_upper_model_id(self, sku_id: int or None):
@@ -114,7 +116,7 @@ class TrModel(DataModel):
         :return:
         """
         combo_info_dict = {
-            self.get_col_number('tr_type'): Lab().tr_type_s.to_list()
+            self.get_col_number('tr_type'): self.get_category_list('tr_type')
         }
         return combo_info_dict
 
@@ -278,6 +280,7 @@ class TrModel(DataModel):
                 else:   # success
                     result_s[row.Index] = True
 
+        self.restore_categorical_cols()
         if temp_selected_id is not None:
             self.selected_upper_id = temp_selected_id
 
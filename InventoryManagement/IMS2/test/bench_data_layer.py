@@ -0,0 +1,226 @@
+"""
+Benchmarks of the IMS2 data layer
+
+    python test/bench_data_layer.py                       # 10^3, 10^4, 10^5 rows
+    python test/bench_data_layer.py --sizes 1000000
+    python test/bench_data_layer.py --save-baseline       # store the results
+    python test/bench_data_layer.py --pg                  # use the db in di_config
+
+Without --pg, DbUtil is served by an in-memory stand-in (PgStandIn) so that
+only the client side costs (decoding, DataFrame building, model code) are measured.
+The results are compared against test/bench_baseline.json if it exists and
+the exit code is 1 when any benchmark got slower than the tolerance.
+"""
+import os
+import sys
+import gc
+import json
+import time
+import asyncio
+import logging
+import argparse
+import tempfile
+import statistics
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Callable, Dict, List
+
+APP_DIR = Path(__file__).resolve().parents[1]
+# the app reads common/log_config.yaml and di_config relative to its directory
+os.chdir(APP_DIR)
+sys.path.insert(0, str(APP_DIR))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtWidgets import QApplication
+from common.singleton import Singleton
+from db.di_lab import Lab
+from model.item_model import ItemModel
+from model.sku_model import SkuModel
+from model.tr_model import TrModel
+from model.emr_tr_reader import EmrTransactionReader
+from constants import RowFlags
+from bench_fixtures import make_tables, write_emr_file, scale_for, PgStandIn, seed_postgres
+
+BASELINE_FILE = APP_DIR / 'test' / 'bench_baseline.json'
+DEFAULT_SIZES = [10 ** 3, 10 ** 4, 10 ** 5]
+
+
+def measure(func: Callable, setup: Callable = None, repeat: int = 3) -> Dict[str, float]:
+    """
+    Runs func repeat times and returns the min and median of elapsed seconds
+    setup is run before every func call and is not timed
+    :param func:
+    :param setup:
+    :param repeat:
+    :return:
+    """
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return {'min': min(times), 'median': statistics.median(times)}
+
+
+def fresh_lab(loop: asyncio.AbstractEventLoop, n_rows: int) -> Lab:
+    # Lab is a singleton, so drop the instance made for the previous size
+    Singleton._instances.pop(Lab, None)
+    # the stand-in tables must not end up in the snapshots of the app
+    Lab.use_snapshots = False
+    lab = Lab()
+    lab.max_transaction_count = n_rows
+    lab.bool_initialized = False
+    loop.run_until_complete(lab.async_init())
+    return lab
+
+
+def run_size(n_rows: int, args, loop: asyncio.AbstractEventLoop, tmp_dir: str) -> Dict[str, float]:
+    tables = make_tables(n_rows)
+    results = {}
+
+    def timed(name: str, func: Callable, setup: Callable = None):
+        results[name] = measure(func, setup, args.repeat)['median']
+        print(f"  {name:<28}{results[name]:>12.4f} s", flush=True)
+
+    lab = fresh_lab(loop, n_rows)
+
+    def lab_async_init():
+        lab.bool_initialized = False
+        loop.run_until_complete(lab.async_init())
+    timed('lab_async_init', lab_async_init)
+
+    timed('get_df_from_db_transactions',
+          lambda: loop.run_until_complete(lab._get_df_from_db('transactions')))
+
+    models = {}
+
+    def setup_models():
+        models['item'] = ItemModel('admin')
+        models['sku'] = SkuModel('admin', models['item'])
+        models['tr'] = TrModel('admin', models['sku'])
+    timed('models_init', setup_models)
+    sku_model, tr_model = models['sku'], models['tr']
+    parent = SimpleNamespace(sku_model=sku_model)
+
+    n_emr = min(n_rows, args.emr_rows)
+    emr_dfs = {}
+    for suffix in ['csv', 'xlsx']:
+        file_path = os.path.join(tmp_dir, f"emr_{n_rows}.{suffix}")
+        write_emr_file(file_path, tables['skus'], n_emr)
+
+        def read_emr():
+            emr_dfs[suffix] = EmrTransactionReader(file_path, parent, use_cache=False).read_df_from()
+        timed(f'read_df_from_{suffix}', read_emr)
+
+    # re-importing the same file is served from the parsed file cache
+    EmrTransactionReader(file_path, parent).read_df_from()
+    timed('read_df_from_xlsx_cached',
+          lambda: EmrTransactionReader(file_path, parent).read_df_from())
+
+    emr_df = emr_dfs['csv'].head(args.emr_skus)
+    tr_df_orig = tr_model.model_df.copy()
+
+    def reset_tr_model():
+        tr_model.model_df = tr_df_orig.copy()
+        tr_model.clear_new_rows()
+    timed('append_new_rows_from_emr',
+          lambda: tr_model.append_new_rows_from_emr(emr_df.copy()),
+          reset_tr_model)
+
+    # flag the imported rows as new ones like the import does
+    def set_new_trs():
+        reset_tr_model()
+        tr_model.append_new_rows_from_emr(emr_df.copy())
+        tr_model.model_df.loc[tr_model.model_df.index[len(tr_df_orig):], 'flag'] = RowFlags.NewRow
+    timed('save_to_db_transactions',
+          lambda: loop.run_until_complete(tr_model.save_to_db()),
+          set_new_trs)
+
+    sku_df_orig = sku_model.model_df.copy()
+
+    def set_changed_skus():
+        sku_model.model_df = sku_df_orig.copy()
+        sku_model.model_df.loc[sku_model.model_df.index[::10], 'flag'] = RowFlags.ChangedRow
+    timed('save_to_db_skus',
+          lambda: loop.run_until_complete(sku_model.save_to_db()),
+          set_changed_skus)
+
+    return results
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict, tolerance: float) -> List[str]:
+    regressions = []
+    print(f"\n{'size':>9} {'benchmark':<28}{'baseline':>12}{'current':>12}{'ratio':>8}")
+    for size, benches in results.items():
+        for name, elapsed in benches.items():
+            base = baseline.get(size, {}).get(name)
+            if base is None:
+                print(f"{size:>9} {name:<28}{'-':>12}{elapsed:>12.4f}{'-':>8}")
+                continue
+            ratio = elapsed / base if base > 0 else float('inf')
+            mark = ''
+            if ratio > tolerance:
+                mark = ' <<'
+                regressions.append(f"{size} {name}")
+            print(f"{size:>9} {name:<28}{base:>12.4f}{elapsed:>12.4f}{ratio:>8.2f}{mark}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="IMS2 data layer benchmarks")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help="the numbers of transactions to benchmark")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--emr-rows', type=int, default=10 ** 5,
+                        help="the max number of rows of a synthetic EMR file")
+    parser.add_argument('--emr-skus', type=int, default=200,
+                        help="the number of imported rows passed to append_new_rows_from_emr")
+    parser.add_argument('--tolerance', type=float, default=1.2,
+                        help="current/baseline ratio regarded as a regression")
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--baseline', type=Path, default=BASELINE_FILE)
+    parser.add_argument('--pg', action='store_true',
+                        help="seed and use the db in di_config; IT DROPS ALL THE TABLES")
+    args = parser.parse_args()
+
+    # the models log every step at DEBUG level
+    for name in ['main', 'db']:
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    # models emit signals and build brushes, which expects an application object
+    app = QApplication(sys.argv)
+    loop = asyncio.new_event_loop()
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for n_rows in args.sizes:
+            print(f"size {n_rows} {scale_for(n_rows)}", flush=True)
+            if args.pg:
+                loop.run_until_complete(seed_postgres(make_tables(n_rows)))
+                results[str(n_rows)] = run_size(n_rows, args, loop, tmp_dir)
+            else:
+                with PgStandIn(make_tables(n_rows)):
+                    results[str(n_rows)] = run_size(n_rows, args, loop, tmp_dir)
+    loop.close()
+
+    baseline = {}
+    if args.baseline.exists():
+        with open(args.baseline, 'r') as fd:
+            baseline = json.load(fd)
+    regressions = compare(results, baseline, args.tolerance)
+
+    if args.save_baseline:
+        baseline.update(results)
+        with open(args.baseline, 'w') as fd:
+            json.dump(baseline, fd, indent=2)
+        print(f"\nbaseline saved to {args.baseline}")
+
+    if regressions:
+        print(f"\nslower than baseline x{args.tolerance}: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+"""
+Synthetic inventory data and an asyncpg-compatible stand-in for DbUtil
+used by the benchmark scripts in this directory
+"""
+import numpy as np
+import pandas as pd
+from datetime import date, datetime, timedelta
+from typing import Dict
+import core_path
+from danaul_core.pg_stand_in import PgStandIn
+
+TR_TYPES = ['Buy', 'Sell', 'AdjustmentPlus', 'AdjustmentMinus']
+EMR_COLUMNS = ['처방일자', '처방코드', '처방명', '총소모량']
+
+
+def scale_for(n_rows: int) -> Dict[str, int]:
+    """
+    Table sizes derived from the number of transactions
+    :param n_rows: the number of transactions
+    :return:
+    """
+    return {
+        'items': max(10, n_rows // 100),
+        'skus': max(20, n_rows // 10),
+        'transactions': n_rows
+    }
+
+
+def make_tables(n_rows: int, seed: int = 0) -> Dict[str, pd.DataFrame]:
+    """
+    Makes every table of the inventory schema with synthetic data
+    Columns are in the same order as inventory_schema.py
+    :param n_rows: the number of transactions
+    :param seed:
+    :return: a dict of table name and df
+    """
+    rng = np.random.default_rng(seed)
+    sizes = scale_for(n_rows)
+    n_items, n_skus = sizes['items'], sizes['skus']
+
+    tables = {}
+    tables['category'] = pd.DataFrame({
+        'category_id': [1, 2, 3, 4],
+        'category_name': ['외용제', '수액제', '보조기', '기타']
+    })
+    tables['users'] = pd.DataFrame({
+        'user_id': [1, 2, 3],
+        'user_name': ['admin', 'test', 'jye'],
+        'user_password': [b'', b'', b'']
+    })
+    tables['transaction_type'] = pd.DataFrame({
+        'tr_type_id': [1, 2, 3, 4],
+        'tr_type': TR_TYPES
+    })
+
+    item_ids = np.arange(1, n_items + 1)
+    tables['items'] = pd.DataFrame({
+        'item_id': item_ids,
+        'active': True,
+        'item_name': [f"item{i:07d}" for i in item_ids],
+        'category_id': rng.integers(1, 5, n_items),
+        'description': ""
+    })
+
+    # every 5th sku carries two comma separated codes like the real data
+    sku_ids = np.arange(1, n_skus + 1)
+    bit_codes = [f"code{i}" if i % 5 else f"code{i},code{i}_fr" for i in sku_ids]
+    tables['skus'] = pd.DataFrame({
+        'sku_id': sku_ids,
+        'active': True,
+        'root_sku': 0,
+        'sub_name': [f"{i % 7 * 10}ml" for i in sku_ids],
+        'bit_code': bit_codes,
+        'sku_qty': 10 ** 7,
+        'min_qty': 1,
+        'item_id': rng.integers(1, n_items + 1, n_skus),
+        'expiration_date': date(9999, 1, 1),
+        'description': ""
+    })
+
+    tr_ids = np.arange(1, n_rows + 1)
+    tr_qty = rng.integers(1, 10, n_rows)
+    before_qty = rng.integers(100, 10 ** 6, n_rows)
+    base_ts = datetime(2023, 1, 1)
+    tables['transactions'] = pd.DataFrame({
+        'tr_id': tr_ids,
+        'user_id': rng.integers(1, 4, n_rows),
+        'sku_id': rng.integers(1, n_skus + 1, n_rows),
+        'tr_type_id': 2,
+        'tr_qty': tr_qty,
+        'before_qty': before_qty,
+        'after_qty': before_qty - tr_qty,
+        'tr_timestamp': [base_ts + timedelta(minutes=int(i)) for i in tr_ids],
+        'description': ""
+    })
+    return tables
+
+
+def write_emr_file(file_path: str, skus_df: pd.DataFrame, n_rows: int, seed: int = 0):
+    """
+    Writes an EMR export like file (.xlsx or utf-16 tab separated .csv)
+    About 10% of the rows have codes which are not registered to any sku
+    :param file_path:
+    :param skus_df:
+    :param n_rows:
+    :param seed:
+    :return:
+    """
+    rng = np.random.default_rng(seed)
+    codes = skus_df['bit_code'].str.split(',').explode().to_numpy()
+    picked = rng.choice(codes, n_rows)
+    unknown = rng.random(n_rows) < 0.1
+    picked[unknown] = 'unknown_code'
+    emr_df = pd.DataFrame({
+        '처방일자': '2023-01-01',
+        # leading and trailing white spaces as in the real exports
+        '처방코드': [f" {c} " for c in picked],
+        '처방명': '처방',
+        '총소모량': rng.integers(1, 5, n_rows)
+    }, columns=EMR_COLUMNS)
+
+    if file_path.endswith('.xlsx'):
+        emr_df.to_excel(file_path, index=False)
+    else:
+        emr_df.to_csv(file_path, sep="\t", encoding='utf-16', index=False)
+
+
+async def seed_postgres(tables: Dict[str, pd.DataFrame]):
+    """
+    Drops and re-creates every table in the database of di_config and
+    copies the synthetic data into it.
+    Never point di_config to the production db when using this
+    :param tables:
+    :return:
+    """
+    from db.db_apis import DbApi
+    from db.db_utils import ConnectPg
+    from db.inventory_schema import (
+        CREATE_CATEGORY_TABLE, CREATE_ITEM_TABLE, CREATE_SKU_TABLE,
+        CREATE_USER_TABLE, CREATE_TRANSACTION_TYPE_TABLE, CREATE_TRANSACTION_TABLE
+    )
+    statements = [CREATE_CATEGORY_TABLE,
+                  CREATE_ITEM_TABLE,
+                  CREATE_SKU_TABLE,
+                  CREATE_USER_TABLE,
+                  CREATE_TRANSACTION_TYPE_TABLE,
+                  CREATE_TRANSACTION_TABLE]
+    await DbApi().initialize_db(statements)
+
+    async with ConnectPg() as conn:
+        if conn is None:
+            raise ConnectionError("Cannot connect to the db in di_config")
+
+        for table in ['category', 'users', 'transaction_type', 'items', 'skus', 'transactions']:
+            df = tables[table]
+            # to_dict converts numpy scalars into python objects asyncpg can encode
+            records = [tuple(r.values()) for r in df.to_dict('records')]
+            await conn.copy_records_to_table(table, records=records, columns=list(df.columns))
+            # SERIAL sequences are not advanced by COPY
+            id_col = df.columns[0]
+            await conn.execute(f"SELECT setval(pg_get_serial_sequence('{table}', '{id_col}'), "
+                               f"{int(df[id_col].max())})")
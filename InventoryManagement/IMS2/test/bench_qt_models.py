@@ -0,0 +1,209 @@
+"""
+Headless benchmarks of the render path of SkuModel and TrModel
+
+    python test/bench_qt_models.py
+    python test/bench_qt_models.py --sizes 1000000 --frames 500
+
+The models are loaded from synthetic tables through the DbUtil stand-in and
+driven through the same proxy models the widgets use. Every scenario reports
+how many data()/flags() calls were made, calls per second and the p99 latency
+of a unit of work (a single call for repaints, a frame for scrolling and a
+whole operation for sorting and filtering).
+"""
+import os
+import sys
+import time
+import asyncio
+import logging
+import argparse
+from pathlib import Path
+from typing import Callable, Dict, List
+
+APP_DIR = Path(__file__).resolve().parents[1]
+# the app reads common/log_config.yaml and di_config relative to its directory
+os.chdir(APP_DIR)
+sys.path.insert(0, str(APP_DIR))
+os.environ["QT_QPA_PLATFORM"] = "offscreen"
+
+import numpy as np
+from PySide6.QtWidgets import QApplication
+from PySide6.QtCore import Qt, QSortFilterProxyModel
+from common.singleton import Singleton
+from db.di_lab import Lab
+from model.item_model import ItemModel
+from model.sku_model import SkuModel
+from model.tr_model import TrModel
+from bench_fixtures import make_tables, PgStandIn
+
+DEFAULT_SIZES = [10 ** 3, 10 ** 4, 10 ** 5]
+VIEWPORT_ROWS = 40
+PAINT_ROLES = [Qt.DisplayRole, Qt.BackgroundRole, Qt.TextAlignmentRole]
+
+
+class CallCounter:
+    """
+    Counts the calls of model.data() made by Qt, e.g. while sorting
+    An instance attribute overrides the virtual method for the C++ side too
+    """
+    def __init__(self, model):
+        self.count = 0
+        original = model.data
+
+        def data(index, role=Qt.DisplayRole):
+            self.count += 1
+            return original(index, role)
+        model.data = data
+
+
+def percentile_99(samples: List[float]) -> float:
+    return float(np.percentile(samples, 99)) if samples else 0.0
+
+
+def paint_viewport(proxy, first_row: int, latencies: List[float] = None) -> int:
+    """
+    Asks every visible cell for what a QTableView paints
+    :param proxy:
+    :param first_row:
+    :param latencies: if given, the latency of every call is appended
+    :return: the number of calls
+    """
+    calls = 0
+    last_row = min(first_row + VIEWPORT_ROWS, proxy.rowCount())
+    n_cols = proxy.columnCount()
+    for row in range(first_row, last_row):
+        for col in range(n_cols):
+            index = proxy.index(row, col)
+            for role in PAINT_ROLES:
+                start = time.perf_counter()
+                proxy.data(index, role)
+                if latencies is not None:
+                    latencies.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            proxy.flags(index)
+            if latencies is not None:
+                latencies.append(time.perf_counter() - start)
+            calls += len(PAINT_ROLES) + 1
+    return calls
+
+
+def bench_repaint(proxy, frames: int) -> Dict:
+    latencies = []
+    start = time.perf_counter()
+    calls = sum(paint_viewport(proxy, 0, latencies) for _ in range(frames))
+    elapsed = time.perf_counter() - start
+    return {'calls': calls, 'elapsed': elapsed, 'p99': percentile_99(latencies), 'unit': 'call'}
+
+
+def bench_scroll(proxy, frames: int) -> Dict:
+    # scroll half a page at a time and wrap around at the end
+    frame_times = []
+    calls = 0
+    n_rows = max(proxy.rowCount(), 1)
+    first_row = 0
+    for _ in range(frames):
+        start = time.perf_counter()
+        calls += paint_viewport(proxy, first_row)
+        frame_times.append(time.perf_counter() - start)
+        first_row = (first_row + VIEWPORT_ROWS // 2) % n_rows
+    return {'calls': calls, 'elapsed': sum(frame_times), 'p99': percentile_99(frame_times),
+            'unit': 'frame'}
+
+
+def bench_operations(counter: CallCounter, operations: List[Callable]) -> Dict:
+    op_times = []
+    counter.count = 0
+    for operation in operations:
+        start = time.perf_counter()
+        operation()
+        op_times.append(time.perf_counter() - start)
+    return {'calls': counter.count, 'elapsed': sum(op_times), 'p99': percentile_99(op_times),
+            'unit': 'op'}
+
+
+def bench_model(model, proxy, sort_cols: List[str], patterns: List[str], frames: int) -> Dict[str, Dict]:
+    counter = CallCounter(model)
+    proxy.setSourceModel(model)
+    proxy.setSortRole(model.SortRole)
+
+    results = {}
+    results['repaint'] = bench_repaint(proxy, frames)
+    results['scroll'] = bench_scroll(proxy, frames)
+
+    sort_ops = []
+    for col_name in sort_cols:
+        col = model.get_col_number(col_name)
+        sort_ops.append(lambda c=col: proxy.sort(c, Qt.AscendingOrder))
+        sort_ops.append(lambda c=col: proxy.sort(c, Qt.DescendingOrder))
+    results['sort'] = bench_operations(counter, sort_ops)
+
+    filter_ops = []
+    for pattern in patterns:
+        filter_ops.append(lambda p=pattern: proxy.setFilterRegularExpression(p))
+        filter_ops.append(lambda: proxy.setFilterRegularExpression(""))
+    results['filter'] = bench_operations(counter, filter_ops)
+    return results
+
+
+def load_models(n_rows: int) -> Dict:
+    Singleton._instances.pop(Lab, None)
+    # the stand-in tables must not end up in the snapshots of the app
+    Lab.use_snapshots = False
+    with PgStandIn(make_tables(n_rows)):
+        lab = Lab()
+        lab.max_transaction_count = n_rows
+        lab.bool_initialized = False
+        loop = asyncio.new_event_loop()
+        loop.run_until_complete(lab.async_init())
+        loop.close()
+        item_model = ItemModel('admin')
+        sku_model = SkuModel('admin', item_model)
+        return {
+            'SkuModel': sku_model,
+            'TrModel': TrModel('admin', sku_model),
+        }
+
+
+def report(size: int, model_name: str, results: Dict[str, Dict]):
+    for scenario, res in results.items():
+        rate = res['calls'] / res['elapsed'] if res['elapsed'] > 0 else 0.0
+        print(f"{size:>9} {model_name:<14}{scenario:<9}{res['calls']:>10}"
+              f"{rate:>14,.0f}{res['p99'] * 1e3:>12.3f} ms/{res['unit']}", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="IMS2 Qt model render benchmarks")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help="the numbers of transactions to benchmark")
+    parser.add_argument('--frames', type=int, default=100,
+                        help="the number of viewport repaints per scenario")
+    args = parser.parse_args()
+
+    # the models log every step at DEBUG level
+    for name in ['main', 'db']:
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    app = QApplication(sys.argv)
+    print(f"{'size':>9} {'model':<14}{'scenario':<9}{'calls':>10}{'calls/s':>14}{'p99':>12}")
+    for n_rows in args.sizes:
+        models = load_models(n_rows)
+
+        # the same filter key columns as SkuWidget and TrWidget
+        sku_model = models['SkuModel']
+        sku_proxy = QSortFilterProxyModel()
+        sku_proxy.setFilterKeyColumn(sku_model.get_col_number('item_id'))
+        results = bench_model(sku_model, sku_proxy,
+                              ['sku_id', 'item_name', 'sku_qty'],
+                              ['^3$', '^1\\d*$', '^\\d*$'], args.frames)
+        report(n_rows, 'SkuModel', results)
+
+        tr_model = models['TrModel']
+        tr_proxy = QSortFilterProxyModel()
+        tr_proxy.setFilterKeyColumn(tr_model.get_col_number('sku_id'))
+        results = bench_model(tr_model, tr_proxy,
+                              ['tr_id', 'tr_timestamp', 'tr_qty'],
+                              ['^3$', '^1\\d*$', '^\\d*$'], args.frames)
+        report(n_rows, 'TrModel', results)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,10 @@
 import sys
 import pandas as pd
 from PySide6.QtWidgets import (
-    QWidget, QApplication, QListView, QPushButton, QVBoxLayout, QHBoxLayout
+    QWidget, QApplication, QListView, QPushButton, QVBoxLayout, QHBoxLayout,
+    QProgressBar, QLabel
 )
-from PySide6.QtCore import Qt, QAbstractListModel, QModelIndex
+from PySide6.QtCore import Qt, QAbstractListModel, QModelIndex, Signal, Slot
 
 
 class ImportModel(QAbstractListModel):
@@ -23,6 +24,9 @@ class ImportModel(QAbstractListModel):
 
 
 class ImportWidget(QWidget):
+    # emitted when the user cancels the import while the file is being read
+    cancel_signal = Signal()
+
     def __init__(self, data_df: pd.DataFrame, parent=None):
         super().__init__()
         self.parent = parent
@@ -34,6 +38,13 @@ class ImportWidget(QWidget):
         self.setWindowTitle("Importing EMR data")
         self.importView = QListView()
 
+        self.progress_label = QLabel()
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setVisible(False)
+        self.unmatched_label = QLabel()
+        self.unmatched_label.setWordWrap(True)
+        self.unmatched_label.setVisible(False)
+
         self.deleteButton = QPushButton("Delete")
         self.deleteButton.pressed.connect(self.delete)
 
@@ -47,7 +58,10 @@ class ImportWidget(QWidget):
         hbox.addWidget(self.cancelButton)
 
         vbox = QVBoxLayout()
+        vbox.addWidget(self.progress_label)
+        vbox.addWidget(self.progress_bar)
         vbox.addWidget(self.importView)
+        vbox.addWidget(self.unmatched_label)
         vbox.addWidget(self.deleteButton)
         vbox.addLayout(hbox)
 
@@ -66,10 +80,49 @@ class ImportWidget(QWidget):
             # Clear the selection (as it is no longer valid).
             self.importView.clearSelection()
 
+    def start_progress(self, file_name: str):
+        """
+        Clears the previous data and shows the progress bar
+        until the file is read
+        :param file_name:
+        :return:
+        """
+        self.model.data_df = pd.DataFrame()
+        self.model.layoutChanged.emit()
+        self.unmatched_label.setVisible(False)
+        self.progress_label.setText(f"Reading {file_name} ...")
+        self.progress_bar.setRange(0, 0)
+        self.progress_bar.setVisible(True)
+        self.okButton.setEnabled(False)
+
+    @Slot(int, int)
+    def update_progress(self, rows_read: int, total: int):
+        if total > 0:
+            self.progress_bar.setRange(0, total)
+            self.progress_bar.setValue(rows_read)
+        self.progress_label.setText(f"{rows_read} rows read")
+
+    def set_unmatched_codes(self, codes: list):
+        """
+        Shows the codes in the file which are not registered to any sku
+        :param codes:
+        :return:
+        """
+        if codes:
+            self.unmatched_label.setText(f"Unmatched codes({len(codes)}): {', '.join(codes)}")
+            self.unmatched_label.setVisible(True)
+        else:
+            self.unmatched_label.setVisible(False)
+
     def load(self, data_df=None):
+        self.progress_bar.setVisible(False)
+        self.okButton.setEnabled(True)
         if data_df is not None:
+            self.progress_label.setText(f"{data_df.shape[0]} skus to import")
             data_df.reset_index(inplace=True, drop=True)
             self.model.data_df = data_df
+        else:
+            self.progress_label.setText("No data to import")
         self.importView.setModel(self.model)
         self.model.layoutChanged.emit()
 
@@ -78,6 +131,9 @@ class ImportWidget(QWidget):
         self.close()
 
     def terminate(self):
+        if not self.progress_bar.isHidden():
+            self.cancel_signal.emit()
+            self.progress_bar.setVisible(False)
         self.model.data_df = pd.DataFrame()
         self.close()
 
@@ -1,14 +1,17 @@
 import sys
-from time import sleep
 import bcrypt
 from PySide6.QtWidgets import (
     QWidget, QDialog, QLabel, QPushButton, QLineEdit,
     QMessageBox, QFormLayout, QVBoxLayout, QApplication
 )
-from PySide6.QtCore import Qt, QByteArray, Signal
-from PySide6.QtGui import QFont
+from PySide6.QtCore import Qt, QByteArray, Signal, Slot, QThreadPool
+from PySide6.QtGui import QFont, QShowEvent
 from PySide6.QtSql import QSqlDatabase, QSqlQuery
+import core_path
+from danaul_core.login import get_stored_password, PasswordCheck, LabPrefetch
+from common.async_helper import AsyncHelper
 from db.db_utils import ConfigReader
+from db.di_lab import Lab
 from common.d_logger import Logs
 
 
@@ -16,16 +19,29 @@ logger = Logs().get_logger("main")
 
 
 class LoginWidget(QWidget):
+    """
+    The password hash is read through the pool of its own AsyncHelper and
+    checked by bcrypt in a thread of the pool, so the window stays responsive.
+    The Lab is prefetched in the background as soon as the window is shown.
+    """
     start_main = Signal(str)
+    start_signal = Signal(str)
+    done_signal = Signal(str)
 
     def __init__(self, parent=None):
         super().__init__()
         self.parent = parent
+        # Qt SQL is connected only when a user is saved, see insert_user_info
+        self.qt_db_connected = False
+        self.async_helper = AsyncHelper(self, self.do_db_work)
+        # (user_name, password, change_pw) being verified
+        self.pending_login = None
+        self.password_check = None
+        self.lab_prefetched = False
         self.initializeUI()
 
     def initializeUI(self):
         """Initialize the Login GUI window."""
-        self.createConnection()
         self.setFixedSize(300, 300)
         self.setWindowTitle("로그인")
         self.setupWindow()
@@ -79,13 +95,14 @@ class LoginWidget(QWidget):
         login_form.addRow("Password:", self.password_entry)
 
         connect_button = QPushButton("Connect")
-        connect_button.clicked.connect(self.process_login)
+        connect_button.clicked.connect(lambda: self.process_login())
         # respond to returnPressed
         connect_button.setAutoDefault(True)
 
         change_password_button = QPushButton("Change password")
         change_password_button.clicked.connect(lambda: self.process_login(change_pw=True))
         change_password_button.setAutoDefault(True)
+        self.login_buttons = [connect_button, change_password_button]
 
         new_user_button = QPushButton("Sign up")
         new_user_button.clicked.connect(lambda: self.register_password_dialog(user_name=None))
@@ -105,22 +122,30 @@ class LoginWidget(QWidget):
 
         self.setLayout(main_v_box)
 
-    def query_user_password(self, user_name):
-        query = QSqlQuery()
-        query.prepare("SELECT user_password FROM users WHERE user_name = ?")
-        query.addBindValue(user_name)
-        query.exec()
-
-        result = None
-        if query.next():
-            result = query.value(0)
-            logger.debug("Got a password!")
-        else:
-            logger.debug("No password found")
-
-        return result
+    def showEvent(self, event: QShowEvent):
+        super().showEvent(event)
+        if not self.lab_prefetched:
+            # the tables are read while the user is typing
+            self.lab_prefetched = True
+            QThreadPool.globalInstance().start(LabPrefetch(Lab))
+
+    async def do_db_work(self, action: str):
+        if action == "verify_user":
+            user_name, password, _ = self.pending_login
+            try:
+                stored_pw = await get_stored_password(user_name)
+            except ConnectionError as e:
+                logger.error(e)
+                self.done_signal.emit(action)
+                self.on_db_unreachable()
+                return
+            self.done_signal.emit(action)
+            self.verify_user(password, stored_pw)
 
     def insert_user_info(self, user_name, hashed_user_pw):
+        if not self.qt_db_connected:
+            self.createConnection()
+            self.qt_db_connected = True
         query = QSqlQuery()
         pw = QByteArray(hashed_user_pw)
         logger.debug(f"{user_name}, password:{pw}")
@@ -148,23 +173,21 @@ class LoginWidget(QWidget):
         hashed_password = bcrypt.hashpw(password.encode('utf-8'), salt)
         return hashed_password
 
-    def verify_password(self, input_password, stored_password):
-        # Hash the input password with the same salt used to hash the stored password
-        hashed_input_password = bcrypt.hashpw(input_password.encode('utf-8'), stored_password)
-        # Compare the hashed input password with the stored password
-        return hashed_input_password == stored_password
-
-    def verify_user(self, password, user_name):
-        # The following code converts QByteArray to PyBtye(bytes) format
-        # stored_pwd: type is QByteArray hex format
-        stored_pw: QByteArray = self.query_user_password(user_name)
+    def verify_user(self, password: str, stored_pw: bytes or None):
+        """
+        Starts checking the password in a thread of the pool,
+        which calls on_user_verified with the result
+        :param password:
+        :param stored_pw: the bcrypt hash in the db
+        :return:
+        """
         if stored_pw is None:
-            return False
-
-        # convert QByteArray to bytes
-        stored_pw_bytes: bytes = stored_pw.data()
-        password_verified = self.verify_password(password, stored_pw_bytes)
-        return password_verified
+            logger.debug("No password found")
+            self.on_user_verified(False)
+            return
+        self.password_check = PasswordCheck(password, stored_pw)
+        self.password_check.signals.checked.connect(self.on_user_verified)
+        QThreadPool.globalInstance().start(self.password_check)
 
     def process_login(self, change_pw=False):
         """
@@ -173,18 +196,39 @@ class LoginWidget(QWidget):
 
         :return:
         """
+        if self.pending_login is not None:
+            return
         # Collect information that the user entered
         user_name = self.user_entry.text()
         password = self.password_entry.text()
+        self.pending_login = (user_name, password, change_pw)
+        for button in self.login_buttons:
+            button.setEnabled(False)
+        self.start_signal.emit("verify_user")
+
+    def on_db_unreachable(self):
+        self.pending_login = None
+        for button in self.login_buttons:
+            button.setEnabled(True)
+        QMessageBox.warning(self,
+                            "Connection Failed",
+                            "Cannot connect to the database. Please try again later.",
+                            QMessageBox.Close)
+
+    @Slot(bool)
+    def on_user_verified(self, password_verified: bool):
+        user_name, _, change_pw = self.pending_login
+        self.pending_login = None
+        self.password_check = None
+        for button in self.login_buttons:
+            button.setEnabled(True)
 
-        password_verified = self.verify_user(password, user_name)
         if password_verified:
             self.close()
             if change_pw:
                 self.register_password_dialog(user_name)
             else:
                 # Open the SQL management application
-                sleep(0.5)  # Pause slightly before showing the parent window
                 self.start_main.emit(user_name)
                 logger.debug("Passed!!!")
         else:
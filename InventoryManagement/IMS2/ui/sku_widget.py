@@ -5,7 +5,7 @@ from PySide6.QtWidgets import (
 )
 from PySide6.QtCore import Qt, Slot, QModelIndex
 from PySide6.QtGui import QFont
-from common.d_logger import Logs, logging
+from common.d_logger import Logs
 from ui.di_table_widget import InventoryTableWidget
 from model.sku_model import SkuModel
 
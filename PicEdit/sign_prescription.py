@@ -1,10 +1,19 @@
+import argparse
+import multiprocessing
 import os
 import platform
 import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from configparser import ConfigParser
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import repeat
 from pathlib import Path
+from typing import List, NamedTuple, Optional
 
 from PIL import Image, ImageDraw, ImageFont
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
 from PySide6.QtGui import QAction, QIcon, QImage, QPixmap, Qt
 from PySide6.QtWidgets import (
     QApplication,
@@ -13,6 +22,7 @@ from PySide6.QtWidgets import (
     QLabel,
     QLineEdit,
     QMainWindow,
+    QMessageBox,
     QPushButton,
     QScrollArea,
     QTextEdit,
@@ -24,6 +34,215 @@ from common.danaul_logger import Logs, resource_path
 
 logger = Logs().get_logger("main")
 
+SIGN_POSITION = (470, 430)
+TEXT_POSITION = (730, 1150)
+FONT_SIZE = 16
+OUT_PREFIX = "OUT_"
+# the prescriptions in a folder signed by the batch
+IMAGE_SUFFIXES = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff")
+
+
+def get_font_path() -> str:
+    system = platform.system()
+    if system == "Windows":
+        return "C:\\Windows\\Fonts\\gulim.ttc"
+    elif system == "Darwin":  # macos
+        return "/System/Library/Fonts/Supplemental/AppleGothic.ttf"
+    elif system == "Linux":
+        return "/usr/share/fonts/truetype/nanum/NanumGothic.ttf"
+    else:
+        raise OSError("Unsupported operating system.")
+
+
+@dataclass(frozen=True)
+class SigningContext:
+    """
+    The signature decoded and the font loaded, shared by all the prescriptions
+    """
+    sign_img: Image.Image
+    font: ImageFont.ImageFont
+
+
+@lru_cache(maxsize=None)
+def get_signing_context(sign_file_path: Path) -> SigningContext:
+    """
+    Loads the signature and the font once per process
+    :param sign_file_path:
+    :return:
+    """
+    with Image.open(sign_file_path) as img:
+        sign_img = img.copy()
+
+    font_path = get_font_path()
+    try:
+        font = ImageFont.truetype(font_path, size=FONT_SIZE)
+    except IOError:
+        print(f"Font not found {font_path}")
+        font = ImageFont.load_default()  # fallback to default font
+    return SigningContext(sign_img, font)
+
+
+def make_out_path(file_path: Path, keep_suffix: bool = False) -> Path:
+    """
+    :param file_path: the image of a prescription
+    :param keep_suffix: OUT_<name>_<suffix>.pdf instead
+    :return: OUT_<name>.pdf beside the image
+    """
+    name = file_path.stem
+    if keep_suffix:
+        name += "_" + file_path.suffix.lstrip(".")
+    return file_path.with_name(OUT_PREFIX + name + ".pdf")
+
+
+def make_out_paths(file_paths: List[Path]) -> List[Path]:
+    """
+    Images of the same name in a folder, like a.png and a.jpg, would be
+    signed into the same pdf, so their suffixes are kept in the names
+    :param file_paths:
+    :return: the output paths in the order of file_paths
+    """
+    keys = [(file_path.parent, file_path.stem.casefold()) for file_path in file_paths]
+    counts = Counter(keys)
+    return [make_out_path(file_path, counts[key] > 1)
+            for file_path, key in zip(file_paths, keys)]
+
+
+def sign_image(file_path: Path, context: SigningContext, tel_num: str,
+               out_path: Optional[Path] = None) -> Image.Image:
+    """
+    Signs the prescription and saves it as a pdf beside it
+    :param file_path: the image of a prescription
+    :param context:
+    :param tel_num: the phone number of the patient
+    :param out_path: make_out_path of file_path if None
+    :return: the signed image
+    """
+    if out_path is None:
+        out_path = make_out_path(file_path)
+
+    # open an image
+    with Image.open(file_path) as base_img:
+        # paste a sign image
+        composite_img = base_img.copy()
+    composite_img.paste(context.sign_img, SIGN_POSITION, context.sign_img)
+
+    # render the text on the image
+    img_draw = ImageDraw.Draw(composite_img)
+    img_draw.text(
+        TEXT_POSITION,
+        "비대면 진료" + "\n환자 전화번호: " + tel_num,
+        font=context.font,
+        fill="black",
+    )
+
+    # composite_img.show()
+    composite_img.save(out_path)
+    return composite_img
+
+
+class SignResult(NamedTuple):
+    file_path: Path
+    out_path: Optional[Path]
+    error: Optional[str]
+
+
+def sign_file(file_path: Path, out_path: Path, sign_file_path: Path, tel_num: str = "") -> SignResult:
+    """
+    sign_image for the worker processes, which keep the image to themselves
+    :param file_path:
+    :param out_path:
+    :param sign_file_path:
+    :param tel_num:
+    :return:
+    """
+    try:
+        sign_image(file_path, get_signing_context(sign_file_path), tel_num, out_path)
+    except Exception as e:
+        return SignResult(file_path, None, str(e))
+    return SignResult(file_path, out_path, None)
+
+
+def sign_files(file_paths: List[Path], sign_file_path: Path, tel_num: str = "",
+               workers: Optional[int] = None, mp_context=None) -> List[SignResult]:
+    """
+    Signs the prescriptions in worker processes, each of which
+    loads the signature and the font once
+    :param file_paths:
+    :param sign_file_path:
+    :param tel_num: the phone number of a patient, only for a single prescription
+    :param workers: the number of processes, as many as the cpus if None
+    :param mp_context: how the processes start, the default of the platform if None
+    :return: the results in the order of file_paths
+    """
+    if tel_num and len(file_paths) > 1:
+        raise ValueError("a phone number is of a single prescription")
+    out_paths = make_out_paths(file_paths)
+    if len(file_paths) < 2 or workers == 1:
+        return [sign_file(file_path, out_path, sign_file_path, tel_num)
+                for file_path, out_path in zip(file_paths, out_paths)]
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context) as executor:
+        return list(executor.map(sign_file, file_paths, out_paths, repeat(sign_file_path)))
+
+
+def find_prescriptions(paths: List[str]) -> List[Path]:
+    """
+    :param paths: files or folders
+    :return: the images of the folders, but the signed ones, and the files,
+             each of them once
+    """
+    file_paths = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            file_paths.extend(sorted(
+                p for p in path.iterdir()
+                if p.suffix.lower() in IMAGE_SUFFIXES and not p.name.startswith(OUT_PREFIX)))
+        else:
+            file_paths.append(path)
+    # a file given twice would be signed twice into the same pdf at the same time
+    seen = set()
+    unique_paths = []
+    for file_path in file_paths:
+        if file_path.resolve() not in seen:
+            seen.add(file_path.resolve())
+            unique_paths.append(file_path)
+    return unique_paths
+
+
+def format_results(results: List[SignResult]) -> str:
+    lines = [f"{result.file_path.name} -> {result.out_path.name}" if result.error is None
+             else f"{result.file_path.name} 실패: {result.error}"
+             for result in results]
+    failed = sum(result.error is not None for result in results)
+    lines.append(f"{len(results) - failed}개 서명 완료, {failed}개 실패")
+    return "\n".join(lines)
+
+
+class SignBatchSignals(QObject):
+    # list of SignResult
+    finished = Signal(list)
+
+
+class SignBatch(QRunnable):
+    """
+    Runs sign_files out of the GUI thread, leaving the phone numbers blank
+    """
+    def __init__(self, file_paths: List[Path], sign_file_path: Path):
+        super().__init__()
+        self.file_paths = file_paths
+        self.sign_file_path = sign_file_path
+        self.signals = SignBatchSignals()
+
+    def run(self):
+        # forking the threads of Qt is not safe, so the processes are spawned
+        try:
+            results = sign_files(self.file_paths, self.sign_file_path,
+                                 mp_context=multiprocessing.get_context("spawn"))
+        except Exception as e:
+            # the pool itself failed, like a worker process that could not start
+            logger.exception(e)
+            results = [SignResult(file_path, None, str(e)) for file_path in self.file_paths]
+        self.signals.finished.emit(results)
+
 
 class MyApp(QMainWindow):
 
@@ -35,6 +254,7 @@ class MyApp(QMainWindow):
         self.config.read(config_path)
         self.dir_path = Path(self.config["danaul"]["WorkingDirPath"])
         self.sign_file_path = Path(self.config["danaul"]["SignFilePath"])
+        self.batch = None
 
     def initUI(self):
         self.textEdit = QTextEdit()
@@ -43,7 +263,7 @@ class MyApp(QMainWindow):
 
         openFile = QAction(QIcon("assets/open.png"), "Open", self)
         openFile.setShortcut("Ctrl+O")
-        openFile.setStatusTip("Open New File")
+        openFile.setStatusTip("Open New Files")
         openFile.triggered.connect(self.showDialog)
 
         menubar = self.menuBar()
@@ -52,9 +272,9 @@ class MyApp(QMainWindow):
         fileMenu.addAction(openFile)
 
         # open file button
-        open_file_btn = QPushButton("Open File")
-        open_file_btn.setMaximumWidth(500)
-        open_file_btn.clicked.connect(self.showDialog)
+        self.open_file_btn = QPushButton("Open Files")
+        self.open_file_btn.setMaximumWidth(500)
+        self.open_file_btn.clicked.connect(self.showDialog)
 
         # phone number edit box
         self.tel_le = QLineEdit(self)
@@ -78,7 +298,7 @@ class MyApp(QMainWindow):
         hbox.stretch(1)
         hbox.addWidget(self.tel_le)
         hbox.stretch(1)
-        hbox.addWidget(open_file_btn)
+        hbox.addWidget(self.open_file_btn)
         hbox.stretch(1)
         vbox.addLayout(hbox)
         vbox.stretch(1)
@@ -92,60 +312,19 @@ class MyApp(QMainWindow):
         self.show()
 
     def sign_pic(self, file_path: Path):
-        out_file_name = "OUT_" + file_path.stem + ".pdf"
-
         try:
-            # open an image
-            with Image.open(file_path) as base_img:
-                # paste a sign image
-                composite_img = base_img.copy()
-                img_sign = Image.open(self.sign_file_path)
-                composite_img.paste(img_sign, (470, 430), img_sign)
-
-                # render the text on the image
-                img_draw = ImageDraw.Draw(composite_img)
-                tel_num = self.tel_le.text()
-                # specify the font style
-                # set font path
-                system = platform.system()
-                if system == "Windows":
-                    font_path = "C:\\Windows\\Fonts\\gulim.ttc"
-                elif system == "Darwin":  # macos
-                    font_path = "/System/Library/Fonts/Supplemental/AppleGothic.ttf"
-                elif system == "Linux":
-                    font_path = "/usr/share/fonts/truetype/nanum/NanumGothic.ttf"
-                else:
-                    raise OSError("Unsupported operating system.")
-
-                # load font
-                try:
-                    font = ImageFont.truetype(font_path, size=16)
-                except IOError:
-                    print(f"Font not found {font_path}")
-                    font = ImageFont.load_default()  # fallback to default font
-
-                # draw text
-                img_draw.text(
-                    (730, 1150),
-                    "비대면 진료" + "\n환자 전화번호: " + tel_num,
-                    font=font,
-                    fill="black",
-                )
-
-                # composite_img.show()
-                composite_img.save(file_path.with_name(out_file_name))
-                return composite_img
-
+            return sign_image(file_path, get_signing_context(self.sign_file_path),
+                              self.tel_le.text())
         except Exception as e:
             logger.debug(f"Error in opening file: {e}")
             return None
 
     def showDialog(self):
-        fname = QFileDialog.getOpenFileName(self, "Open file", str(self.dir_path))
-        logger.debug(f"Opening {fname[0]}")
+        fnames, _ = QFileDialog.getOpenFileNames(self, "Open files", str(self.dir_path))
+        logger.debug(f"Opening {fnames}")
 
-        if fname[0]:
-            pil_img = self.sign_pic(Path(fname[0]))
+        if len(fnames) == 1:
+            pil_img = self.sign_pic(Path(fnames[0]))
             if pil_img is None:
                 return
 
@@ -160,8 +339,61 @@ class MyApp(QMainWindow):
 
             self.display_label.setPixmap(qt_pixmap)
 
+        elif len(fnames) > 1:
+            if self.tel_le.text():
+                # the number is of one patient, not of all the prescriptions
+                QMessageBox.warning(self, "전화번호",
+                                    "여러 처방전을 서명할 때는 전화번호를 비워 주세요.")
+                return
+            # the batch signs in worker processes and reports each file
+            self.open_file_btn.setEnabled(False)
+            self.statusBar().showMessage(f"{len(fnames)}개 서명 중...")
+            self.batch = SignBatch([Path(fname) for fname in fnames], self.sign_file_path)
+            self.batch.signals.finished.connect(self.on_batch_finished)
+            QThreadPool.globalInstance().start(self.batch)
+
+    def on_batch_finished(self, results: List[SignResult]):
+        for result in results:
+            if result.error is not None:
+                logger.debug(f"Error in signing {result.file_path}: {result.error}")
+        report = format_results(results)
+        self.display_label.setText(report)
+        self.statusBar().showMessage(report.splitlines()[-1])
+        self.open_file_btn.setEnabled(True)
+        self.batch = None
+
+
+def main_batch(args):
+    config = ConfigParser()
+    config.read(resource_path("./config.ini"))
+    sign_file_path = Path(args.sign or config["danaul"]["SignFilePath"])
+    file_paths = find_prescriptions(args.batch)
+    if not file_paths:
+        print(f"{args.batch} 에서 서명할 처방전을 찾지 못했습니다.")
+        return 1
+    if args.tel and len(file_paths) > 1:
+        print(f"--tel 은 처방전 하나에만 쓸 수 있습니다. ({len(file_paths)}개 선택됨)")
+        return 2
+    results = sign_files(file_paths, sign_file_path, args.tel, args.workers)
+    print(format_results(results))
+    return 0 if all(result.error is None for result in results) else 1
+
 
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
+    # the worker processes of the packaged app start from this script too
+    multiprocessing.freeze_support()
+
+    parser = argparse.ArgumentParser(description="처방전 서명")
+    parser.add_argument("--batch", nargs="+", metavar="PATH",
+                        help="서명할 처방전 파일 또는 폴더 (창을 열지 않음)")
+    parser.add_argument("--tel", default="", help="처방전에 적을 환자 전화번호 (처방전 하나일 때만)")
+    parser.add_argument("--sign", help="서명 이미지 (기본: config.ini의 SignFilePath)")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="동시에 서명할 프로세스 수 (기본: CPU 수)")
+    args, qt_args = parser.parse_known_args()
+    if args.batch:
+        sys.exit(main_batch(args))
+
+    app = QApplication(sys.argv[:1] + qt_args)
     ex = MyApp()
     sys.exit(app.exec())
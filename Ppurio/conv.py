@@ -1,6 +1,16 @@
 import pandas as pd
 import os
+import re
 import datetime
+import argparse
+import importlib.util
+from concurrent.futures import ProcessPoolExecutor
+
+# xlsxwriter writes much faster, openpyxl is there with pandas
+EXCEL_ENGINE = 'xlsxwriter' if importlib.util.find_spec('xlsxwriter') else 'openpyxl'
+# not allowed in the names of files or sheets
+INVALID_NAME_RE = re.compile(r'[\\/:*?"<>|\[\]]')
+
 
 def conv_datetime(dt):
     weekdays = ('월', '화', '수', '목', '금', '토', '일')
@@ -8,13 +18,69 @@ def conv_datetime(dt):
     form_time_str = dt.strftime('%m/%d(') + weekdays[dt.weekday()] + dt.strftime(') %I:%M %p')
     return form_time_str
 
+def make_out_path(dir_name, name, taken=()):
+    """
+    :param dir_name:
+    :param name: without the suffix
+    :param taken: the paths given to the other files of the run
+    :return: the path of a file not there yet, numbered if the name is taken
+    """
+    # names differing only in case are the same file on Windows and macOS
+    taken = {os.path.normcase(path).casefold() for path in taken}
+    out_path = os.path.join(dir_name, name + '.xlsx')
+    count = 1
+    while os.path.exists(out_path) or os.path.normcase(out_path).casefold() in taken:
+        count += 1
+        out_path = os.path.join(dir_name, f"{name}_{count}.xlsx")
+    return out_path
+
 # file_type:
 # 'r': reservation, 'd': dosu, 'h': hyal, 'b': blood, 'k': block
-def create_xlsx(df, dir_name, file_type):
-    curr_time = datetime.datetime.now()
-    out_name = curr_time.strftime('%Y_%m_%d') + '_' + file_type + '.xlsx'
-    out_path = os.path.join(dir_name, out_name)
-    df.to_excel(out_path, sheet_name="Sheet1", header=False, index=False)
+def create_xlsx(df, out_path, sheet_name="Sheet1"):
+    with pd.ExcelWriter(out_path, engine=EXCEL_ENGINE) as writer:
+        df.to_excel(writer, sheet_name=sheet_name, header=False, index=False)
+
+def write_groups(groups, dir_name, workers=1, sheets=False):
+    """
+    Writes each group of reservations in one pass, named after the time of the run
+    :param groups: {file_type: DataFrame}
+    :param dir_name:
+    :param workers: the number of processes writing the files at the same time
+    :param sheets: writes the groups as the sheets of one workbook instead
+    :return: the paths written
+    """
+    run_name = datetime.datetime.now().strftime('%Y_%m_%d_%H%M%S')
+    if sheets:
+        out_path = make_out_path(dir_name, run_name)
+        # the workbook appears only when all the sheets are written
+        tmp_path = os.path.splitext(out_path)[0] + '.tmp.xlsx'
+        try:
+            with pd.ExcelWriter(tmp_path, engine=EXCEL_ENGINE) as writer:
+                sheet_names = set()
+                for count, (file_type, df) in enumerate(groups.items(), 1):
+                    sheet_name = INVALID_NAME_RE.sub('_', file_type)[:28] or '_'
+                    # Excel takes the names differing only in case as the same
+                    while sheet_name.casefold() in sheet_names:
+                        sheet_name += f"_{count}"
+                    sheet_names.add(sheet_name.casefold())
+                    df.to_excel(writer, sheet_name=sheet_name, header=False, index=False)
+            os.replace(tmp_path, out_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return [out_path]
+
+    out_paths = []
+    for file_type in groups.keys():
+        out_paths.append(make_out_path(dir_name, run_name + '_' + INVALID_NAME_RE.sub('_', file_type),
+                                       out_paths))
+    if workers > 1 and len(groups) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(create_xlsx, groups.values(), out_paths))
+    else:
+        for df, out_path in zip(groups.values(), out_paths):
+            create_xlsx(df, out_path)
+    return out_paths
 
 def read_rsrv_file(file_path):
     try:
@@ -33,6 +99,13 @@ def read_rsrv_file(file_path):
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="뿌리오 예약 문자 파일 변환")
+    parser.add_argument('-j', '--workers', type=int, default=1,
+                        help="동시에 파일을 쓸 프로세스 수")
+    parser.add_argument('--sheets', action='store_true',
+                        help="문자 종류별로 파일 대신 한 파일의 시트로 저장")
+    args = parser.parse_args()
+
     dir_name = "C:/Users/lambk/OneDrive/문서/뿌리오"
     default_input_file = "reserv.xlsx"
     # dir_name = "./"
@@ -53,7 +126,7 @@ if __name__ == '__main__':
         if wb_df is not False:
             # classify
             wb_df.loc[:, 'type'] = wb_df['메모'].str.lstrip().str[:2]
-            grouped = wb_df.groupby('type')
-            for name, group in grouped:
-                create_xlsx(group.iloc[:, :-1], dir_name, name)
+            groups = {name: group.iloc[:, :-1] for name, group in wb_df.groupby('type')}
+            for out_path in write_groups(groups, dir_name, args.workers, args.sheets):
+                print(f"{out_path} 작성")
 
@@ -1,39 +1,60 @@
 # import pandas as pd
-from pandas import read_excel
+from pandas import read_excel, to_datetime, Series
+from numpy import where
 import os.path
+import re
+import glob
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from itertools import repeat
 
+WEEKDAYS = ('월', '화', '수', '목', '금', '토', '일')
+# the first word of a memo before ';' tells the message to send
+MEMO_CODE_RE = re.compile(r"^\s*(예약|연골|검사|도수|주사|비디)(?:;|$)")
+MEMO_CONTENTS = {"예약": "치료경과",
+                 "연골": "무릎연골주사",
+                 "검사": "검사결과",
+                 "도수": "도수치료",
+                 "주사": "주사치료",
+                 "비디": "비타민D주사"}
 
-def conv_datetime(time_str):
-    weekdays = ('월', '화', '수', '목', '금', '토', '일')
-    # time_str to datetime object
-    try:
-        if type(time_str) is str:
-            dt = datetime.strptime(time_str, '%Y-%m-%d %H:%M')
-        elif type(time_str) is datetime:
-            dt = time_str
-        # if the reservation hour is earlier than 9pm, it is regarded as an exact time reservation
-        # if the hour is later than 9pm, it is regarded as a day reservation in which
-        # just the day information is notified to the client.
-        if dt.hour < 21:
-            form_time_str = dt.strftime('%m/%d(') + weekdays[dt.weekday()] + dt.strftime(') %I:%M %p')
-        else:
-            form_time_str = dt.strftime('%m/%d(') + weekdays[dt.weekday()] + ')'
-    except Exception as e:
-        print(e)
-        form_time_str = False
-    return form_time_str
 
-def make_out_file_name(flag):
+def zero_pad(numbers):
+    return numbers.astype(str).str.zfill(2)
+
+
+def conv_datetimes(times):
+    """
+    Formats the reservation times all at once.
+    The strings are put together from the fields of the times
+    instead of formatting each of them with strftime
+    :param times: Series of datetime or str like '2021-10-03 14:30'
+    :return: Series of str like '10/03(일) 02:30 PM', False where a time cannot be read
+    """
+    parsed = to_datetime(times, format='%Y-%m-%d %H:%M', errors='coerce')
+    dt = parsed[parsed.notna()].dt
+    day_str = (zero_pad(dt.month) + '/' + zero_pad(dt.day)
+               + '(' + dt.weekday.map(dict(enumerate(WEEKDAYS))) + ')')
+    am_pm = Series(where(dt.hour < 12, ' AM', ' PM'), index=day_str.index)
+    time_str = ' ' + zero_pad((dt.hour + 11) % 12 + 1) + ':' + zero_pad(dt.minute) + am_pm
+    # if the reservation hour is earlier than 9pm, it is regarded as an exact time reservation
+    # if the hour is later than 9pm, it is regarded as a day reservation in which
+    # just the day information is notified to the client.
+    form_time_str = day_str.mask(dt.hour < 21, day_str + time_str)
+    return form_time_str.reindex(times.index).astype(object).where(parsed.notna(), False)
+
+
+def make_out_file_name(flag, prefix=''):
     curr_time = datetime.now()
-    out_name = curr_time.strftime('%m%d') + flag + '.xlsx'
+    out_name = prefix + curr_time.strftime('%m%d') + flag + '.xlsx'
     return out_name
 
 # flag: None(False) or "bad"(True)
-def create_xlsx(df, dir_name, flag=''):
+def create_xlsx(df, dir_name, flag='', prefix=''):
     if df is None:
         return
-    out_name = make_out_file_name(flag)
+    out_name = make_out_file_name(flag, prefix)
     out_path = os.path.join(dir_name, out_name)
 
     if flag:
@@ -42,44 +63,118 @@ def create_xlsx(df, dir_name, flag=''):
         df.to_excel(out_path, sheet_name="Sheet1", header=False, index=False)
 
 def read_rsrv_file(file_path):
-    try:
-        wb = read_excel(file_path)
-        if '일시' not in wb.columns:
-            wb.loc[:, '일시'] = wb.loc[:, '예약일시'].map(conv_datetime)
-        wb_df = wb.loc[:, ['성명', '핸드폰번호', '일시', '메모']]
-        print(wb_df)
-        return wb_df
-    except FileNotFoundError:
-        print(f"{file_path} 파일이 존재하지 않습니다.")
-        return False
-    except PermissionError:
-        print(f"{file_path} 파일이 열려 있습니다. 파일을 닫고 다시 시도 해주세요.")
-        return False
-    except KeyError:
-        print(f"{file_path} 파일이 형식에 맞지 않습니다.")
-        return False
+    wb = read_excel(file_path)
+    if '일시' not in wb.columns:
+        wb.loc[:, '일시'] = conv_datetimes(wb.loc[:, '예약일시'])
+    return wb.loc[:, ['성명', '핸드폰번호', '일시', '메모']]
 
 def check_df(wb_df):
-    pattern = r"예약|연골|검사|도수|주사|비디"
-    contents = {"예약": "치료경과",
-                "연골": "무릎연골주사",
-                "검사": "검사결과",
-                "도수": "도수치료",
-                "주사": "주사치료",
-                "비디": "비타민D주사"}
-    wb_df.loc[:, 'Check'] = wb_df.loc[:, '메세지코드'].str.fullmatch(pattern)
-
-    group_obj = wb_df.groupby('Check')
+    # rows without a memo go to the bad ones
+    memos = wb_df.loc[:, '메모'].fillna('').astype(str)
+    codes = memos.str.extract(MEMO_CODE_RE, expand=False)
+    checked = codes.notna()
     good_df = None
     bad_df = None
-    if True in group_obj.groups.keys():
+    if checked.any():
         # For preventing a view being assigned value, we need a copy a good_df
-        good_df = group_obj.get_group(True).copy()
-        good_df.loc[:, '메세지'] = good_df.loc[:, '메세지코드'].map(contents)
-    if False in group_obj.groups.keys():
-        bad_df = wb_df.groupby('Check').get_group(False)
+        good_df = wb_df.loc[checked].copy()
+        good_df.loc[:, '메세지'] = codes.loc[checked].map(MEMO_CONTENTS)
+    if not checked.all():
+        bad_df = wb_df.loc[~checked]
     return good_df, bad_df
 
+def convert_rsrv_file(file_path, dir_name, prefix='', show=False):
+    """
+    Writes the file of the good reservations and the file of the bad ones
+    :param file_path: the reservation export
+    :param dir_name: where the files are written
+    :param prefix: of the names of the files written
+    :param show: prints the reservations read
+    :return: the lines of the result
+    """
+    try:
+        wb_df = read_rsrv_file(file_path)
+    except FileNotFoundError:
+        return [f"{file_path} 파일이 존재하지 않습니다."]
+    except PermissionError:
+        return [f"{file_path} 파일이 열려 있습니다. 파일을 닫고 다시 시도 해주세요."]
+    except KeyError:
+        return [f"{file_path} 파일이 형식에 맞지 않습니다."]
+    except Exception as e:
+        # one file that cannot be read must not stop the others of a batch
+        return [f"{file_path} 파일을 읽지 못했습니다: {e}"]
+    if show:
+        print(wb_df)
+
+    lines = []
+    try:
+        good_df, bad_df = check_df(wb_df)
+        if good_df is not None:
+            lines.append(f"\n{good_df.shape[0]}명 예약 환자 파일 작성 성공!")
+            create_xlsx(good_df.loc[:, ['성명', '핸드폰번호', '일시', '메세지']], dir_name, prefix=prefix)
+        if bad_df is not None:
+            lines.append(f"{bad_df.shape[0]}명 예약 환자 파일 작성 실패!")
+            lines.append(f"{file_path} 파일에서 {bad_df['성명'].to_list()} 메모 내용을 형식에 맞게 수정하세요 !!!!!!!!!!!!")
+            create_xlsx(bad_df.loc[:, ['성명', '핸드폰번호', '일시', '메모']], dir_name, 'bad', prefix)
+    except Exception as e:
+        lines.append(f"{file_path} 파일 변환 실패: {e}")
+    return lines
+
+def find_rsrv_files(paths):
+    """
+    :param paths: files, directories or glob patterns
+    :return: the xlsx files, without the lock files of Excel
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            path = os.path.join(path, '*.xlsx')
+        matches = sorted(glob.glob(path)) if glob.has_magic(path) else [path]
+        files.extend(f for f in matches
+                     if not os.path.basename(f).startswith('~$') and f not in files)
+    return files
+
+def make_prefixes(files):
+    """
+    :param files:
+    :return: a prefix per file after its name, numbered after the first
+             among the files of the same name in different folders
+    """
+    prefixes = []
+    taken = set()
+    for file_path in files:
+        stem = os.path.splitext(os.path.basename(file_path))[0]
+        prefix = stem + '_'
+        count = 1
+        # names differing only in case are the same file on Windows and macOS
+        while prefix.casefold() in taken:
+            count += 1
+            prefix = f"{stem}_{count}_"
+        taken.add(prefix.casefold())
+        prefixes.append(prefix)
+    return prefixes
+
+def convert_batch(paths, out_dir, workers=None):
+    """
+    Converts the files in processes of their own.
+    Each input has its own output files, named after it
+    :param paths: files, directories or glob patterns
+    :param out_dir:
+    :param workers: the number of processes, as many as the cpus if None
+    :return:
+    """
+    files = find_rsrv_files(paths)
+    if not files:
+        print(f"{paths} 에서 변환할 파일을 찾지 못했습니다.")
+        return
+    os.makedirs(out_dir, exist_ok=True)
+    prefixes = make_prefixes(files)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for file_path, lines in zip(files, executor.map(convert_rsrv_file, files,
+                                                        repeat(out_dir), prefixes)):
+            print(f"\n[{file_path}]", *lines, sep='\n')
+    print(f"\n{len(files)}개 파일 변환 완료: {out_dir}")
+
 
 if __name__ == '__main__':
     # dir_name = "C:/Users/lambk/OneDrive/문서/Danaul Util Devel/뿌리오"
@@ -87,6 +182,18 @@ if __name__ == '__main__':
     dir_name = "./"
     default_input_file = "통합 문서1"
 
+    parser = argparse.ArgumentParser(description="뿌리오 예약 문자 파일 변환")
+    parser.add_argument('paths', nargs='*',
+                        help="예약 파일, 폴더 또는 glob 패턴 (없으면 하나씩 입력받음)")
+    parser.add_argument('-o', '--out', default=os.path.join(dir_name, 'converted'),
+                        help="변환된 파일을 저장할 폴더")
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help="동시에 변환할 파일 수 (기본: CPU 수)")
+    args = parser.parse_args()
+    if args.paths:
+        convert_batch(args.paths, args.out, args.workers)
+        raise SystemExit(0)
+
     while True:
         rsrv_file = input(f"\n입력파일명 (Press Enter for {default_input_file}.xlsx,   'q' to quit): ")
         if rsrv_file == 'q':
@@ -97,14 +204,4 @@ if __name__ == '__main__':
             pass
 
         file_path = os.path.join(dir_name, rsrv_file + '.xlsx' if '.xlsx' not in rsrv_file else rsrv_file)
-        wb_df = read_rsrv_file(file_path)
-        if wb_df is not False:
-            wb_df.loc[:, '메세지코드'] = wb_df['메모'].str.lstrip().str.split(";").str.get(0)
-            good_df, bad_df = check_df(wb_df)
-            if good_df is not None:
-                print(f"\n{good_df.shape[0]}명 예약 환자 파일 작성 성공!")
-                create_xlsx(good_df.loc[:, ['성명', '핸드폰번호', '일시', '메세지']], dir_name)
-            if bad_df is not None:
-                print(f"{bad_df.shape[0]}명 예약 환자 파일 작성 실패!")
-                print(f"{file_path} 파일에서 {bad_df['성명'].to_list()} 메모 내용을 형식에 맞게 수정하세요 !!!!!!!!!!!!")
-                create_xlsx(bad_df.loc[:, ['성명', '핸드폰번호', '일시', '메모']], dir_name, 'bad')
+        print(*convert_rsrv_file(file_path, dir_name, show=True), sep='\n')
@@ -0,0 +1,39 @@
+from operator import methodcaller
+from danaul_core.singleton import Singleton
+from danaul_core.d_logger import Logs
+
+
+logger = Logs().get_logger("main")
+
+
+class ConfigReader(metaclass=Singleton):
+    """
+    Options of the 'name = value' lines in the config file of the app.
+    Each app sets config_file in its constants.py
+    """
+    config_file: str = None
+
+    def __init__(self):
+        self.options = {}
+
+    def read_config_file(self, file_path):
+        try:
+            with open(file_path, 'r') as fd:
+                # strip lines
+                lines = map(methodcaller("strip"), fd.readlines())
+                # filtering lines starting with '#' or blank lines
+                lines_filtered = filter(lambda l: l and not l.startswith("#"), lines)
+                # parsing
+                words_iter = map(methodcaller("split", "="), lines_filtered)
+                # converting map obj to dict
+                self.options = {k.strip(): v.strip() for k, v in words_iter}
+
+        except Exception as e:
+            logger.exception(e)
+
+    def get_options(self, option_name: str):
+        options = self.options.get(option_name, None)
+        if options is None:
+            self.read_config_file(self.config_file)
+            options = self.options.get(option_name, None)
+        return options
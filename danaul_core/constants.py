@@ -0,0 +1,41 @@
+"""
+Constants shared by the apps, which re-export them from their constants.py
+"""
+from enum import Enum
+from functools import total_ordering
+
+
+ADMIN_GROUP = ['admin', 'jye']
+DB_POOL_MIN_SIZE = 1
+DB_POOL_MAX_SIZE = 5
+# local snapshots of the Lab tables, relative to the app directory
+LAB_SNAPSHOT_DIR = 'cache/lab'
+# columns never written to the local snapshots
+LAB_SNAPSHOT_DROP_COLUMNS = ['user_password']
+# rows fetched and written at a time by danaul_core.export
+EXPORT_CHUNK_SIZE = 5000
+
+
+class UserPrivilege:
+    Admin = 0
+    User = 1
+
+
+class RowFlags:
+    OriginalRow = 0
+    NewRow = 1
+    ChangedRow = 2
+    DeletedRow = 4
+
+
+@total_ordering
+class EditLevel(Enum):
+    UserModifiable = 1
+    AdminModifiable = 2
+    Creatable = 3
+    NotEditable = 5
+
+    def __lt__(self, other):
+        if self.__class__ is other.__class__:
+            return self.value < other.value
+        return NotImplemented
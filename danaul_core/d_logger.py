@@ -0,0 +1,32 @@
+import os
+import sys
+import logging
+import logging.config
+import yaml
+from danaul_core.singleton import Singleton
+
+
+class Logs(metaclass=Singleton):
+    """
+    Logging of the app running in the current directory,
+    configured by its common/log_config.yaml
+    """
+    def __init__(self):
+        # make 'log' directory to store log files
+        os.makedirs("log", exist_ok=True)
+
+        # read config file
+        with open('common/log_config.yaml', 'rt') as f:
+            config = yaml.load(f, Loader=yaml.FullLoader)
+            logging.config.dictConfig(config)
+
+        self.err_logger = logging.getLogger("main")
+        sys.excepthook = self.handle_exception
+
+    @staticmethod
+    def get_logger(name: str) -> logging.Logger:
+        return logging.getLogger(name)
+
+    def handle_exception(self, exc_type, exc_value, exc_traceback):
+        self.err_logger.error("Unexpected exception",
+                              exc_info=(exc_type, exc_value, exc_traceback))
@@ -0,0 +1,48 @@
+from typing import List
+
+# the version of each table, raised by every statement writing to the table.
+# LabBase compares the versions to tell the tables changed since it read them
+CREATE_TABLE_VERSIONS_TABLE = \
+    """
+    CREATE TABLE IF NOT EXISTS table_versions(
+        table_name TEXT PRIMARY KEY,
+        version BIGINT NOT NULL DEFAULT 0
+    );"""
+
+CREATE_TABLE_VERSION_FUNCTION = \
+    """
+    CREATE OR REPLACE FUNCTION bump_table_version() RETURNS TRIGGER AS $$
+    BEGIN
+        INSERT INTO table_versions (table_name, version)
+        VALUES (TG_TABLE_NAME, 1)
+        ON CONFLICT (table_name) DO UPDATE
+        SET version = table_versions.version + 1;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;"""
+
+
+def make_table_version_trigger(table: str) -> str:
+    """
+    The trigger runs once per statement, not per row, so a bulk write
+    costs one update of table_versions
+    :param table:
+    :return:
+    """
+    return f"""
+    INSERT INTO table_versions (table_name) VALUES ('{table}')
+    ON CONFLICT (table_name) DO NOTHING;
+
+    DROP TRIGGER IF EXISTS {table}_version_trigger ON {table};
+    CREATE TRIGGER {table}_version_trigger
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();"""
+
+
+def make_table_version_statements(tables: List[str]) -> List[str]:
+    """
+    :param tables: the tables to keep the versions of, which must exist
+    :return: the statements creating table_versions and the triggers
+    """
+    return ([CREATE_TABLE_VERSIONS_TABLE, CREATE_TABLE_VERSION_FUNCTION]
+            + [make_table_version_trigger(table) for table in tables])
@@ -0,0 +1,291 @@
+import asyncio
+import asyncpg
+from asyncpg import Record, UndefinedTableError
+from types import TracebackType
+from typing import Optional, Type, List, Tuple, Dict
+from danaul_core.d_logger import Logs
+from danaul_core.config import ConfigReader
+from danaul_core.constants import DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE
+
+
+logger = Logs().get_logger("db")
+
+
+def make_insert_query(table_name: str,
+                      record: Dict):
+    # make a statement like
+    # "INSERT INTO tb (col1, col2) VALUES($1, $2)"
+    def prefix_dollar(i):
+        return '$' + str(i)
+
+    # filtering [k1, k2, ... ]
+    col_part = [k for k, v in record.items() if v != 'DEFAULT']
+    # making value part ['$1', '$2' ...]
+    val_part = map(prefix_dollar, range(1, len(col_part) + 1))
+    stmt = f"INSERT INTO {table_name} ({','.join(col_part)})" \
+           f" VALUES({','.join(val_part)})"
+    return stmt
+
+
+class ConnectPg:
+    def __init__(self):
+        self.config = ConfigReader()
+        self._conn = None
+
+    async def __aenter__(self):
+        # logger.debug("Trying to connect to db ...")
+        # logger.debug("Entering context manager, waiting for connection")
+        try:
+            self._conn = await asyncpg.connect(host=self.config.get_options("Host"),
+                                               port=self.config.get_options("Port"),
+                                               user=self.config.get_options("User"),
+                                               database=self.config.get_options("Database"),
+                                               password=self.config.get_options("Password"))
+            # logger.debug("Successfully connected!!!")
+            return self._conn
+        except Exception as e:
+            logger.debug('Error while connecting to DB')
+            logger.exception(e)
+            return None
+
+    async def __aexit__(self,
+                        exc_type: Optional[Type[BaseException]],
+                        exc_val: Optional[BaseException],
+                        exc_tb: Optional[TracebackType]):
+        # logger.debug("Exiting context manager")
+        if self._conn:
+            # logger.debug("Closed connection")
+            await self._conn.close()
+
+
+class PgPool:
+    """
+    Keeps an asyncpg pool per event loop.
+    A pool is bound to the loop it is made in, and Lab, the AsyncHelper and
+    the dialogs run their own loops, so they cannot share a single pool.
+    """
+    _pools: Dict[asyncio.AbstractEventLoop, asyncpg.Pool] = {}
+
+    @classmethod
+    async def get_pool(cls) -> asyncpg.Pool or None:
+        """
+        :return: the pool of the running loop, made on the first call,
+        or None if the db is unreachable
+        """
+        loop = asyncio.get_running_loop()
+        pool = cls._pools.get(loop)
+        if pool is None:
+            config = ConfigReader()
+            try:
+                pool = await asyncpg.create_pool(host=config.get_options("Host"),
+                                                 port=config.get_options("Port"),
+                                                 user=config.get_options("User"),
+                                                 database=config.get_options("Database"),
+                                                 password=config.get_options("Password"),
+                                                 min_size=DB_POOL_MIN_SIZE,
+                                                 max_size=DB_POOL_MAX_SIZE)
+            except Exception as e:
+                logger.debug('Error while making a connection pool')
+                logger.exception(e)
+                return None
+            cls._pools[loop] = pool
+        return pool
+
+    @classmethod
+    async def close_pool(cls):
+        """
+        Closes the pool of the running loop, which has to be done
+        before the loop is closed
+        :return:
+        """
+        pool = cls._pools.pop(asyncio.get_running_loop(), None)
+        if pool is not None:
+            await pool.close()
+
+
+class DbUtil:
+
+    @staticmethod
+    async def create_tables(statements: List[str]):
+        """
+        Create tables
+        sync_execute can be used instead.
+        :param statements: sql statments
+        :return:
+        """
+        results = []
+        async with ConnectPg() as conn:
+            if conn is None:
+                logger.debug("Error while connecting to DB during creating tables")
+                return
+
+            logger.info("Creating the tables")
+            for statement in statements:
+                try:
+                    logger.info(f"{statement}")
+                    status = await conn.execute(statement)
+                    results.append(status)
+                    logger.info(status)
+                except Exception as e:
+                    logger.info(f'create_tables: Error while creating table: {statement}')
+                    logger.exception(e)
+            logger.info("Finished creating the tables")
+        return results
+
+    @staticmethod
+    async def drop_tables(table_names: List[str]):
+        """
+        Remove the tables
+        :param table_names:
+        :return:  the list of results of dropping the tables or
+                  None if connection fails
+        """
+        results = []
+        async with ConnectPg() as conn:
+            if conn is None:
+                logger.debug("Error while connecting to DB during removing tables")
+                return None
+
+            logger.info("Removing the tables")
+            for table in table_names:
+                try:
+                    sql_stmt = f'DROP TABLE {table} CASCADE;'
+                    result = await conn.execute(sql_stmt)
+                    results.append(result)
+                except UndefinedTableError as ute:
+                    logger.info(f'drop_table: Trying to drop an undefined table {ute}')
+                except Exception as e:
+                    logger.info('drop_table: Error while dropping tables')
+                    logger.exception(e)
+            logger.info("Finished removing the tables")
+        return results
+
+    @staticmethod
+    async def select_query(query_stmt: str, args: List = None):
+        """
+        Select query
+        :param query_stmt
+        :return: all results if successful, otherwise None
+        """
+        async with ConnectPg() as conn:
+            if conn is None:
+                logger.debug("Error while connecting to DB during querying tables")
+                return None
+
+            try:
+                query_stmt = await conn.prepare(query_stmt)
+                if args:
+                    results: List[Record] = await query_stmt.fetch(*args)
+                else:
+                    results: List[Record] = await query_stmt.fetch()
+                return results
+            except Exception as e:
+                logger.debug(f'select_query: Error while executing {query_stmt}')
+                logger.exception(e)
+                return None
+
+    @staticmethod
+    async def pool_select_query(query_stmt: str, args: List = None):
+        """
+        Select query through the pool of the running loop
+        :param query_stmt:
+        :param args: arguments of the place holders $1, $2, ...
+        :return: all results if successful, otherwise None
+        """
+        pool = await PgPool.get_pool()
+        if pool is None:
+            logger.debug("Error while connecting to DB during querying tables")
+            return None
+
+        try:
+            return await pool.fetch(query_stmt, *(args or []))
+        except Exception as e:
+            logger.debug(f'pool_select_query: Error while executing {query_stmt}')
+            logger.exception(e)
+            return None
+
+    @staticmethod
+    async def executemany(query_stmt: str, args: List[Tuple]):
+        """
+        Execute a query through connection.executemany()
+        :param query_stmt: query to execute
+        :param args: list of arguments which are supplied to the query one by one
+        :return:
+            if successful, None
+            otherwise, exception or string
+        """
+        async with ConnectPg() as conn:
+            if conn is None:
+                logger.debug("Error while connecting to DB during sync_executing")
+                return "Connection failed"
+
+            logger.debug("Synchronous executing")
+            try:
+                results = await conn.executemany(query_stmt, args)
+                logger.debug(f"results::\n{results}")
+                return results
+            except Exception as e:
+                logger.debug('executemany: Error during synchronous executing')
+                logger.exception(e)
+                return e
+
+    @staticmethod
+    async def pool_execute(query_stmt: str, args: List[Tuple]):
+        """
+        Execute a query through ascynpg.pool
+        :param query_stmt: query to execute
+        :param args: list of arguments which are supplied to the query one by one
+        :return:
+            if successful, list of results of queries
+            otherwise, exception
+        """
+
+        async def execute(stmt, arg, _pool):
+            async with _pool.acquire() as conn:
+                logger.debug(stmt)
+                logger.debug(arg)
+                return await conn.execute(stmt, *arg)
+
+        logger.debug("Asynchronous executing")
+        config = ConfigReader()
+        async with asyncpg.create_pool(host=config.get_options("Host"),
+                                       port=config.get_options("Port"),
+                                       user=config.get_options("User"),
+                                       database=config.get_options("Database"),
+                                       password=config.get_options("Password")) as pool:
+            queries = [execute(query_stmt, arg, pool) for arg in args]
+            results = await asyncio.gather(*queries, return_exceptions=True)
+            logger.debug(f":\n{results}")
+            return results
+
+    @staticmethod
+    async def delete(table, col_name, args: List[Tuple]):
+        """
+        Delete rows where col value is in the args list from table
+        :param table: table name
+        :param col_name: column name to check
+        :param args: argments to search for
+        :return:
+            When using executemany,
+                if successful, None
+                otherwise, exception or string
+            When using pool_execute,
+                if successful, list of results of queries
+                otherwise, exception
+        """
+        if not isinstance(args, List):
+            logger.error(f"args' type{type(args)} must be List[Tuple]")
+            return None
+        if not isinstance(args[0], Tuple):
+            logger.error(f"args element's type{type(args[0])} must be Tuple")
+            return None
+
+        stmt = f"DELETE FROM {table} WHERE {col_name} = $1"
+
+        logger.debug(f"Delete rows ...")
+        logger.debug(args)
+
+        # results = await self.pool_execute(stmt, args)
+        results = await DbUtil.executemany(stmt, args)
+        logger.debug(f":\n{results}")
+        return results
@@ -0,0 +1,280 @@
+"""
+Exports the rows of a query into a file a chunk at a time.
+Rows are fetched through a cursor and written as they come, so that
+exporting the whole history takes the memory of a single chunk.
+The file is written under a temporary name and appears only when complete.
+"""
+import os
+import csv
+import sqlite3
+import importlib.util
+from abc import abstractmethod
+from pathlib import Path
+from typing import List, Sequence
+from danaul_core.constants import EXPORT_CHUNK_SIZE
+
+# the last row of a worksheet is 1048576 including the header
+XLSX_MAX_ROWS = 1048575
+# chunks held back while a column has no value to tell its type
+PARQUET_MAX_PENDING_CHUNKS = 10
+
+
+class ChunkWriter:
+    """
+    Writes chunks of rows sharing the same columns into a file
+    """
+    def __init__(self, file_path: str):
+        self.file_path = Path(file_path)
+        self.tmp_path = self.file_path.with_name(self.file_path.name + '.tmp')
+        self.columns = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.close()
+            os.replace(self.tmp_path, self.file_path)
+        else:
+            self.abort()
+            self.tmp_path.unlink(missing_ok=True)
+
+    def write(self, columns: List[str], rows: Sequence[Sequence]):
+        """
+        :param columns: names of the columns, the same for every chunk
+        :param rows: a chunk of rows
+        :return:
+        """
+        if self.columns is None:
+            self.columns = columns
+            self.write_header(columns)
+        self.write_rows(rows)
+
+    @abstractmethod
+    def write_header(self, columns: List[str]):
+        """
+        Needs to be implemented in the subclasses
+        """
+
+    @abstractmethod
+    def write_rows(self, rows: Sequence[Sequence]):
+        """
+        Needs to be implemented in the subclasses
+        """
+
+    @abstractmethod
+    def close(self):
+        """
+        Needs to be implemented in the subclasses
+        Flushes the rest and closes the temporary file
+        """
+
+    def abort(self):
+        """
+        Closes the temporary file, which is removed after
+        """
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class CsvChunkWriter(ChunkWriter):
+    def __init__(self, file_path: str):
+        super().__init__(file_path)
+        # the BOM lets Excel read the korean text as utf-8
+        self.file = open(self.tmp_path, 'w', newline='', encoding='utf-8-sig')
+        self.writer = csv.writer(self.file)
+
+    def write_header(self, columns: List[str]):
+        self.writer.writerow(columns)
+
+    def write_rows(self, rows: Sequence[Sequence]):
+        self.writer.writerows(rows)
+
+    def close(self):
+        self.file.close()
+
+
+class XlsxChunkWriter(ChunkWriter):
+    """
+    Rows are streamed into a write-only workbook, moving on to
+    a new worksheet when one is full
+    """
+    def __init__(self, file_path: str):
+        super().__init__(file_path)
+        from openpyxl import Workbook
+        self.workbook = Workbook(write_only=True)
+        self.sheet = None
+        self.sheet_rows = 0
+
+    def _add_sheet(self):
+        self.sheet = self.workbook.create_sheet(f"Sheet{len(self.workbook.worksheets) + 1}")
+        self.sheet.append(self.columns)
+        self.sheet_rows = 0
+
+    def write_header(self, columns: List[str]):
+        self._add_sheet()
+
+    def write_rows(self, rows: Sequence[Sequence]):
+        for row in rows:
+            if self.sheet_rows == XLSX_MAX_ROWS:
+                self._add_sheet()
+            self.sheet.append(list(row))
+            self.sheet_rows += 1
+
+    def close(self):
+        if self.sheet is None:
+            # a workbook needs a worksheet even if there is no row
+            self.workbook.create_sheet()
+        self.workbook.save(self.tmp_path)
+
+
+class ParquetChunkWriter(ChunkWriter):
+    """
+    Each chunk becomes a row group. The schema of a parquet file is fixed
+    when it is opened, so the chunks are held back while a column has only
+    nulls, up to PARQUET_MAX_PENDING_CHUNKS, and then such a column is
+    written as string. Needs pyarrow
+    """
+    def __init__(self, file_path: str):
+        super().__init__(file_path)
+        import pyarrow
+        import pyarrow.parquet
+        self.pa = pyarrow
+        self.pq = pyarrow.parquet
+        self.writer = None
+        self.pending = []
+
+    def write_header(self, columns: List[str]):
+        pass
+
+    def write_rows(self, rows: Sequence[Sequence]):
+        if not rows:
+            return
+        table = self.pa.table({column: list(values)
+                               for column, values in zip(self.columns, zip(*rows))})
+        if self.writer is not None:
+            self.writer.write_table(table.cast(self.writer.schema))
+            return
+
+        self.pending.append(table)
+        # a null column of a chunk takes the type of the same column of the others
+        schema = self.pa.unify_schemas([pending.schema for pending in self.pending])
+        has_null = any(self.pa.types.is_null(field.type) for field in schema)
+        if has_null and len(self.pending) < PARQUET_MAX_PENDING_CHUNKS:
+            return
+        self._open(self.pa.schema([
+            field.with_type(self.pa.string()) if self.pa.types.is_null(field.type) else field
+            for field in schema]))
+
+    def _open(self, schema):
+        self.writer = self.pq.ParquetWriter(self.tmp_path, schema)
+        for table in self.pending:
+            self.writer.write_table(table.cast(schema))
+        self.pending = []
+
+    def close(self):
+        if self.writer is None:
+            if self.pending:
+                # every value is known, so a column of only nulls stays null
+                self._open(self.pa.unify_schemas([pending.schema for pending in self.pending]))
+            else:
+                self._open(self.pa.schema([(column, self.pa.null())
+                                           for column in self.columns or []]))
+        self.writer.close()
+
+
+EXPORT_WRITERS = {
+    '.xlsx': XlsxChunkWriter,
+    '.csv': CsvChunkWriter,
+}
+# for the save dialogs of Qt
+EXPORT_FILE_FILTER = "Excel (*.xlsx);;CSV (*.csv)"
+# parquet is offered only where pyarrow is installed
+if importlib.util.find_spec('pyarrow') is not None:
+    EXPORT_WRITERS['.parquet'] = ParquetChunkWriter
+    EXPORT_FILE_FILTER += ";;Parquet (*.parquet)"
+
+
+def make_writer(file_path: str) -> ChunkWriter:
+    """
+    :param file_path: its suffix chooses the format among EXPORT_WRITERS
+    :return:
+    """
+    suffix = Path(file_path).suffix.lower()
+    if suffix not in EXPORT_WRITERS:
+        raise ValueError(f"{suffix} is not one of the export formats {list(EXPORT_WRITERS.keys())}")
+    return EXPORT_WRITERS[suffix](file_path)
+
+
+def export_sqlite(conn: sqlite3.Connection,
+                  query: str,
+                  file_path: str,
+                  params: Sequence = (),
+                  chunk_size: int = EXPORT_CHUNK_SIZE) -> int:
+    """
+    :param conn:
+    :param query:
+    :param file_path:
+    :param params: arguments of the place holders ?
+    :param chunk_size: the number of rows fetched at a time
+    :return: the number of rows exported
+    """
+    cursor = conn.execute(query, params)
+    columns = [description[0] for description in cursor.description]
+    row_count = 0
+    with make_writer(file_path) as writer:
+        writer.write(columns, [])
+        while rows := cursor.fetchmany(chunk_size):
+            writer.write(columns, rows)
+            row_count += len(rows)
+    return row_count
+
+
+async def export_pg(query: str,
+                    file_path: str,
+                    args: Sequence = (),
+                    chunk_size: int = EXPORT_CHUNK_SIZE) -> int or None:
+    """
+    Streams the rows through a server side cursor of a connection of its own
+    :param query:
+    :param file_path:
+    :param args: arguments of the place holders $1, $2, ...
+    :param chunk_size: the number of rows fetched at a time
+    :return: the number of rows exported or None if the db cannot be reached
+    """
+    from danaul_core.db_utils import ConnectPg
+
+    async with ConnectPg() as conn:
+        if conn is None:
+            return None
+
+        # cursors live in a transaction
+        async with conn.transaction():
+            stmt = await conn.prepare(query)
+            columns = [attribute.name for attribute in stmt.get_attributes()]
+            cursor = await stmt.cursor(*args)
+            row_count = 0
+            with make_writer(file_path) as writer:
+                writer.write(columns, [])
+                while rows := await cursor.fetch(chunk_size):
+                    writer.write(columns, [tuple(row) for row in rows])
+                    row_count += len(rows)
+    return row_count
+
+
+async def export_pg_report(query: str, file_path: str) -> str:
+    """
+    export_pg for the apps, which show the result to the user
+    :param query:
+    :param file_path:
+    :return: the message of the result
+    """
+    try:
+        row_count = await export_pg(query, file_path)
+    except Exception as e:
+        return f"{file_path}\n내보내기 실패: {e}"
+    if row_count is None:
+        return "DB에 연결할 수 없어 내보내지 못했습니다."
+    return f"{row_count}건을 {file_path}로 내보냈습니다."
@@ -0,0 +1,296 @@
+import os
+import asyncio
+import pandas as pd
+from abc import abstractmethod
+from pathlib import Path
+from typing import Dict, List, Tuple
+from danaul_core.db_apis import DbApi
+from danaul_core.d_logger import Logs
+from danaul_core.singleton import Singleton
+from danaul_core.constants import LAB_SNAPSHOT_DIR, LAB_SNAPSHOT_DROP_COLUMNS
+
+
+logger = Logs().get_logger("db")
+
+
+class LabBase(metaclass=Singleton):
+    """
+    Holds a df per table read from the db, which the models of the app
+    are made of. Each app subclasses it as Lab with the queries of its tables.
+
+    Every table read from the db is also kept as a local snapshot. When the
+    snapshots of all the tables are there, the Lab starts from them without
+    waiting for the db, and sync_with_db reads again only the tables whose
+    watermark has moved since. When the db cannot be reached, the Lab keeps
+    the last snapshots and turns read_only.
+    """
+    # snapshots are not used when False, e.g. with the stand-ins of the benches
+    use_snapshots: bool = True
+    # the db tables each Lab table is read from, when not only the table itself
+    snapshot_sources: Dict[str, List[str]] = {}
+
+    def __init__(self, table_names: List[str]):
+        self.db_api = DbApi()
+        self.di_db_util = self.db_api.db_util
+        self.show_inactive_items = False
+
+        self.table_df = {table: None for table in table_names}
+
+        self.table_column_names = dict()
+        self._set_db_column_names()
+
+        self.snapshot_dir = Path(LAB_SNAPSHOT_DIR)
+        self.watermarks: Dict[str, Tuple] = {}
+        # True while the tables are those of the snapshots, not yet synced
+        self.from_snapshot = False
+        # True when the db could not be reached at the last try
+        self.read_only = False
+
+        self.bool_initialized = False
+        if self.use_snapshots and self._load_snapshots():
+            self.from_snapshot = True
+            self._after_tables_loaded()
+            self.bool_initialized = True
+        if not self.bool_initialized:
+            loop = asyncio.new_event_loop()
+            try:
+                loop.run_until_complete(self.async_init())
+            finally:
+                loop.close()
+
+    async def async_init(self):
+        if self.bool_initialized is False:
+            # getting dfs
+            await self._read_tables(list(self.table_df.keys()))
+            self._after_tables_loaded()
+
+        self.bool_initialized = True
+        return self
+
+    def __await__(self):
+        return self.async_init().__await__()
+
+    @abstractmethod
+    def _set_db_column_names(self):
+        """
+        Needs to be implemented in the subclasses
+        Sets table_column_names of the tables which models update the db with
+        :return:
+        """
+
+    @abstractmethod
+    def make_query(self, table: str, **kwargs) -> str:
+        """
+        Needs to be implemented in the subclasses
+        :param table:
+        :param kwargs: conditions passed to update_lab_df_from_db
+        :return: the query reading the rows of table
+        """
+
+    def _after_tables_loaded(self):
+        """
+        Needs to be implemented if necessary
+        Called whenever the tables are read at the start or synced
+        :return:
+        """
+        pass
+
+    async def _read_tables(self, tables: List[str], watermarks: Dict[str, Tuple] = None):
+        """
+        Reads the tables concurrently and keeps snapshots of them.
+        A table the db fails to give keeps its current df, or the last
+        snapshot if it has none yet
+        :param tables:
+        :param watermarks: those of _get_watermarks, read before the tables
+        :return:
+        """
+        if watermarks is None and self.use_snapshots:
+            # the watermarks are taken before the rows, so that changes made
+            # in between move them on by the next sync
+            watermarks = await self._get_watermarks()
+
+        get_data = [self._get_df_from_db(table) for table in tables]
+        data_dfs: List = await asyncio.gather(*get_data)
+        self.read_only = any(df is None for df in data_dfs)
+        for table, df in zip(tables, data_dfs):
+            if df is None:
+                if self.table_df[table] is None:
+                    logger.warning(f"{table} is read from the last snapshot")
+                    self.table_df[table] = self._read_snapshot_df(table)
+                continue
+
+            logger.debug(f"Retrieved DB data \n{df}")
+            self.table_df[table] = df
+            if watermarks is not None:
+                self._save_snapshot(table, df, self._table_watermark(table, watermarks))
+
+    async def sync_with_db(self) -> List[str]:
+        """
+        Reads again the tables whose rows have changed in the db
+        since they were read
+        :return: the names of the tables read again
+        """
+        watermarks = await self._get_watermarks()
+        if watermarks is None:
+            self.read_only = True
+            return []
+
+        stale_tables = [table for table in self.table_df.keys()
+                        if self._is_stale(table, watermarks)]
+        logger.debug(f"tables changed in the db: {stale_tables}")
+        if stale_tables:
+            await self._read_tables(stale_tables, watermarks)
+            self._after_tables_loaded()
+        else:
+            self.read_only = False
+        self.from_snapshot = False
+        return stale_tables
+
+    async def is_db_reachable(self) -> bool:
+        """
+        Checks the connection to the db and updates read_only
+        :return:
+        """
+        self.read_only = await self.di_db_util.select_query("SELECT 1") is None
+        return not self.read_only
+
+    async def _get_watermarks(self) -> Dict[str, Tuple] or None:
+        """
+        The version of each source table in table_versions, which the
+        triggers of the table raise with every statement writing to it.
+        A db without table_versions gives no versions, and then every
+        table is taken as changed
+        :return: a dict of the table and its watermark,
+        or None if the db cannot be reached
+        """
+        sources = sorted({source for table in self.table_df.keys()
+                          for source in self.snapshot_sources.get(table, [table])})
+        records = await self.di_db_util.select_query(
+            "SELECT table_name, version FROM table_versions WHERE table_name = ANY($1::text[])",
+            [sources])
+        if records is None:
+            if not await self.is_db_reachable():
+                return None
+            logger.warning("no table_versions in the db, install it with the init script --versions")
+            return {source: (None,) for source in sources}
+        return {record[0]: (record[1],) for record in records}
+
+    def _table_watermark(self, table: str, watermarks: Dict[str, Tuple]) -> Tuple:
+        return tuple((source, *watermarks.get(source, ()))
+                     for source in self.snapshot_sources.get(table, [table]))
+
+    def _is_stale(self, table: str, watermarks: Dict[str, Tuple]) -> bool:
+        watermark = self._table_watermark(table, watermarks)
+        # a source without a version cannot tell whether it has changed
+        return (self.watermarks.get(table) != watermark
+                or any(None in source_watermark for source_watermark in watermark))
+
+    def _snapshot_path(self, table: str) -> Path:
+        return self.snapshot_dir / f"{table}.pkl"
+
+    def _save_snapshot(self, table: str, df: pd.DataFrame, watermark: Tuple):
+        self.watermarks[table] = watermark
+        snapshot = {
+            'query': self.make_query(table),
+            'watermark': watermark,
+            'df': df.drop(columns=LAB_SNAPSHOT_DROP_COLUMNS, errors='ignore')
+        }
+        snapshot_path = self._snapshot_path(table)
+        tmp_path = snapshot_path.with_suffix('.tmp')
+        try:
+            os.makedirs(self.snapshot_dir, exist_ok=True)
+            pd.to_pickle(snapshot, tmp_path)
+            # readers never see a half written snapshot
+            os.replace(tmp_path, snapshot_path)
+        except Exception as e:
+            logger.warning(f"failed to save the snapshot {snapshot_path}: {e}")
+            tmp_path.unlink(missing_ok=True)
+
+    def _read_snapshot(self, table: str) -> Dict or None:
+        snapshot_path = self._snapshot_path(table)
+        if not snapshot_path.exists():
+            return None
+        try:
+            return pd.read_pickle(snapshot_path)
+        except Exception as e:
+            logger.warning(f"removing a broken snapshot {snapshot_path}: {e}")
+            snapshot_path.unlink(missing_ok=True)
+            return None
+
+    def _read_snapshot_df(self, table: str) -> pd.DataFrame:
+        snapshot = self._read_snapshot(table)
+        if snapshot is None:
+            return pd.DataFrame()
+        return snapshot['df']
+
+    def _load_snapshots(self) -> bool:
+        """
+        Sets the tables to their snapshots if every table has one
+        made by the current query
+        :return: True if the tables are set
+        """
+        snapshots = {}
+        for table in self.table_df.keys():
+            snapshot = self._read_snapshot(table)
+            if snapshot is None or snapshot['query'] != self.make_query(table):
+                logger.debug(f"no snapshot of {table} to start from")
+                return False
+            snapshots[table] = snapshot
+
+        for table, snapshot in snapshots.items():
+            self.table_df[table] = snapshot['df']
+            self.watermarks[table] = snapshot['watermark']
+        logger.debug(f"started from the snapshots in {self.snapshot_dir}")
+        return True
+
+    async def _get_df_from_db(self, table: str, **kwargs) -> pd.DataFrame or None:
+        """
+        :param table:
+        :param kwargs:
+        :return: the df of table or None if the db fails to give it
+        """
+        logger.debug(f"{table}")
+        query = self.make_query(table, **kwargs)
+        logger.debug(query)
+
+        db_results = await self.di_db_util.select_query(query)
+        if db_results is None:
+            return None
+        df = self._db_to_df(db_results)
+        return df
+
+    def _db_to_df(self, db_records) -> pd.DataFrame:
+        """
+        Records share the same columns, so the values are handed to pandas
+        as tuples instead of building a dict for every record
+        :param db_records: a list of asyncpg Records
+        :return:
+        """
+        if len(db_records) == 0:
+            return pd.DataFrame()
+        columns = list(db_records[0].keys())
+        df = pd.DataFrame([tuple(record) for record in db_records], columns=columns)
+        # only object columns can hold NULLs as None
+        obj_cols = df.columns[df.dtypes == object]
+        df[obj_cols] = df[obj_cols].fillna("")
+        return df
+
+    async def update_lab_df_from_db(self, table: str, **kwargs):
+        logger.debug(f"table {table}")
+        df = await self._get_df_from_db(table, **kwargs)
+        if df is None:
+            # the rows at hand are still better than none while offline
+            logger.warning(f"keeping the current rows of {table}")
+            self.read_only = True
+            return
+        self.read_only = False
+        self.table_df[table] = df
+
+    async def insert_df(self, table: str, new_df: pd.DataFrame):
+        return await self.db_api.insert_df(table, new_df)
+
+    async def update_df(self, table: str, up_df: pd.DataFrame):
+        return await self.db_api.update_df(table, up_df)
+
+    async def delete_df(self, table: str, del_df: pd.DataFrame):
+        return await self.db_api.delete_df(table, del_df)
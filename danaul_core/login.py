@@ -0,0 +1,77 @@
+import bcrypt
+from typing import Type
+from PySide6.QtCore import QObject, QRunnable, Signal
+from danaul_core.db_utils import DbUtil
+from danaul_core.d_logger import Logs
+
+
+logger = Logs().get_logger("main")
+
+
+async def get_stored_password(user_name: str) -> bytes or None:
+    """
+    Reads the password hash through the pool of the running loop
+    :param user_name:
+    :return: the bcrypt hash or None if there is no such user
+    :raises ConnectionError: if the db fails to give the users
+    """
+    records = await DbUtil.pool_select_query(
+        "SELECT user_password FROM users WHERE user_name = $1", [user_name])
+    if records is None:
+        raise ConnectionError("failed to read the users from the db")
+    if not records:
+        return None
+    return bytes(records[0]['user_password'])
+
+
+class PasswordCheckSignals(QObject):
+    # True if the password matches the hash
+    checked = Signal(bool)
+
+
+class PasswordCheck(QRunnable):
+    """
+    Checks a password against its bcrypt hash in a thread of the pool.
+    bcrypt is slow on purpose, so the GUI thread does not wait for it
+    """
+    def __init__(self, password: str, stored_password: bytes):
+        super().__init__()
+        self.password = password
+        self.stored_password = stored_password
+        self.signals = PasswordCheckSignals()
+
+    def run(self):
+        try:
+            verified = bcrypt.checkpw(self.password.encode('utf-8'), self.stored_password)
+        except ValueError as e:
+            logger.error(f"invalid password hash: {e}")
+            verified = False
+        self.signals.checked.emit(verified)
+
+
+class LabPrefetch(QRunnable):
+    """
+    Makes the Lab in a thread of the pool while the user is logging in,
+    so that its tables are at hand when the main window asks for it.
+    Lab is a Singleton, so the main window either gets the Lab made here
+    or waits until it is made. A Lab made while the db cannot be reached
+    is dropped, and the main window makes its own.
+    """
+    def __init__(self, lab_class: Type):
+        super().__init__()
+        self.lab_class = lab_class
+
+    def run(self):
+        try:
+            lab = self.lab_class()
+        except Exception as e:
+            # the main window makes the Lab again when it starts
+            logger.error(f"failed to prefetch {self.lab_class.__name__}")
+            logger.exception(e)
+            return
+        if lab.read_only:
+            # otherwise it would stay read only for the whole session
+            self.lab_class.discard(lab)
+            logger.warning(f"{self.lab_class.__name__} prefetched without the db is dropped")
+        else:
+            logger.debug(f"{self.lab_class.__name__} prefetched")
@@ -0,0 +1,112 @@
+"""
+An asyncpg-compatible stand-in for DbUtil serving in-memory tables.
+Shared by the benchmark scripts of the apps; not used by the apps themselves
+"""
+import re
+import pandas as pd
+from typing import Dict, List, Tuple
+from danaul_core.db_utils import DbUtil
+
+
+class StandInRecord(tuple):
+    """
+    Behaves like asyncpg.Record: a tuple of values which can be looked up
+    by column name as well
+    """
+    def __new__(cls, values, key_index: Dict[str, int]):
+        record = super().__new__(cls, values)
+        record.key_index = key_index
+        return record
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            key = self.key_index[key]
+        return super().__getitem__(key)
+
+    def keys(self):
+        return iter(self.key_index)
+
+    def values(self):
+        return iter(self)
+
+    def items(self):
+        return zip(self.key_index, self)
+
+    def get(self, key, default=None):
+        return self[key] if key in self.key_index else default
+
+
+def to_records(df: pd.DataFrame) -> List[StandInRecord]:
+    key_index = {col: i for i, col in enumerate(df.columns)}
+    # to_dict converts numpy scalars into python objects as asyncpg returns
+    return [StandInRecord(tuple(r.values()), key_index) for r in df.to_dict('records')]
+
+
+class PgStandIn:
+    """
+    Replaces DbUtil.select_query and DbUtil.executemany with in-memory
+    versions serving the tables.
+    Only the parts of SQL that Lab generates are understood:
+    FROM table, WHERE/AND col = n, ORDER BY ... DESC and LIMIT n.
+    Subclasses serve other queries by overriding table_of
+    Used as a context manager
+    """
+    from_re = re.compile(r'FROM\s+([a-z_]+)', re.IGNORECASE)
+    col_re = re.compile(r'(?:WHERE|AND)\s+(?:[a-z_]+\.)?([a-z_]+)\s*=\s*(\d+)\b', re.IGNORECASE)
+    limit_re = re.compile(r'LIMIT\s+(\d+)', re.IGNORECASE)
+    place_holder_re = re.compile(r'\$\d+')
+
+    def __init__(self, tables: Dict[str, pd.DataFrame]):
+        self.tables = tables
+        self.records = {table: to_records(df) for table, df in tables.items()}
+        self.statements: List[Tuple[str, int]] = []
+        self._saved = {}
+
+    def __enter__(self):
+        stand_in = self
+
+        async def select_query(query: str, args: List = None):
+            return stand_in.select(query)
+
+        async def executemany(statement: str, args: List[Tuple]):
+            return stand_in.executemany(statement, args)
+
+        # DbUtil is made of static methods
+        self._saved = {'select_query': DbUtil.__dict__['select_query'],
+                       'executemany': DbUtil.__dict__['executemany']}
+        DbUtil.select_query = staticmethod(select_query)
+        DbUtil.executemany = staticmethod(executemany)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        for name, func in self._saved.items():
+            setattr(DbUtil, name, func)
+
+    def table_of(self, query: str) -> str:
+        """
+        :param query:
+        :return: the name of the records the query reads
+        """
+        return self.from_re.search(query).group(1)
+
+    def select(self, query: str):
+        records = self.records[self.table_of(query)]
+
+        for col, val in self.col_re.findall(query):
+            records = [r for r in records if r[col] == int(val)]
+        if 'DESC' in query:
+            records = records[::-1]
+        limit_match = self.limit_re.search(query)
+        if limit_match is not None:
+            records = records[:int(limit_match.group(1))]
+        return records
+
+    def executemany(self, statement: str, args: List[Tuple]):
+        # asyncpg checks the argument count of every row before sending it
+        n_args = len(set(self.place_holder_re.findall(statement)))
+        for arg in args:
+            if len(arg) != n_args:
+                return ValueError(f"the statement expects {n_args} arguments, "
+                                  f"{len(arg)} were passed")
+        self.statements.append((statement, len(args)))
+        return None
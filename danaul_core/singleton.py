@@ -0,0 +1,39 @@
+import threading
+
+
+class Singleton(type):
+    """
+    Makes a single instance per class.
+    An instance may be made in a worker thread, like the Lab prefetched
+    during the login, so each class is made under a lock of its own.
+    The lock is reentrant as an instance may make other singletons,
+    even of the same class, while it is made.
+    """
+    _instances = {}
+    _locks = {}
+    _locks_lock = threading.Lock()
+
+    def _lock(cls) -> threading.RLock:
+        with Singleton._locks_lock:
+            return Singleton._locks.setdefault(cls, threading.RLock())
+
+    def __call__(cls, *args, **kwargs):
+        instance = cls._instances.get(cls)
+        if instance is not None:
+            return instance
+
+        with cls._lock():
+            if cls not in cls._instances:
+                cls._instances[cls] = super(Singleton, cls).__call__(*args, **kwargs)
+        return cls._instances[cls]
+
+    def discard(cls, instance):
+        """
+        Forgets the instance so that the next call makes a new one,
+        unless it has already been replaced
+        :param instance:
+        :return:
+        """
+        with cls._lock():
+            if cls._instances.get(cls) is instance:
+                del cls._instances[cls]
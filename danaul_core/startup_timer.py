@@ -0,0 +1,42 @@
+import time
+from typing import List, Tuple
+from danaul_core.singleton import Singleton
+from danaul_core.d_logger import Logs
+
+
+logger = Logs().get_logger("main")
+
+
+class StartupTimer(metaclass=Singleton):
+    """
+    Timeline of the app start.
+    The entry script makes it before its other imports, marks the end of
+    each stage and reports once the first window is on the screen
+    """
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.marks: List[Tuple[str, float]] = []
+        self.reported = False
+
+    def mark(self, stage: str):
+        """
+        :param stage: the name of the stage just finished
+        :return:
+        """
+        self.marks.append((stage, time.perf_counter()))
+
+    def report(self) -> str:
+        """
+        Logs the timeline, only the first time it is called
+        :return: the timeline
+        """
+        lines = []
+        last = self.start
+        for stage, at in self.marks:
+            lines.append(f"{at - self.start:8.3f} s  (+{at - last:.3f} s)  {stage}")
+            last = at
+        timeline = '\n'.join(lines)
+        if not self.reported:
+            logger.info(f"startup timeline\n{timeline}")
+            self.reported = True
+        return timeline